@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+流式统计
+Streaming Aggregates
+
+Report statistics maintained incrementally as items are collected, so
+reports (and live progress displays) read precomputed state instead of
+re-scanning the collected lists.
+"""
+
+import heapq
+import threading
+from operator import itemgetter
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from sentiment import KeywordMatcher
+
+
+# Items kept per top-K ranking
+DEFAULT_TOP_K = 10
+
+
+class StreamAggregator:
+    """
+    Running statistics over a stream of items, updated one item at a time.
+
+    Maintains the item count, per-metric sums (and so means), the sentiment
+    label distribution plain and engagement-weighted, the top-K items per
+    ranking (bounded heaps) and, given a keyword matcher, the number of items
+    mentioning each keyword and their summed engagement weight. Label and
+    keyword counts keep first-seen order,
+    like the distributions of sentiment_distribution. Safe to read from
+    another thread while items are being added.
+    """
+
+    def __init__(self, metrics: Optional[Dict[str, Callable[[Any], float]]] = None,
+                 label_of: Optional[Callable[[Any], str]] = None,
+                 weight_of: Optional[Callable[[Any], float]] = None,
+                 rank_by: Optional[Dict[str, Callable[[Any], float]]] = None,
+                 top_k: int = DEFAULT_TOP_K,
+                 keywords: Optional[KeywordMatcher] = None,
+                 text_of: Optional[Callable[[Any], str]] = None):
+        """
+        Initialize the aggregator.
+
+        Args:
+            metrics: Metric name -> value of an item, summed over items
+            label_of: Sentiment label of an item
+            weight_of: Engagement weight of an item, for the weighted distribution
+            rank_by: Ranking name -> sort key of an item, for top()
+            top_k: Items kept per ranking
+            keywords: Matcher whose keywords are counted per item
+            text_of: Text of an item, scanned with the keyword matcher
+        """
+        self.metrics = metrics or {}
+        self.label_of = label_of
+        self.weight_of = weight_of
+        self.rank_by = rank_by or {}
+        self.top_k = top_k
+        self.keywords = keywords
+        self.text_of = text_of
+        # Keyword -> position in the lexicon, so an item's keywords are recorded in lexicon order
+        self._keyword_rank = {keyword: i for i, keyword in enumerate(keywords.weights)} if keywords else {}
+
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sums: Dict[str, float] = dict.fromkeys(self.metrics, 0)
+        self._labels: Dict[str, int] = {}
+        self._weighted: Dict[str, float] = {}
+        # Min-heaps of (key, -sequence, item): the smallest key, and among equal
+        # keys the latest item, is evicted first, matching a stable sort
+        self._heaps: Dict[str, List[Tuple[Any, int, Any]]] = {name: [] for name in self.rank_by}
+        self._keyword_counts: Dict[str, int] = {}
+        self._keyword_weights: Dict[str, float] = {}
+
+    def add(self, item: Any):
+        """Fold one item into the statistics."""
+        self._fold(item, self._observe(item))
+
+    def _observe(self, item: Any) -> Tuple:
+        """Everything the statistics need from an item, computed outside the lock."""
+        values = [(name, value_of(item)) for name, value_of in self.metrics.items()]
+        label = self.label_of(item) if self.label_of else None
+        weight = float(self.weight_of(item)) if self.weight_of else None
+        ranks = [(name, key(item)) for name, key in self.rank_by.items()]
+        found = (sorted(self.keywords.matches(self.text_of(item)), key=self._keyword_rank.__getitem__)
+                 if self.keywords else ())
+        return values, label, weight, ranks, found
+
+    def _fold(self, item: Any, observation: Tuple):
+        values, label, weight, ranks, found = observation
+        with self._lock:
+            sequence = self.count
+            self.count += 1
+            for name, value in values:
+                self.sums[name] = self.sums.get(name, 0) + value
+            if label is not None:
+                self._labels[label] = self._labels.get(label, 0) + 1
+                if weight is not None:
+                    self._weighted[label] = self._weighted.get(label, 0.0) + weight
+            for name, rank in ranks:
+                heap = self._heaps.setdefault(name, [])
+                entry = (rank, -sequence, item)
+                if len(heap) < self.top_k:
+                    heapq.heappush(heap, entry)
+                elif entry[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, entry)
+            for keyword in found:
+                self._keyword_counts[keyword] = self._keyword_counts.get(keyword, 0) + 1
+                if weight is not None:
+                    self._keyword_weights[keyword] = self._keyword_weights.get(keyword, 0.0) + weight
+
+    def extend(self, items: Iterable[Any]):
+        """Fold several items into the statistics."""
+        for item in items:
+            self.add(item)
+
+    def total(self, metric: str) -> float:
+        """Sum of a metric over the items added so far."""
+        return self.sums.get(metric, 0)
+
+    def mean(self, metric: str) -> float:
+        """Mean of a metric over the items added so far (0 when empty)."""
+        with self._lock:
+            return self.sums.get(metric, 0) / self.count if self.count else 0
+
+    def labels(self, weighted: bool = False) -> Dict[str, float]:
+        """Sentiment label distribution, as counts or engagement-weighted sums."""
+        with self._lock:
+            return dict(self._weighted if weighted else self._labels)
+
+    def top(self, ranking: str, k: Optional[int] = None) -> List[Any]:
+        """Highest-ranked items of a ranking, best first; ties keep arrival order."""
+        with self._lock:
+            entries = sorted(self._heaps.get(ranking, []), key=lambda entry: entry[:2], reverse=True)
+        return [item for _, _, item in entries[:k]]
+
+    def keyword_counts(self, label: Optional[str] = None, weighted: bool = False) -> Dict[str, float]:
+        """
+        Number of items mentioning each keyword, in order of first mention.
+
+        Args:
+            label: Only keywords of this lexicon label (e.g. "positive")
+            weighted: Sum the engagement weights of those items instead of counting them
+        """
+        with self._lock:
+            if weighted:
+                counts = {keyword: self._keyword_weights.get(keyword, 0.0) for keyword in self._keyword_counts}
+            else:
+                counts = dict(self._keyword_counts)
+        if label is None:
+            return counts
+        weights = self.keywords.weights
+        return {keyword: n for keyword, n in counts.items() if label in weights.get(keyword, ())}
+
+    def top_keywords(self, n: Optional[int] = None, label: Optional[str] = None,
+                     weighted: bool = False) -> List[Tuple[str, float]]:
+        """
+        Keywords ranked by the number of items mentioning them (or by their
+        summed engagement weight), as (keyword, frequency) pairs.
+
+        Args:
+            n: Keep the n most frequent (None keeps all)
+            label: Only keywords of this lexicon label (e.g. "positive")
+            weighted: Rank by summed engagement weight
+
+        Returns:
+            Most frequent first; ties keep the order of first mention
+        """
+        counts = self.keyword_counts(label, weighted=weighted).items()
+        if n is None:
+            return sorted(counts, key=itemgetter(1), reverse=True)
+        return heapq.nlargest(n, counts, key=itemgetter(1))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current statistics as plain data, e.g. for a live progress display."""
+        with self._lock:
+            return {
+                "count": self.count,
+                "sums": dict(self.sums),
+                "means": {name: total / self.count if self.count else 0 for name, total in self.sums.items()},
+                "sentiment_distribution": dict(self._labels),
+                "weighted_sentiment": dict(self._weighted),
+                "keyword_counts": dict(self._keyword_counts),
+                "keyword_weights": dict(self._keyword_weights)
+            }
+
+
+class GroupedAggregator:
+    """
+    A StreamAggregator per group (e.g. per platform) plus one over all items.
+
+    Groups keep the order in which they were first fed. Each item is observed
+    once, by its group's aggregator, and that observation is folded into both
+    the group and the totals, so groups may be configured differently (e.g.
+    per-platform like counts) and the totals combine them.
+    """
+
+    def __init__(self, factory: Callable[[Optional[Hashable]], StreamAggregator]):
+        """
+        Initialize the grouped aggregator.
+
+        Args:
+            factory: Builds the aggregator of a group from its key; called with
+                None for the overall totals
+        """
+        self.factory = factory
+        self.total = factory(None)
+        self._lock = threading.Lock()
+        self._groups: Dict[Hashable, StreamAggregator] = {}
+
+    def group(self, key: Hashable) -> StreamAggregator:
+        """Aggregator of one group, created empty on first use."""
+        aggregator = self._groups.get(key)
+        if aggregator is None:
+            with self._lock:
+                aggregator = self._groups.get(key)
+                if aggregator is None:
+                    aggregator = self._groups[key] = self.factory(key)
+        return aggregator
+
+    def groups(self) -> Dict[Hashable, StreamAggregator]:
+        """Aggregators of all groups fed so far."""
+        with self._lock:
+            return dict(self._groups)
+
+    def add(self, key: Hashable, item: Any):
+        """Fold one item into its group and the overall totals."""
+        aggregator = self.group(key)
+        observation = aggregator._observe(item)
+        aggregator._fold(item, observation)
+        self.total._fold(item, observation)
+
+    def extend(self, key: Hashable, items: Iterable[Any]):
+        """Fold several items of one group into it and the overall totals."""
+        for item in items:
+            self.add(key, item)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Snapshots of every group and of the totals."""
+        return {
+            "groups": {key: aggregator.snapshot() for key, aggregator in self.groups().items()},
+            "total": self.total.snapshot()
+        }
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+词表注册中心
+Lexicon Registry
+
+Sentiment and topic keyword lists loaded from versioned data files in
+lexicons/, one file per research topic, with compiled matchers cached on disk.
+Trained sentiment models (see sentiment_model) sit next to them as
+<name>.<lexicon>.npz and replace the keyword lists where present.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sentiment import MATCHER_STATE_FORMAT, ClassificationMemo, KeywordMatcher, MemoizedMatcher
+from sentiment_model import SentimentModel, load_model
+
+
+# Lexicon data files, one <name>.json per research topic
+LEXICON_DIR = Path(__file__).parent / "lexicons"
+
+# Compiled matcher tables, keyed by the hash of the keyword lists they were built from
+COMPILED_CACHE_DIR = Path(__file__).parent / ".cache" / "lexicons"
+
+
+class Lexicon:
+    """
+    One loaded lexicon file.
+
+    A file holds several named lexicons (e.g. "sentiment", "comment_topics"),
+    each a mapping of label -> keyword list:
+
+        {"name": "xiaomi_car", "version": "1.0", "description": "...",
+         "lexicons": {"sentiment": {"positive": [...], "negative": [...]}}}
+    """
+
+    def __init__(self, path: Path, content: bytes, cache_dir: Optional[Path] = COMPILED_CACHE_DIR):
+        """
+        Parse a lexicon file.
+
+        Args:
+            path: Data file the content was read from
+            content: Raw file content
+            cache_dir: Directory of compiled matcher tables (None disables the disk cache)
+        """
+        data = json.loads(content.decode("utf-8"))
+        self.path = Path(path)
+        self.name: str = data.get("name") or self.path.stem
+        self.version: str = str(data.get("version", "0"))
+        self.description: str = data.get("description", "")
+        self.content_hash = hashlib.sha256(content).hexdigest()
+        self.lexicons: Dict[str, Dict[str, List[str]]] = data.get("lexicons", {})
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.stats = {"compiled": 0, "loaded": 0}
+
+        self._lock = threading.Lock()
+        self._matchers: Dict[str, KeywordMatcher] = {}
+
+    def __repr__(self) -> str:
+        return f"Lexicon({self.name!r}, version={self.version!r}, hash={self.content_hash[:12]})"
+
+    def keywords(self, lexicon: str, label: Optional[str] = None):
+        """
+        Keyword lists of a lexicon.
+
+        Args:
+            lexicon: Lexicon name, e.g. "sentiment"
+            label: Label within it, e.g. "positive"; None returns all labels
+
+        Returns:
+            The label's keyword list, or the label -> keyword list mapping
+        """
+        if lexicon not in self.lexicons:
+            raise KeyError(f"lexicon {self.name!r} has no {lexicon!r} (has: {', '.join(self.lexicons)})")
+        labels = self.lexicons[lexicon]
+        return labels if label is None else labels.get(label, [])
+
+    def matcher(self, lexicon: str) -> KeywordMatcher:
+        """Compiled single-pass matcher over a lexicon's labels."""
+        matcher = self._matchers.get(lexicon)
+        if matcher is not None:
+            return matcher
+        with self._lock:
+            if lexicon not in self._matchers:
+                self._matchers[lexicon] = self._compile(self.keywords(lexicon))
+            return self._matchers[lexicon]
+
+    def _compile(self, labels: Dict[str, List[str]]) -> KeywordMatcher:
+        """Load the matcher's tables from the disk cache, compiling them on a miss."""
+        key = hashlib.sha256(json.dumps(
+            {"format": MATCHER_STATE_FORMAT, "labels": labels},
+            ensure_ascii=False, sort_keys=True
+        ).encode("utf-8")).hexdigest()
+        cache_file = self.cache_dir / f"{key}.json" if self.cache_dir is not None else None
+
+        if cache_file is not None and cache_file.exists():
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    matcher = KeywordMatcher.from_state(json.load(f))
+                self.stats["loaded"] += 1
+                return matcher
+            except (OSError, ValueError, KeyError):
+                # Unreadable or stale entry: rebuild it below
+                pass
+
+        matcher = KeywordMatcher(labels)
+        self.stats["compiled"] += 1
+        if cache_file is not None:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(matcher.state(), f, ensure_ascii=False)
+            os.replace(tmp_path, cache_file)
+        return matcher
+
+
+class LexiconRegistry:
+    """
+    Lexicons by topic name, loaded lazily from LEXICON_DIR.
+
+    Callers should look matchers up through the registry when they need them
+    (registry.matcher("xiaomi_car", "sentiment")) rather than holding on to
+    them, so a long-running process picks up edited files: call refresh(), or
+    pass reload_interval to have lookups check the files themselves.
+    """
+
+    def __init__(self, directory: Path = LEXICON_DIR, cache_dir: Optional[Path] = COMPILED_CACHE_DIR,
+                 reload_interval: Optional[float] = None, memo: Optional[ClassificationMemo] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            directory: Directory of <name>.json lexicon files
+            cache_dir: Directory of compiled matcher tables (None disables the disk cache)
+            reload_interval: If set, lookups re-check the files at most this often (seconds)
+            memo: Memo of classification results put in front of every matcher
+        """
+        self.directory = Path(directory)
+        self.cache_dir = cache_dir
+        self.reload_interval = reload_interval
+        self.memo = memo
+        self._lock = threading.Lock()
+        self._lexicons: Dict[str, Lexicon] = {}
+        self._mtimes: Dict[str, int] = {}
+        self._models: Dict[str, Tuple[Optional[int], Optional[SentimentModel]]] = {}
+        self._last_check = time.monotonic()
+
+    def names(self) -> List[str]:
+        """Names of the lexicon files available."""
+        return sorted(path.stem for path in self.directory.glob("*.json"))
+
+    def get(self, name: str) -> Lexicon:
+        """Return the current version of a lexicon, loading it on first use."""
+        if self.reload_interval is not None and time.monotonic() - self._last_check >= self.reload_interval:
+            self.refresh()
+        lexicon = self._lexicons.get(name)
+        if lexicon is not None:
+            return lexicon
+        with self._lock:
+            if name not in self._lexicons:
+                self._load(name)
+            return self._lexicons[name]
+
+    def matcher(self, name: str, lexicon: str) -> KeywordMatcher:
+        """Compiled matcher of one lexicon of a topic, e.g. ("xiaomi_car", "sentiment")."""
+        matcher = self.get(name).matcher(lexicon)
+        return MemoizedMatcher(matcher, self.memo) if self.memo is not None else matcher
+
+    def keywords(self, name: str, lexicon: str, label: Optional[str] = None):
+        """Keyword lists of one lexicon of a topic, see Lexicon.keywords."""
+        return self.get(name).keywords(lexicon, label)
+
+    def model(self, name: str, lexicon: str) -> Optional[SentimentModel]:
+        """
+        Trained sentiment model for one lexicon of a topic, e.g. ("xiaomi_car", "sentiment").
+
+        Returns None, meaning "classify with the lexicon", when there is no
+        <name>.<lexicon>.npz file or NumPy is not installed.
+        """
+        if self.reload_interval is not None and time.monotonic() - self._last_check >= self.reload_interval:
+            self.refresh()
+        key = f"{name}.{lexicon}"
+        if key not in self._models:
+            with self._lock:
+                if key not in self._models:
+                    path = self.directory / f"{key}.npz"
+                    self._models[key] = (self._mtime(path), load_model(path))
+        return self._models[key][1]
+
+    @staticmethod
+    def _mtime(path: Path) -> Optional[int]:
+        try:
+            return path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def refresh(self) -> List[str]:
+        """
+        Reload lexicon files that changed on disk.
+
+        A file is re-read when its modification time changes and replaced only
+        when its content hash changes; matchers of replaced lexicons are
+        rebuilt (or loaded from the disk cache) on next use.
+
+        Returns:
+            Names of the lexicons (and name.lexicon keys of models) that were replaced
+        """
+        replaced = []
+        with self._lock:
+            self._last_check = time.monotonic()
+            for name in list(self._lexicons):
+                path = self.directory / f"{name}.json"
+                try:
+                    mtime = path.stat().st_mtime_ns
+                except OSError:
+                    # Deleted or being rewritten: keep serving the loaded version
+                    continue
+                if mtime == self._mtimes.get(name):
+                    continue
+                previous = self._lexicons[name]
+                try:
+                    self._load(name)
+                except (OSError, ValueError) as e:
+                    # Keep the loaded version and skip this file until it changes again
+                    print(f"词表重载失败 {name}: {e}")
+                    self._lexicons[name] = previous
+                    self._mtimes[name] = mtime
+                    continue
+                if self._lexicons[name].content_hash != previous.content_hash:
+                    replaced.append(name)
+                else:
+                    self._lexicons[name] = previous
+            for key, (mtime, _) in list(self._models.items()):
+                if self._mtime(self.directory / f"{key}.npz") != mtime:
+                    # Added, retrained or removed: load (or drop) it on next use
+                    del self._models[key]
+                    replaced.append(key)
+        return replaced
+
+    def _load(self, name: str):
+        path = self.directory / f"{name}.json"
+        if not path.exists():
+            raise KeyError(f"no lexicon file {path} (available: {', '.join(self.names())})")
+        mtime = path.stat().st_mtime_ns
+        content = path.read_bytes()
+        self._lexicons[name] = Lexicon(path, content, cache_dir=self.cache_dir)
+        self._mtimes[name] = mtime
+
+    def summary(self) -> List[str]:
+        """One line per loaded lexicon: name, version and content hash."""
+        lines = [f"  {lexicon.name} v{lexicon.version} ({lexicon.content_hash[:12]})"
+                 for lexicon in self._lexicons.values()]
+        lines.extend(f"  {key}: 本地情感模型 ({', '.join(model.classes)})"
+                     for key, (_, model) in self._models.items() if model is not None)
+        if self.memo is not None:
+            lines.append(self.memo.summary())
+        return lines
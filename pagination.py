@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+分页搜索
+Paginated Search
+
+Lazy, page-by-page iteration over TikHub search endpoints with early stop.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+# A parsed page: (items, next page token, whether the API reports more pages)
+Page = Tuple[List[Dict[str, Any]], Any, bool]
+
+
+class PagedSearch:
+    """
+    Iterate the items of a paginated search, fetching pages only as they are consumed.
+
+    Iteration stops as soon as one of these holds:
+      - target_count items have been yielded
+      - a page has no item newer than `since` (items older than `since` are
+        skipped either way, so relevance-sorted results are handled too)
+      - a page has no IDs that were not already seen
+      - a page holds nothing but known content (known_ids) and no item with a
+        timestamp to compare against `since`: the id-only fallback for
+        results without usable times
+      - the API reports no further pages, or max_pages pages were fetched
+      - a page request fails
+
+    Known ids are content collected by earlier runs. They are skipped like
+    duplicates rather than ending the stream, because newest-first results
+    still interleave late-indexed content with known items inside the
+    overlap window behind `since`.
+
+    After iteration, `stop_reason` and `pages_fetched` describe what happened.
+    """
+
+    def __init__(self, fetch_page: Callable[[Any], Optional[Dict[str, Any]]],
+                 parse_page: Callable[[Dict[str, Any], Any], Page],
+                 id_of: Callable[[Dict[str, Any]], Any],
+                 time_of: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 first_token: Any = None, target_count: Optional[int] = None,
+                 since: Optional[int] = None, max_pages: Optional[int] = None,
+                 known_ids: Optional[set] = None):
+        """
+        Initialize the search.
+
+        Args:
+            fetch_page: Fetch one page given its token; returns None on failure
+            parse_page: Turn a response and its token into (items, next_token, has_more)
+            id_of: Content id of an item
+            time_of: Creation timestamp of an item (needed for `since`)
+            first_token: Token (page number or cursor) of the first page
+            target_count: Stop after this many items
+            since: Skip items created before this timestamp, stop on a page with none newer
+            max_pages: Hard cap on pages fetched
+            known_ids: Ids of content collected by earlier runs, skipped when met
+        """
+        self.fetch_page = fetch_page
+        self.parse_page = parse_page
+        self.id_of = id_of
+        self.time_of = time_of
+        self.first_token = first_token
+        self.target_count = target_count
+        self.since = since
+        self.max_pages = max_pages
+        self.known_ids = known_ids or set()
+
+        self.pages_fetched = 0
+        self.stop_reason = None
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        token = self.first_token
+        seen = set()
+        yielded = 0
+
+        while True:
+            if self.max_pages is not None and self.pages_fetched >= self.max_pages:
+                self.stop_reason = "max_pages"
+                return
+
+            response = self.fetch_page(token)
+            self.pages_fetched += 1
+            if response is None:
+                self.stop_reason = "error"
+                return
+
+            items, next_token, has_more = self.parse_page(response, token)
+            new_ids = 0
+            known = 0
+            dated = 0
+            recent = 0
+            for item in items:
+                content_id = self.id_of(item)
+                if content_id:
+                    if content_id in seen:
+                        continue
+                    seen.add(content_id)
+                new_ids += 1
+
+                if self.since is not None and self.time_of is not None:
+                    created = self.time_of(item)
+                    if created:
+                        dated += 1
+                        if created < self.since:
+                            continue
+                recent += 1
+
+                if content_id and content_id in self.known_ids:
+                    known += 1
+                    continue
+
+                yield item
+                yielded += 1
+                if self.target_count is not None and yielded >= self.target_count:
+                    self.stop_reason = "target_count"
+                    return
+
+            if new_ids == 0:
+                self.stop_reason = "no_new_ids"
+                return
+            if self.since is not None and recent == 0:
+                self.stop_reason = "time_cutoff"
+                return
+            if self.known_ids and dated == 0 and known == new_ids:
+                self.stop_reason = "known_content"
+                return
+            if not has_more or next_token is None:
+                self.stop_reason = "exhausted"
+                return
+            token = next_token
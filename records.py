@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+采集记录类型
+Collected Record Types
+
+Compact record classes for collected posts and comments. Each record keeps
+only the fields the datasets and reports use, in flat __slots__ attributes
+instead of nested dicts, so an item costs one small object rather than a
+dict per nesting level. to_dict() produces the nested layout the JSON
+datasets have always had, and from_dict() reads it back.
+
+Usage:
+    python records.py --count 100000
+"""
+
+import argparse
+import tracemalloc
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+
+class Record(ABC):
+    """Base of the record types: keyword construction, equality and repr over __slots__."""
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"{type(self).__name__} has no fields {', '.join(fields)}")
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    @abstractmethod
+    def to_dict(self) -> Dict[str, Any]:
+        """The record in the nested layout of the JSON datasets."""
+
+
+class Post(Record):
+    """A collected video or note, annotated by the research script."""
+
+    __slots__ = ()
+
+    def _annotations(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        # Added when the post is stored, see XiaomiCarResearcher._ingest
+        for name in ("search_keyword", "search_keywords", "sentiment"):
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        return data
+
+    @staticmethod
+    def _annotations_of(data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "search_keyword": data.get("search_keyword"),
+            "search_keywords": data.get("search_keywords"),
+            "sentiment": data.get("sentiment")
+        }
+
+
+class DouyinVideo(Post):
+    """A Douyin video."""
+
+    __slots__ = ("aweme_id", "title", "author_uid", "author_nickname", "author_follower_count",
+                 "play_count", "like_count", "comment_count", "share_count", "create_time", "video_url",
+                 "search_keyword", "search_keywords", "sentiment")
+
+    @property
+    def content_id(self) -> str:
+        return self.aweme_id
+
+    @property
+    def text(self) -> str:
+        """Text the sentiment of the video is judged on."""
+        return self.title
+
+    @classmethod
+    def from_api(cls, aweme_info: Dict[str, Any]) -> "DouyinVideo":
+        """Build from the aweme_info of a search result."""
+        author = aweme_info.get("author", {})
+        statistics = aweme_info.get("statistics", {})
+        url_list = aweme_info.get("video", {}).get("play_addr", {}).get("url_list")
+        return cls(
+            aweme_id=aweme_info.get("aweme_id", ""),
+            title=aweme_info.get("desc", ""),
+            author_uid=author.get("uid", ""),
+            author_nickname=author.get("nickname", ""),
+            author_follower_count=author.get("follower_count", 0),
+            play_count=statistics.get("play_count", 0),
+            like_count=statistics.get("digg_count", 0),
+            comment_count=statistics.get("comment_count", 0),
+            share_count=statistics.get("share_count", 0),
+            create_time=aweme_info.get("create_time", 0),
+            video_url=url_list[0] if url_list else ""
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DouyinVideo":
+        """Read back a video saved with to_dict()."""
+        author = data.get("author", {})
+        statistics = data.get("statistics", {})
+        return cls(
+            aweme_id=data.get("aweme_id", ""),
+            title=data.get("title", ""),
+            author_uid=author.get("uid", ""),
+            author_nickname=author.get("nickname", ""),
+            author_follower_count=author.get("follower_count", 0),
+            play_count=statistics.get("play_count", 0),
+            like_count=statistics.get("like_count", 0),
+            comment_count=statistics.get("comment_count", 0),
+            share_count=statistics.get("share_count", 0),
+            create_time=data.get("create_time", 0),
+            video_url=data.get("video_url", ""),
+            **cls._annotations_of(data)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._annotations({
+            "aweme_id": self.aweme_id,
+            "title": self.title,
+            "author": {
+                "uid": self.author_uid,
+                "nickname": self.author_nickname,
+                "follower_count": self.author_follower_count
+            },
+            "statistics": {
+                "play_count": self.play_count,
+                "like_count": self.like_count,
+                "comment_count": self.comment_count,
+                "share_count": self.share_count
+            },
+            "create_time": self.create_time,
+            "video_url": self.video_url
+        })
+
+
+class XiaohongshuNote(Post):
+    """A Xiaohongshu note."""
+
+    __slots__ = ("note_id", "title", "desc", "type", "author_user_id", "author_nickname",
+                 "like_count", "collect_count", "comment_count", "share_count", "cover_url", "time",
+                 "search_keyword", "search_keywords", "sentiment")
+
+    @property
+    def content_id(self) -> str:
+        return self.note_id
+
+    @property
+    def text(self) -> str:
+        """Text the sentiment of the note is judged on."""
+        return self.title + " " + self.desc
+
+    @property
+    def published_time(self) -> int:
+        """
+        Timestamp to order the note by.
+
+        The search API usually leaves last_update_time (`time`) at 0. Note ids
+        are 24-digit hex object ids whose first 8 digits are the creation
+        time, so that is used instead; 0 if neither is available.
+        """
+        if self.time:
+            return self.time
+        note_id = self.note_id or ""
+        if len(note_id) == 24:
+            try:
+                return int(note_id[:8], 16)
+            except ValueError:
+                pass
+        return 0
+
+    @classmethod
+    def from_api(cls, note: Dict[str, Any]) -> "XiaohongshuNote":
+        """Build from the note of a search result."""
+        user = note.get("user", {})
+        images = note.get("images_list")
+        return cls(
+            note_id=note.get("id", ""),
+            title=note.get("title", ""),
+            desc=note.get("desc", ""),
+            type=note.get("type", ""),
+            author_user_id=user.get("userid", ""),
+            author_nickname=user.get("nickname", ""),
+            like_count=note.get("liked_count", 0),
+            collect_count=note.get("collected_count", 0),
+            comment_count=note.get("comments_count", 0),
+            share_count=note.get("shared_count", 0),
+            cover_url=images[0].get("url", "") if images else "",
+            time=note.get("last_update_time", 0)
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "XiaohongshuNote":
+        """Read back a note saved with to_dict()."""
+        author = data.get("author", {})
+        statistics = data.get("statistics", {})
+        return cls(
+            note_id=data.get("note_id", ""),
+            title=data.get("title", ""),
+            desc=data.get("desc", ""),
+            type=data.get("type", ""),
+            author_user_id=author.get("user_id", ""),
+            author_nickname=author.get("nickname", ""),
+            like_count=statistics.get("like_count", 0),
+            collect_count=statistics.get("collect_count", 0),
+            comment_count=statistics.get("comment_count", 0),
+            share_count=statistics.get("share_count", 0),
+            cover_url=data.get("cover_url", ""),
+            time=data.get("time", 0),
+            **cls._annotations_of(data)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._annotations({
+            "note_id": self.note_id,
+            "title": self.title,
+            "desc": self.desc,
+            "type": self.type,
+            "author": {
+                "user_id": self.author_user_id,
+                "nickname": self.author_nickname,
+                "follower_count": 0  # Not available in search response
+            },
+            "statistics": {
+                "like_count": self.like_count,
+                "collect_count": self.collect_count,
+                "comment_count": self.comment_count,
+                "share_count": self.share_count
+            },
+            "cover_url": self.cover_url,
+            "time": self.time
+        })
+
+
+class DouyinComment(Record):
+    """A comment on a Douyin video."""
+
+    __slots__ = ("cid", "text", "like_count", "reply_count", "user_uid", "user_nickname")
+
+    @classmethod
+    def from_api(cls, comment: Dict[str, Any]) -> "DouyinComment":
+        """Build from a comment of the video comments API."""
+        user = comment.get("user", {})
+        return cls(
+            cid=comment.get("cid", ""),
+            text=comment.get("text", ""),
+            like_count=comment.get("digg_count", 0),
+            reply_count=comment.get("reply_comment_total", 0),
+            user_uid=user.get("uid", ""),
+            user_nickname=user.get("nickname", "")
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cid": self.cid,
+            "text": self.text,
+            "like_count": self.like_count,
+            "reply_count": self.reply_count,
+            "user": {
+                "uid": self.user_uid,
+                "nickname": self.user_nickname
+            }
+        }
+
+
+class XiaohongshuComment(Record):
+    """A comment on a Xiaohongshu note."""
+
+    __slots__ = ("id", "content", "like_count", "sub_comment_count", "user_id", "user_nickname")
+
+    @property
+    def text(self) -> str:
+        return self.content
+
+    @classmethod
+    def from_api(cls, comment: Dict[str, Any]) -> "XiaohongshuComment":
+        """Build from a comment of the note comments API."""
+        user = comment.get("user", {})
+        return cls(
+            id=comment.get("id", ""),
+            content=comment.get("content", ""),
+            like_count=comment.get("like_count", 0),
+            sub_comment_count=comment.get("sub_comment_count", 0),
+            user_id=user.get("user_id", ""),
+            user_nickname=user.get("nickname", "")
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "content": self.content,
+            "like_count": self.like_count,
+            "sub_comment_count": self.sub_comment_count,
+            "user": {
+                "user_id": self.user_id,
+                "nickname": self.user_nickname
+            }
+        }
+
+
+# Record type of the posts of each platform
+POST_TYPES = {"douyin": DouyinVideo, "xiaohongshu": XiaohongshuNote}
+
+
+def to_dicts(records: List[Record]) -> List[Dict[str, Any]]:
+    """Export a list of records."""
+    return [record.to_dict() for record in records]
+
+
+def _retained_bytes(build, payload: List[Dict[str, Any]]) -> int:
+    # Memory held by the parsed items alone; strings are shared with the payload
+    tracemalloc.start()
+    items = build(payload)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return size
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="记录类型内存对比: 嵌套 dict vs __slots__ 记录")
+    parser.add_argument("--count", type=int, default=100000, help="comments parsed")
+    args = parser.parse_args(argv)
+
+    payload = [{"cid": f"{7000000000000000000 + i}", "text": f"评论内容 {i % 977}", "digg_count": i % 5000,
+                "reply_comment_total": i % 7, "user": {"uid": f"{i % 30011}", "nickname": f"用户{i % 30011}"}}
+               for i in range(args.count)]
+    as_dicts = _retained_bytes(lambda comments: [DouyinComment.from_api(c).to_dict() for c in comments], payload)
+    as_records = _retained_bytes(lambda comments: [DouyinComment.from_api(c) for c in comments], payload)
+    print(f"{args.count} comments: dict {as_dicts / 1e6:.1f} MB, record {as_records / 1e6:.1f} MB "
+          f"({as_dicts / as_records:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
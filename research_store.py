@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+本地研究数据库
+Local Research Store
+
+SQLite database of collected posts, comments, authors and collection runs,
+accumulated across runs. Posts are upserted by (platform, content id), so
+the database holds the latest snapshot of everything ever collected; which
+runs saw each post and comment is recorded separately, so a run in
+progress never changes what an earlier run contained. Downstream stages (e.g. the top-N selection for comment enrichment) run as
+indexed queries instead of loading whole JSON datasets.
+
+Usage:
+    python research_store.py import D:/social_research/xiaomi_car_research_*.json
+    python research_store.py summary
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sentiment import engagement_count
+
+
+# Default database file, next to the collected datasets
+DEFAULT_STORE_PATH = Path("D:/social_research") / "research.db"
+
+# Schema version, stored in PRAGMA user_version
+SCHEMA_VERSION = 3
+
+# Where the id, creation time and author id of a post live, per platform
+POST_FIELDS = {
+    "douyin": {"id": "aweme_id", "time": "create_time", "author": "uid"},
+    "xiaohongshu": {"id": "note_id", "time": "time", "author": "user_id"}
+}
+
+# Where the id, text and author id of a comment live, per platform
+COMMENT_FIELDS = {
+    "douyin": {"id": "cid", "text": "text", "author": "uid"},
+    "xiaohongshu": {"id": "id", "text": "content", "author": "user_id"}
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    dataset TEXT,
+    posts INTEGER NOT NULL DEFAULT 0,
+    comments INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS authors (
+    platform TEXT NOT NULL,
+    author_id TEXT NOT NULL,
+    nickname TEXT,
+    follower_count INTEGER,
+    last_run INTEGER,
+    PRIMARY KEY (platform, author_id)
+);
+CREATE TABLE IF NOT EXISTS posts (
+    platform TEXT NOT NULL,
+    content_id TEXT NOT NULL,
+    keyword TEXT,
+    title TEXT,
+    author_id TEXT,
+    create_time INTEGER,
+    like_count INTEGER NOT NULL DEFAULT 0,
+    comment_count INTEGER NOT NULL DEFAULT 0,
+    sentiment TEXT,
+    first_run INTEGER,
+    last_run INTEGER,
+    run_seq INTEGER,
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS posts_content ON posts (platform, content_id);
+CREATE INDEX IF NOT EXISTS posts_keyword ON posts (keyword);
+CREATE INDEX IF NOT EXISTS posts_create_time ON posts (platform, create_time);
+CREATE INDEX IF NOT EXISTS posts_like_count ON posts (platform, like_count);
+CREATE INDEX IF NOT EXISTS posts_last_run ON posts (last_run);
+CREATE TABLE IF NOT EXISTS comments (
+    platform TEXT NOT NULL,
+    comment_id TEXT NOT NULL,
+    content_id TEXT NOT NULL,
+    author_id TEXT,
+    text TEXT,
+    like_count INTEGER NOT NULL DEFAULT 0,
+    sentiment TEXT,
+    last_run INTEGER,
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS comments_id ON comments (platform, comment_id);
+CREATE INDEX IF NOT EXISTS comments_content ON comments (platform, content_id);
+CREATE INDEX IF NOT EXISTS comments_like_count ON comments (platform, like_count);
+CREATE TABLE IF NOT EXISTS post_runs (
+    run_id INTEGER NOT NULL,
+    platform TEXT NOT NULL,
+    content_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (run_id, platform, content_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS comment_runs (
+    run_id INTEGER NOT NULL,
+    platform TEXT NOT NULL,
+    comment_id TEXT NOT NULL,
+    PRIMARY KEY (run_id, platform, comment_id)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_POST = """
+INSERT INTO posts (platform, content_id, keyword, title, author_id, create_time, like_count,
+                   comment_count, sentiment, first_run, last_run, run_seq, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (platform, content_id) DO UPDATE SET
+    keyword = excluded.keyword, title = excluded.title, author_id = excluded.author_id,
+    create_time = excluded.create_time, like_count = excluded.like_count,
+    comment_count = excluded.comment_count, sentiment = excluded.sentiment,
+    run_seq = CASE WHEN posts.last_run IS excluded.last_run THEN posts.run_seq ELSE excluded.run_seq END,
+    last_run = excluded.last_run, data = excluded.data
+"""
+
+# A post keeps its position from the first time a run saw it
+_ADD_POST_RUN = "INSERT OR IGNORE INTO post_runs (run_id, platform, content_id, seq) VALUES (?, ?, ?, ?)"
+
+_ADD_COMMENT_RUN = "INSERT OR IGNORE INTO comment_runs (run_id, platform, comment_id) VALUES (?, ?, ?)"
+
+_UPSERT_AUTHOR = """
+INSERT INTO authors (platform, author_id, nickname, follower_count, last_run)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (platform, author_id) DO UPDATE SET
+    nickname = excluded.nickname,
+    follower_count = MAX(COALESCE(authors.follower_count, 0), COALESCE(excluded.follower_count, 0)),
+    last_run = excluded.last_run
+"""
+
+_UPSERT_COMMENT = """
+INSERT INTO comments (platform, comment_id, content_id, author_id, text, like_count, sentiment, last_run, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (platform, comment_id) DO UPDATE SET
+    content_id = excluded.content_id, author_id = excluded.author_id, text = excluded.text,
+    like_count = excluded.like_count, sentiment = excluded.sentiment,
+    last_run = excluded.last_run, data = excluded.data
+"""
+
+
+def _count(value: Any) -> int:
+    # Engagement counts come as ints or strings such as "1.2万"; the ranking queries need numbers
+    return int(engagement_count(value))
+
+
+class ResearchStore:
+    """
+    SQLite-backed store of collected posts and comments.
+
+    Every write is one executemany inside one transaction. The database runs
+    in WAL mode, so analysis scripts can query it while a collection run is
+    still writing.
+    """
+
+    def __init__(self, path: Path = DEFAULT_STORE_PATH):
+        """
+        Open (or create) the database.
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            self._migrate(self._conn.execute("PRAGMA user_version").fetchone()[0])
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        # Items written per run, giving posts their position in the run
+        self._run_seq: Dict[int, int] = {}
+
+    def _migrate(self, version: int):
+        # Version 1 stored engagement counts as the API gave them, so "1.2万" sat as TEXT
+        # (which SQLite sorts above every number)
+        if version < 2:
+            for table, columns in (("posts", ("like_count", "comment_count")), ("comments", ("like_count",))):
+                for column in columns:
+                    rows = self._conn.execute(
+                        f"SELECT rowid, {column} FROM {table} WHERE typeof({column}) = 'text'").fetchall()
+                    self._conn.executemany(f"UPDATE {table} SET {column} = ? WHERE rowid = ?",
+                                           [(_count(row[1]), row[0]) for row in rows])
+        # Version 2 only knew the last run that saw each post and comment
+        if version < 3:
+            self._conn.execute("INSERT OR IGNORE INTO post_runs SELECT last_run, platform, content_id, run_seq"
+                               " FROM posts WHERE last_run IS NOT NULL")
+            self._conn.execute("INSERT OR IGNORE INTO comment_runs SELECT last_run, platform, comment_id"
+                               " FROM comments WHERE last_run IS NOT NULL")
+
+    def __enter__(self) -> "ResearchStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+    def begin_run(self, source: str) -> int:
+        """Record the start of a run and return its id."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute("INSERT INTO runs (source, started_at) VALUES (?, ?)",
+                                        (source, time.time()))
+            return cursor.lastrowid
+
+    def finish_run(self, run_id: int, dataset: Optional[str] = None):
+        """Mark a run finished, with the dataset file it produced and what it stored."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET finished_at = ?, dataset = ?,"
+                " posts = (SELECT COUNT(*) FROM post_runs WHERE run_id = ?),"
+                " comments = (SELECT COUNT(*) FROM comment_runs WHERE run_id = ?)"
+                " WHERE run_id = ?",
+                (time.time(), dataset, run_id, run_id, run_id))
+
+    def latest_run(self, source: str) -> Optional[int]:
+        """Id of the latest finished run of a source, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(run_id) FROM runs WHERE source = ? AND finished_at IS NOT NULL",
+                (source,)).fetchone()
+        return row[0]
+
+    def add_posts(self, platform: str, items: Iterable[Dict[str, Any]], run_id: Optional[int] = None) -> int:
+        """
+        Upsert collected posts and their authors in one transaction.
+
+        Items without a content id cannot be addressed and are skipped.
+
+        Args:
+            platform: "douyin" or "xiaohongshu"
+            items: Posts in the dataset layout (see records.py)
+            run_id: Run that saw them
+
+        Returns:
+            Number of posts written
+        """
+        fields = POST_FIELDS[platform]
+        posts = []
+        authors = []
+        with self._lock:
+            seq = self._run_seq.get(run_id, 0)
+            for item in items:
+                content_id = item.get(fields["id"])
+                if not content_id:
+                    continue
+                author = item.get("author") or {}
+                author_id = author.get(fields["author"]) or None
+                statistics = item.get("statistics") or {}
+                keywords = item.get("search_keywords") or [item.get("search_keyword")]
+                posts.append((platform, content_id, keywords[0], item.get("title", ""), author_id,
+                              item.get(fields["time"]) or None, _count(statistics.get("like_count")),
+                              _count(statistics.get("comment_count")), item.get("sentiment"),
+                              run_id, run_id, seq, json.dumps(item, ensure_ascii=False)))
+                seq += 1
+                if author_id:
+                    authors.append((platform, author_id, author.get("nickname", ""),
+                                    author.get("follower_count"), run_id))
+            self._run_seq[run_id] = seq
+            with self._conn:
+                self._conn.executemany(_UPSERT_POST, posts)
+                self._conn.executemany(_UPSERT_AUTHOR, authors)
+                if run_id is not None:
+                    self._conn.executemany(_ADD_POST_RUN, [(run_id, post[0], post[1], post[11]) for post in posts])
+        return len(posts)
+
+    def add_comments(self, platform: str, content_id: str, comments: Sequence[Dict[str, Any]],
+                     sentiments: Optional[Sequence[str]] = None, run_id: Optional[int] = None) -> int:
+        """
+        Upsert the comments of one post and their authors in one transaction.
+
+        Args:
+            platform: "douyin" or "xiaohongshu"
+            content_id: Post the comments belong to
+            comments: Comments in the dataset layout (see records.py)
+            sentiments: Sentiment label per comment, if analyzed
+            run_id: Run that fetched them
+
+        Returns:
+            Number of comments written
+        """
+        fields = COMMENT_FIELDS[platform]
+        rows = []
+        authors = []
+        for i, comment in enumerate(comments):
+            comment_id = comment.get(fields["id"])
+            if not comment_id:
+                continue
+            user = comment.get("user") or {}
+            author_id = user.get(fields["author"]) or None
+            rows.append((platform, comment_id, content_id, author_id, comment.get(fields["text"], ""),
+                         _count(comment.get("like_count")), sentiments[i] if sentiments is not None else None,
+                         run_id, json.dumps(comment, ensure_ascii=False)))
+            if author_id:
+                authors.append((platform, author_id, user.get("nickname", ""), None, run_id))
+        with self._lock, self._conn:
+            self._conn.executemany(_UPSERT_COMMENT, rows)
+            self._conn.executemany(_UPSERT_AUTHOR, authors)
+            if run_id is not None:
+                self._conn.executemany(_ADD_COMMENT_RUN, [(run_id, row[0], row[1]) for row in rows])
+        return len(rows)
+
+    def top_posts(self, platform: str, n: int, run_id: Optional[int] = None, keyword: Optional[str] = None,
+                  since: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Most-liked posts of a platform, best first.
+
+        Args:
+            platform: "douyin" or "xiaohongshu"
+            n: Posts returned
+            run_id: Only posts seen in this run (ties keep their order in the run)
+            keyword: Only posts first found under this search keyword
+            since: Only posts created at or after this timestamp
+
+        Returns:
+            The stored posts, as the research script saved them
+        """
+        if run_id is not None:
+            query = ("SELECT posts.data FROM post_runs JOIN posts USING (platform, content_id)"
+                     " WHERE post_runs.run_id = ? AND post_runs.platform = ?")
+            params: List[Any] = [run_id, platform]
+            order = "posts.like_count DESC, post_runs.seq"
+        else:
+            query = "SELECT data FROM posts WHERE platform = ?"
+            params = [platform]
+            order = "like_count DESC, last_run DESC, run_seq"
+        if keyword is not None:
+            query += " AND keyword = ?"
+            params.append(keyword)
+        if since is not None:
+            query += " AND create_time >= ?"
+            params.append(since)
+        query += f" ORDER BY {order} LIMIT ?"
+        params.append(n)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def comments_of(self, platform: str, content_id: str) -> List[Dict[str, Any]]:
+        """Stored comments of one post, most liked first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM comments WHERE platform = ? AND content_id = ? ORDER BY like_count DESC",
+                (platform, content_id)).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def import_dataset(self, filename: str, source: str) -> int:
+        """
+        Backfill a JSON dataset saved by a research script as one finished run.
+
+        Returns:
+            The run id
+        """
+        with open(filename, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        run_id = self.begin_run(source)
+        for platform in POST_FIELDS:
+            self.add_posts(platform, saved.get(platform, []), run_id)
+        self.finish_run(run_id, str(filename))
+        return run_id
+
+    def counts(self) -> Dict[str, int]:
+        """Rows per table."""
+        with self._lock:
+            return {table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    for table in ("runs", "posts", "comments", "authors")}
+
+    def summary(self) -> str:
+        """One-line store statistics."""
+        counts = self.counts()
+        return (f"研究数据库: {counts['posts']} 条内容, {counts['comments']} 条评论, "
+                f"{counts['authors']} 位作者, {counts['runs']} 次运行 -> {self.path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地研究数据库")
+    parser.add_argument("--db", default=str(DEFAULT_STORE_PATH), help="database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    backfill = commands.add_parser("import", help="import saved JSON datasets, oldest first")
+    backfill.add_argument("datasets", nargs="+")
+    backfill.add_argument("--source", default="xiaomi_car_research",
+                          help="script that produced the datasets")
+    commands.add_parser("summary", help="print row counts")
+    args = parser.parse_args()
+
+    with ResearchStore(Path(args.db)) as store:
+        if args.command == "import":
+            for dataset in sorted(args.datasets, key=lambda p: Path(p).stat().st_mtime):
+                run_id = store.import_dataset(dataset, args.source)
+                print(f"run {run_id}: {dataset}")
+        print(store.summary())
+
+
+if __name__ == "__main__":
+    main()
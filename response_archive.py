@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+原始响应归档
+Raw Response Archive
+
+Content-addressed archive of raw TikHub API responses, kept for audit and
+for re-parsing history after parser fixes without spending API credits.
+
+Each response's payload (its "data" field) is stored once, compressed
+(zstd when the zstandard package is installed, gzip otherwise), under the
+SHA-256 of its canonical JSON, so re-fetching unchanged content costs no
+extra space. A SQLite index maps (method, endpoint, params, fetched_at) to
+the blob, along with the small per-fetch envelope (code, message, ...).
+
+ReplayClient answers get/post from the archive, so the research scripts'
+existing parsers can be run over archived responses (see --replay).
+
+Usage:
+    python response_archive.py summary
+    python response_archive.py list --endpoint douyin/search
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from tikhub_client import normalize_params, request_key
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Default archive directory: blobs/ plus index.sqlite3
+DEFAULT_ARCHIVE_PATH = Path(__file__).parent / ".archive"
+
+# Compression levels of the two codecs
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 9
+
+# Blob file suffix per codec
+CODEC_SUFFIXES = {"zstd": ".json.zst", "gzip": ".json.gz"}
+
+
+def canonical_json(value: Any) -> bytes:
+    """Stable serialization used for content hashes: sorted keys, no whitespace."""
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ResponseArchive:
+    """
+    Content-addressed store of raw API responses with a SQLite fetch index.
+
+    Safe to share between threads. Blobs are written to a temporary file and
+    renamed into place, so a crash never leaves a partial blob behind.
+    """
+
+    def __init__(self, path: Path = DEFAULT_ARCHIVE_PATH, codec: Optional[str] = None):
+        """
+        Open (or create) the archive.
+
+        Args:
+            path: Archive directory
+            codec: "zstd" or "gzip" for new blobs; defaults to zstd when the
+                zstandard package is installed
+        """
+        self.path = Path(path)
+        self.codec = codec or ("zstd" if zstandard is not None else "gzip")
+        if self.codec == "zstd" and zstandard is None:
+            raise RuntimeError("zstd compression requires the zstandard package")
+        self.blob_dir = self.path / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.stats = {"fetches": 0, "blobs": 0, "deduplicated": 0, "raw_bytes": 0, "stored_bytes": 0}
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path / "index.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                " hash TEXT PRIMARY KEY,"
+                " codec TEXT NOT NULL,"
+                " raw_size INTEGER NOT NULL,"
+                " stored_size INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS fetches ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " request_key TEXT NOT NULL,"
+                " method TEXT NOT NULL,"
+                " endpoint TEXT NOT NULL,"
+                " params TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " envelope TEXT NOT NULL,"
+                " blob TEXT NOT NULL REFERENCES blobs (hash))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fetches_request ON fetches (request_key, fetched_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fetches_endpoint ON fetches (endpoint, fetched_at)")
+
+    def __enter__(self) -> "ResponseArchive":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _blob_path(self, digest: str, codec: str) -> Path:
+        return self.blob_dir / digest[:2] / (digest + CODEC_SUFFIXES[codec])
+
+    def put(self, method: str, endpoint: str, params: Optional[Dict[str, Any]], response: Dict[str, Any],
+            fetched_at: Optional[float] = None) -> str:
+        """
+        Archive one response.
+
+        Args:
+            method: HTTP method
+            endpoint: API endpoint path
+            params: Query params or request body
+            response: The raw response (a JSON object)
+            fetched_at: Fetch time (default: now)
+
+        Returns:
+            The content hash of the response payload
+        """
+        payload = response.get("data")
+        # The envelope keeps its key order; "data" is a placeholder filled from the blob
+        envelope = {key: (None if key == "data" else value) for key, value in response.items()}
+        raw = canonical_json(payload)
+        digest = hashlib.sha256(raw).hexdigest()
+
+        with self._lock:
+            known = self._conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone() is not None
+        # Compressed outside the lock; the blob is claimed, written and counted under it
+        data = None if known else self._compress(raw)
+
+        with self._lock, self._conn:
+            inserted = data is not None and self._conn.execute(
+                "INSERT OR IGNORE INTO blobs VALUES (?, ?, ?, ?)",
+                (digest, self.codec, len(raw), len(data))).rowcount == 1
+            if inserted:
+                # A failed write rolls the blob row back with the transaction
+                self._write_blob(digest, data)
+                self.stats["blobs"] += 1
+                self.stats["stored_bytes"] += len(data)
+            else:
+                self.stats["deduplicated"] += 1
+            self._conn.execute(
+                "INSERT INTO fetches (request_key, method, endpoint, params, fetched_at, envelope, blob)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (request_key(method, endpoint, params), method.upper(), endpoint,
+                 json.dumps(normalize_params(params), sort_keys=True, ensure_ascii=False),
+                 time.time() if fetched_at is None else fetched_at,
+                 json.dumps(envelope, ensure_ascii=False), digest))
+            self.stats["fetches"] += 1
+            self.stats["raw_bytes"] += len(raw)
+        return digest
+
+    def _compress(self, raw: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+        return gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+
+    def _write_blob(self, digest: str, data: bytes):
+        path = self._blob_path(digest, self.codec)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def blob(self, digest: str) -> Any:
+        """Decompress and parse one stored payload, by hash or unique hash prefix."""
+        with self._lock:
+            rows = self._conn.execute("SELECT hash, codec FROM blobs WHERE hash >= ? AND hash < ? LIMIT 2",
+                                      (digest, digest + "g")).fetchall()
+        if len(rows) != 1:
+            raise KeyError(digest)
+        digest, codec = rows[0]
+        with open(self._blob_path(digest, codec), 'rb') as f:
+            data = f.read()
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("reading zstd blobs requires the zstandard package")
+            raw = zstandard.ZstdDecompressor().decompress(data)
+        else:
+            raw = gzip.decompress(data)
+        return json.loads(raw)
+
+    def _response(self, envelope: str, digest: str) -> Dict[str, Any]:
+        response = json.loads(envelope)
+        if "data" in response:
+            response["data"] = self.blob(digest)
+        return response
+
+    def lookup(self, method: str, endpoint: str, params: Optional[Dict[str, Any]],
+               as_of: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        The latest archived response to a request, or None.
+
+        Args:
+            method: HTTP method
+            endpoint: API endpoint path
+            params: Query params or request body
+            as_of: Only responses fetched at or before this time
+        """
+        query = "SELECT envelope, blob FROM fetches WHERE request_key = ?"
+        args: Tuple[Any, ...] = (request_key(method, endpoint, params),)
+        if as_of is not None:
+            query += " AND fetched_at <= ?"
+            args += (as_of,)
+        with self._lock:
+            row = self._conn.execute(query + " ORDER BY fetched_at DESC LIMIT 1", args).fetchone()
+        return self._response(*row) if row else None
+
+    def _select(self, endpoint: Optional[str], since: Optional[float], until: Optional[float]) -> list:
+        query = "SELECT method, endpoint, params, fetched_at, blob, envelope FROM fetches WHERE 1 = 1"
+        args: Tuple[Any, ...] = ()
+        if endpoint:
+            query += " AND instr(endpoint, ?) > 0"
+            args += (endpoint,)
+        if since is not None:
+            query += " AND fetched_at >= ?"
+            args += (since,)
+        if until is not None:
+            query += " AND fetched_at <= ?"
+            args += (until,)
+        with self._lock:
+            return self._conn.execute(query + " ORDER BY id", args).fetchall()
+
+    def fetches(self, endpoint: Optional[str] = None, since: Optional[float] = None,
+                until: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Archived fetches in fetch order, without their payloads.
+
+        Args:
+            endpoint: Only endpoints containing this substring
+            since: Only fetches at or after this time
+            until: Only fetches at or before this time
+
+        Yields:
+            Dicts with method, endpoint, params, fetched_at and blob (the content hash)
+        """
+        for method, endpoint_, params, fetched_at, digest, _ in self._select(endpoint, since, until):
+            yield {"method": method, "endpoint": endpoint_, "params": json.loads(params),
+                   "fetched_at": fetched_at, "blob": digest}
+
+    def replay(self, endpoint: Optional[str] = None, since: Optional[float] = None,
+               until: Optional[float] = None) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Archived responses in fetch order, as (fetch, response) pairs (see fetches).
+        """
+        for method, endpoint_, params, fetched_at, digest, envelope in self._select(endpoint, since, until):
+            fetch = {"method": method, "endpoint": endpoint_, "params": json.loads(params),
+                     "fetched_at": fetched_at, "blob": digest}
+            yield fetch, self._response(envelope, digest)
+
+    def size(self) -> Tuple[int, int, int, int]:
+        """Return (fetches, blobs, raw payload bytes of the blobs, stored bytes)."""
+        with self._lock:
+            fetches = self._conn.execute("SELECT COUNT(*) FROM fetches").fetchone()[0]
+            blobs, raw, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(stored_size), 0) FROM blobs"
+            ).fetchone()
+        return fetches, blobs, raw, stored
+
+    def summary(self) -> str:
+        """One-line archive statistics."""
+        fetches, blobs, raw, stored = self.size()
+        ratio = raw / stored if stored else 0
+        return (f"响应归档: {fetches} 次响应, {blobs} 个内容块 ({self.codec}), "
+                f"{raw / 1024 / 1024:.1f} MB -> {stored / 1024 / 1024:.1f} MB ({ratio:.1f}x) -> {self.path}")
+
+    def close(self):
+        """Close the index."""
+        with self._lock:
+            self._conn.close()
+
+
+class ReplayClient:
+    """
+    Stand-in for TikHubAPIClient that answers from a ResponseArchive.
+
+    Each request gets the latest archived response to it (fetched at or
+    before as_of, if given); requests never archived come back as
+    {"error": ...}, like any other failed request. Plug it into build_client
+    in place of the API client to re-run a script's parsers over history.
+    """
+
+    def __init__(self, archive: ResponseArchive, as_of: Optional[float] = None):
+        """
+        Args:
+            archive: Archive to answer from
+            as_of: Replay the archive as it was at this time (default: latest)
+        """
+        self.archive = archive
+        self.as_of = as_of
+        self.stats = {"replayed": 0, "missing": 0}
+
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GET request, answered from the archive."""
+        return self._request("GET", endpoint, params)
+
+    def post(self, endpoint: str, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """POST request, answered from the archive."""
+        return self._request("POST", endpoint, body)
+
+    def _request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        response = self.archive.lookup(method, endpoint, params, as_of=self.as_of)
+        if response is None:
+            self.stats["missing"] += 1
+            return {"error": f"Not in archive: {method} {endpoint}"}
+        self.stats["replayed"] += 1
+        return response
+
+    def summary(self) -> str:
+        """One-line replay statistics."""
+        return (f"响应回放: {self.stats['replayed']} 个请求命中归档, {self.stats['missing']} 个缺失"
+                f" <- {self.archive.path}")
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Parse a YYYY-MM-DD[ HH:MM[:SS]] command-line time to a timestamp."""
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    raise ValueError(f"invalid time: {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="原始响应归档")
+    parser.add_argument("--archive", default=str(DEFAULT_ARCHIVE_PATH), help="archive directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("summary", help="print archive statistics")
+    listing = commands.add_parser("list", help="list archived fetches")
+    listing.add_argument("--endpoint", default=None, help="only endpoints containing this substring")
+    listing.add_argument("--since", default=None, help="YYYY-MM-DD[ HH:MM[:SS]]")
+    listing.add_argument("--until", default=None, help="YYYY-MM-DD[ HH:MM[:SS]]")
+    show = commands.add_parser("show", help="print an archived payload")
+    show.add_argument("blob", help="content hash")
+    args = parser.parse_args()
+
+    with ResponseArchive(Path(args.archive)) as archive:
+        if args.command == "summary":
+            print(archive.summary())
+        elif args.command == "list":
+            for fetch in archive.fetches(args.endpoint, parse_time(args.since), parse_time(args.until)):
+                fetched_at = datetime.fromtimestamp(fetch["fetched_at"]).strftime("%Y-%m-%d %H:%M:%S")
+                print(f"{fetched_at}  {fetch['blob'][:12]}  {fetch['method']} {fetch['endpoint']} "
+                      f"{json.dumps(fetch['params'], ensure_ascii=False)}")
+        else:
+            print(json.dumps(archive.blob(args.blob), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
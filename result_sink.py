@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+结果流式写入
+Streaming Result Sink
+
+Collected records are appended to a JSONL file as they are produced, so a
+crash keeps everything written so far and no serialized copy of the whole
+dataset is ever held in memory. The single-JSON exports the reports and
+later runs read are derived from the JSONL file. Paths ending in .gz are
+gzip-compressed.
+"""
+
+import gzip
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List
+
+
+# Records buffered in memory before they are written out
+SINK_BUFFER_RECORDS = 256
+
+# Seconds between flushes of a partly filled buffer, and between fsyncs
+SINK_FLUSH_INTERVAL = 2.0
+
+
+class JsonlSink:
+    """
+    Append-only JSONL file of collected records, one JSON object per line.
+
+    Records are buffered and written out every SINK_BUFFER_RECORDS records
+    or SINK_FLUSH_INTERVAL seconds, whichever comes first, and the file is
+    fsynced at most once per interval (and on close), so a crash loses at
+    most the last interval's records.
+    """
+
+    def __init__(self, path: Path, buffer_records: int = SINK_BUFFER_RECORDS,
+                 flush_interval: float = SINK_FLUSH_INTERVAL):
+        """
+        Create (or truncate) the sink file.
+
+        Args:
+            path: JSONL file
+            buffer_records: Records buffered before a write
+            flush_interval: Max seconds a record stays buffered, and between fsyncs
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.buffer_records = buffer_records
+        self.flush_interval = flush_interval
+        self.stats = {"records": 0, "writes": 0, "fsyncs": 0}
+
+        self._lock = threading.Lock()
+        self._buffer: List[str] = []
+        self._file = _open_text(self.path, 'w')
+        self._last_flush = self._last_sync = time.monotonic()
+
+    def __enter__(self) -> "JsonlSink":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, record: Dict[str, Any]):
+        """Append one record."""
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._buffer.append(line)
+            self.stats["records"] += 1
+            if (len(self._buffer) >= self.buffer_records
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush()
+
+    def flush(self, sync: bool = False):
+        """Write out buffered records; with sync, also fsync the file."""
+        with self._lock:
+            self._flush(sync)
+
+    def _flush(self, sync: bool = False):
+        if self._buffer:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._file.flush()
+            self._buffer.clear()
+            self.stats["writes"] += 1
+        now = time.monotonic()
+        self._last_flush = now
+        if sync or now - self._last_sync >= self.flush_interval:
+            os.fsync(self._file.fileno())
+            self._last_sync = now
+            self.stats["fsyncs"] += 1
+
+    def close(self):
+        """Flush, fsync and close the sink."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._flush(sync=True)
+            self._file.close()
+
+    def summary(self) -> str:
+        """One-line write statistics."""
+        return (f"结果流: {self.stats['records']} 条记录, {self.stats['writes']} 次写入, "
+                f"{self.stats['fsyncs']} 次落盘 -> {self.path}")
+
+
+def iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the records of a JSONL file back.
+
+    A torn last line (or gzip stream), left by a crash mid-write, is skipped.
+    Any other undecodable line means the file is corrupt and raises ValueError.
+    """
+    torn = None
+    with _open_text(path, 'r') as f:
+        try:
+            for number, line in enumerate(f, 1):
+                if torn is not None:
+                    raise ValueError(f"{path}:{torn}: corrupt JSONL record")
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    torn = number
+                    continue
+                yield record
+        except EOFError:
+            return
+
+
+def _open_text(path: Path, mode: str) -> IO[str]:
+    if Path(path).suffix == ".gz":
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class StreamedList:
+    """
+    A JSON array whose items are produced lazily while it is written (see
+    write_json). The items themselves are plain JSON data.
+    """
+
+    def __init__(self, items: Callable[[], Iterable[Any]]):
+        """
+        Args:
+            items: Returns a fresh iterable of the items each time it is called
+        """
+        self.items = items
+
+
+def write_json(path: Path, value: Any):
+    """
+    Write value as json.dump(value, f, indent=2, ensure_ascii=False) would,
+    streaming the items of the StreamedLists in it instead of materializing
+    them. The file is written to a temporary name and renamed into place.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        _write_value(f, value, 0)
+    os.replace(tmp_path, path)
+
+
+def _write_value(f: IO[str], value: Any, level: int, plain: bool = False):
+    # Dicts and lists around the StreamedLists are walked; everything else is dumped whole
+    if isinstance(value, StreamedList):
+        _write_items(f, value.items(), level, plain=True)
+    elif isinstance(value, dict) and not plain:
+        _write_items(f, value.items(), level, mapping=True)
+    elif isinstance(value, (list, tuple)) and not plain:
+        _write_items(f, value, level)
+    else:
+        f.write(json.dumps(value, indent=2, ensure_ascii=False).replace("\n", "\n" + "  " * level))
+
+
+def _write_items(f: IO[str], items: Iterable[Any], level: int, mapping: bool = False, plain: bool = False):
+    indent = "\n" + "  " * (level + 1)
+    empty = True
+    for item in items:
+        f.write(("{" if mapping else "[") + indent if empty else "," + indent)
+        empty = False
+        if mapping:
+            key, item = item
+            f.write(json.dumps(key if isinstance(key, str) else json.dumps(key).strip('"'),
+                               ensure_ascii=False) + ": ")
+        _write_value(f, item, level + 1, plain)
+    if empty:
+        f.write("{}" if mapping else "[]")
+    else:
+        f.write("\n" + "  " * level + ("}" if mapping else "]"))
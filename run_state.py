@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+采集运行状态
+Collection Run State
+
+Local state that lets collection runs build on earlier runs.
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+
+# Default location of the incremental-collection watermarks
+DEFAULT_WATERMARK_PATH = Path(__file__).parent / ".cache" / "watermarks.json"
+
+# Seen ids kept per (platform, keyword); older ids are dropped first
+MAX_SEEN_IDS = 5000
+
+
+class WatermarkStore:
+    """
+    Per-(platform, keyword) watermarks for incremental collection.
+
+    A watermark holds the newest creation time seen and the ids seen so far,
+    so a later run can stop paging as soon as it reaches known content.
+    """
+
+    def __init__(self, path: Path = DEFAULT_WATERMARK_PATH, max_seen_ids: int = MAX_SEEN_IDS):
+        """
+        Initialize the store, loading existing watermarks if the file exists.
+
+        Args:
+            path: JSON file holding the watermarks
+            max_seen_ids: Seen ids kept per (platform, keyword)
+        """
+        self.path = Path(path)
+        self.max_seen_ids = max_seen_ids
+        self._lock = threading.Lock()
+        self._marks: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._marks = json.load(f)
+
+    @staticmethod
+    def _key(platform: str, keyword: str) -> str:
+        return f"{platform}|{keyword}"
+
+    def get(self, platform: str, keyword: str) -> Optional[Dict[str, Any]]:
+        """Return the watermark for (platform, keyword), or None on the first run."""
+        with self._lock:
+            mark = self._marks.get(self._key(platform, keyword))
+            return dict(mark) if mark else None
+
+    def seen_ids(self, platform: str, keyword: str) -> set:
+        """Ids already collected for (platform, keyword)."""
+        mark = self.get(platform, keyword)
+        return set(mark["seen_ids"]) if mark else set()
+
+    def newest_time(self, platform: str, keyword: str) -> Optional[int]:
+        """Newest creation time collected for (platform, keyword)."""
+        mark = self.get(platform, keyword)
+        return mark["newest_time"] if mark else None
+
+    def update(self, platform: str, keyword: str, ids: Iterable[str], times: Iterable[int]):
+        """
+        Advance the watermark with newly collected items.
+
+        Args:
+            platform: Platform name
+            keyword: Search keyword
+            ids: Content ids collected in this run
+            times: Their creation times
+        """
+        ids = [i for i in ids if i]
+        times = [t for t in times if t]
+        with self._lock:
+            key = self._key(platform, keyword)
+            mark = self._marks.get(key) or {"newest_time": 0, "seen_ids": []}
+            seen = mark["seen_ids"]
+            known = set(seen)
+            seen.extend(i for i in ids if i not in known)
+            mark["seen_ids"] = seen[-self.max_seen_ids:]
+            mark["newest_time"] = max([mark["newest_time"] or 0] + times)
+            mark["updated_at"] = int(time.time())
+            self._marks[key] = mark
+
+    def save(self):
+        """Write the watermarks to disk atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._marks, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+# Seconds between fsyncs of the checkpoint journal (every record is flushed)
+JOURNAL_FSYNC_INTERVAL = 2.0
+
+
+class CheckpointJournal:
+    """
+    Append-only journal of completed collection units, for resuming a run.
+
+    Each line is one JSON record {"key": ..., "unit": ..., "data": ...}. Every
+    record is flushed as soon as it is written and the file is fsynced at most
+    every JOURNAL_FSYNC_INTERVAL seconds, so an interrupted run loses at most
+    the units that were in flight. A run that completes discards its journal,
+    so a later --resume never replays it, and an existing journal therefore
+    always belongs to an unfinished run.
+    """
+
+    def __init__(self, path: Path, resume: bool = False, fresh: bool = False):
+        """
+        Open the journal.
+
+        Args:
+            path: JSONL journal file
+            resume: Keep and load existing records; otherwise start a fresh journal
+            fresh: Start a fresh journal even if an unfinished run left one
+                behind; the old journal is kept next to it with a .old suffix
+
+        Raises:
+            FileExistsError: The journal of an unfinished run exists and
+                neither resume nor fresh was given
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._records: Dict[str, Any] = {}
+        self.stats = {"replayed": 0, "recorded": 0}
+
+        if resume and self.path.exists():
+            complete = 0
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # A torn last line from the interrupted run
+                        break
+                    complete += len(line)
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._records[record["key"]] = record["data"]
+            # Cut the torn line off, or the first new record would be appended to it
+            if complete < self.path.stat().st_size:
+                os.truncate(self.path, complete)
+        elif not resume and self.path.exists() and self.path.stat().st_size:
+            if not fresh:
+                raise FileExistsError(f"unfinished run journal: {self.path}")
+            self.path.replace(self.path.with_name(self.path.name + ".old"))
+
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+        self._last_sync = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, key: str):
+        """
+        Return (True, data) for a unit completed by the interrupted run,
+        (False, None) otherwise. Callers get their own copy of the data.
+        """
+        with self._lock:
+            if key not in self._records:
+                return False, None
+            self.stats["replayed"] += 1
+            data = self._records[key]
+        return True, copy.deepcopy(data)
+
+    def record(self, key: str, data: Any, unit: Any = None):
+        """
+        Mark a unit as completed.
+
+        Args:
+            key: Stable unit key
+            data: Result of the unit, replayed on resume
+            unit: Human-readable description of the unit, for inspection
+        """
+        line = json.dumps({"key": key, "unit": unit, "data": data}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.stats["recorded"] += 1
+            if time.monotonic() - self._last_sync >= JOURNAL_FSYNC_INTERVAL:
+                os.fsync(self._file.fileno())
+                self._last_sync = time.monotonic()
+
+    def close(self):
+        """Flush, fsync and close the journal."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def discard(self):
+        """Close and delete the journal, once its run has completed and there is nothing to resume."""
+        self.close()
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+"""
+情感分析
+Sentiment Analysis
+
+Shared keyword matching and sentiment scoring for the research scripts.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, FrozenSet, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: distributions fall back to plain Python
+    np = None
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Build a regex alternation structured as a trie of the keywords."""
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        is_end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not is_end:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if is_end else body
+
+    return build(trie)
+
+
+# Version of the KeywordMatcher.state() layout; bump when it changes
+MATCHER_STATE_FORMAT = 1
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern keyword matcher compiled once from labeled keyword lists.
+
+    All keywords go into one trie, which is compiled into a single regular
+    expression, so each text is scanned once by the C regex engine however
+    many keywords there are (the Aho-Corasick idea, without a per-character
+    Python loop). The scan finds the longest keyword at each match position.
+    Keywords contained in a match are credited from a table built at compile
+    time. A keyword can also start inside a match and run past its end. Texts
+    where that can happen are rescanned with an overlapping lookahead pattern.
+    The result is exactly the set of keywords for which `kw in text` holds.
+    """
+
+    def __init__(self, lexicons: Dict[str, Sequence[str]], lowercase: bool = True):
+        """
+        Compile the matcher.
+
+        Args:
+            lexicons: Label -> keyword list, e.g. {"positive": [...], "negative": [...]}
+            lowercase: Lowercase texts before matching (keywords are lowercased too)
+        """
+        self.lowercase = lowercase
+        self.labels: List[str] = list(lexicons)
+
+        # A keyword listed twice in one list counts twice, like the
+        # per-keyword `sum(1 for kw in keywords if kw in text)` it replaces
+        self.weights: Dict[str, Dict[str, int]] = {}
+        for label, keywords in lexicons.items():
+            for keyword in keywords:
+                keyword = keyword.lower() if lowercase else keyword
+                if not keyword:
+                    continue
+                label_weights = self.weights.setdefault(keyword, {})
+                label_weights[label] = label_weights.get(label, 0) + 1
+
+        keywords = sorted(self.weights)
+        self._contained: Dict[str, FrozenSet[str]] = {
+            keyword: frozenset(other for other in keywords if other in keyword)
+            for keyword in keywords
+        }
+        # Keywords whose tail is the start of a longer keyword: another keyword
+        # may begin inside a match on them and end after it
+        self._overlapping = frozenset(
+            keyword for keyword in keywords
+            if any(other.startswith(keyword[i:]) and len(other) > len(keyword) - i
+                   for i in range(1, len(keyword)) for other in keywords)
+        )
+        self._pattern = _trie_pattern(keywords)
+        self._prepare()
+
+    def _prepare(self):
+        """Build the per-hit tables and compile the patterns."""
+        # Per-label counts credited by a single hit, i.e. the keyword plus the
+        # keywords contained in it (the common case for short comments)
+        self._hit_counts: Dict[str, Dict[str, int]] = {
+            keyword: self._count_keywords(contained)
+            for keyword, contained in self._contained.items()
+        }
+        # Bit i of a mask stands for labels[i]; per hit, the labels it credits
+        self.label_bits: Dict[str, int] = {label: 1 << i for i, label in enumerate(self.labels)}
+        self._hit_masks: Dict[str, int] = {
+            keyword: sum(self.label_bits[label] for label, count in counts.items() if count)
+            for keyword, counts in self._hit_counts.items()
+        }
+        keywords = bool(self.weights)
+        self._findall = re.compile(self._pattern).findall if keywords else None
+        self._findall_overlapping = re.compile("(?=(" + self._pattern + "))").findall if keywords else None
+
+        # Identifies the lexicon the matcher was built from, for result caches
+        self.fingerprint = hashlib.sha256(json.dumps(
+            [self.lowercase, self.labels, self.weights], ensure_ascii=False, sort_keys=True
+        ).encode("utf-8")).hexdigest()[:16]
+        # No keyword contains whitespace, so surrounding whitespace never affects a match
+        self._strip_whitespace = not any(ch.isspace() for keyword in self.weights for ch in keyword)
+
+    def state(self) -> Dict[str, Any]:
+        """Compiled tables as JSON-serializable data, see from_state."""
+        return {
+            "format": MATCHER_STATE_FORMAT,
+            "lowercase": self.lowercase,
+            "labels": self.labels,
+            "weights": self.weights,
+            "contained": {keyword: sorted(contained) for keyword, contained in self._contained.items()},
+            "overlapping": sorted(self._overlapping),
+            "pattern": self._pattern
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "KeywordMatcher":
+        """Rebuild a matcher from state() output without recomputing its tables."""
+        if state.get("format") != MATCHER_STATE_FORMAT:
+            raise ValueError(f"unsupported matcher state format: {state.get('format')}")
+        matcher = cls.__new__(cls)
+        matcher.lowercase = state["lowercase"]
+        matcher.labels = list(state["labels"])
+        matcher.weights = state["weights"]
+        matcher._contained = {keyword: frozenset(contained) for keyword, contained in state["contained"].items()}
+        matcher._overlapping = frozenset(state["overlapping"])
+        matcher._pattern = state["pattern"]
+        matcher._prepare()
+        return matcher
+
+    def normalize(self, text: str) -> str:
+        """
+        Canonical form of a text with the same matches: lowercased (if the
+        matcher lowercases) and trimmed of surrounding whitespace.
+        """
+        if not text:
+            return ""
+        if self.lowercase:
+            text = text.lower()
+        return text.strip() if self._strip_whitespace else text
+
+    def _count_keywords(self, keywords: Iterable[str]) -> Dict[str, int]:
+        counts = dict.fromkeys(self.labels, 0)
+        for keyword in keywords:
+            for label, weight in self.weights[keyword].items():
+                counts[label] += weight
+        return counts
+
+    def _hits(self, text: str) -> Set[str]:
+        """Distinct longest-match keywords found in the text."""
+        if not text or self._findall is None:
+            return set()
+        if self.lowercase:
+            text = text.lower()
+        hits = set(self._findall(text))
+        if hits and not self._overlapping.isdisjoint(hits):
+            hits = set(self._findall_overlapping(text))
+        return hits
+
+    def matches(self, text: str) -> FrozenSet[str]:
+        """Return the distinct keywords contained in the text."""
+        hits = self._hits(text)
+        if not hits:
+            return frozenset()
+        return frozenset().union(*[self._contained[hit] for hit in hits])
+
+    def mask(self, text: str) -> int:
+        """Return a bitmask of the labels with at least one matching keyword (see label_bits)."""
+        mask = 0
+        for hit in self._hits(text):
+            mask |= self._hit_masks[hit]
+        return mask
+
+    def counts(self, text: str) -> Dict[str, int]:
+        """Return the number of matching keywords per label."""
+        hits = self._hits(text)
+        if not hits:
+            return dict.fromkeys(self.labels, 0)
+        if len(hits) == 1:
+            return dict(self._hit_counts[hits.pop()])
+        return self._count_keywords(frozenset().union(*[self._contained[hit] for hit in hits]))
+
+
+# Default bound of a ClassificationMemo
+DEFAULT_MEMO_ENTRIES = 200_000
+
+
+def _text_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ClassificationMemo:
+    """
+    Bounded memo of matcher results, shared by all matchers of a run.
+
+    Entries are keyed by the matcher fingerprint (so an edited lexicon never
+    reuses stale results) and the normalized text, so titles repeated across
+    keywords and short stock replies ("支持", "加油") are scored once. When full,
+    the oldest entries are evicted first. With a path, save() writes the memo
+    keyed by a hash of the normalized text (the texts themselves are not
+    stored) and the next run starts from it.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MEMO_ENTRIES, path: Optional[Path] = None):
+        """
+        Initialize the memo.
+
+        Args:
+            max_entries: Entries kept across all matchers
+            path: JSON file to persist the memo across runs (None keeps it in memory)
+        """
+        self.max_entries = max_entries
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+        # fingerprint -> normalized text -> counts, plus the insertion order for eviction
+        self._tables: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self._order: Deque[Tuple[str, str]] = deque()
+        # "fingerprint:digest" -> counts, loaded from an earlier run
+        self._persisted: Dict[str, Dict[str, int]] = {}
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "loaded": 0}
+
+        if self.path is not None and self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._persisted = dict(list(json.load(f).items())[-max_entries:])
+            except (OSError, ValueError, AttributeError):
+                self._persisted = {}
+            self.stats["loaded"] = len(self._persisted)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def counts(self, matcher: KeywordMatcher, text: str) -> Dict[str, int]:
+        """matcher.counts(text), served from the memo when the text was seen before."""
+        key = matcher.normalize(text)
+        with self._lock:
+            table = self._tables.setdefault(matcher.fingerprint, {})
+            counts = table.get(key)
+            if counts is None and self._persisted:
+                counts = self._persisted.pop(f"{matcher.fingerprint}:{_text_digest(key)}", None)
+                if counts is not None:
+                    self._remember(matcher.fingerprint, key, counts)
+            if counts is not None:
+                self.stats["hits"] += 1
+                return counts.copy()
+            self.stats["misses"] += 1
+
+        # Scanned outside the lock; a text two threads miss at once is scanned by both
+        counts = matcher.counts(text)
+        with self._lock:
+            self._remember(matcher.fingerprint, key, counts)
+        return counts
+
+    def _remember(self, fingerprint: str, key: str, counts: Dict[str, int]):
+        # Called with the lock held
+        table = self._tables.setdefault(fingerprint, {})
+        if key in table:
+            return
+        table[key] = counts.copy()
+        self._order.append((fingerprint, key))
+        if len(self._order) > self.max_entries:
+            oldest_fingerprint, oldest = self._order.popleft()
+            del self._tables[oldest_fingerprint][oldest]
+            self.stats["evictions"] += 1
+
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def save(self):
+        """Write the memo to its path atomically (no-op without a path)."""
+        if self.path is None:
+            return
+        with self._lock:
+            entries = [(fingerprint, text, self._tables[fingerprint][text]) for fingerprint, text in self._order]
+        # Entries loaded but not used this run go first, so they are evicted first
+        persisted = dict(self._persisted)
+        persisted.update((f"{fingerprint}:{_text_digest(text)}", counts) for fingerprint, text, counts in entries)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(list(persisted.items())[-self.max_entries:]), f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def summary(self) -> str:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return (f"  classification memo: {self.stats['hits']}/{lookups} hits ({self.hit_rate():.1%}), "
+                f"{len(self._order)} entries, {self.stats['evictions']} evicted")
+
+
+class MemoizedMatcher:
+    """A KeywordMatcher whose counts() and mask() go through a ClassificationMemo."""
+
+    def __init__(self, matcher: KeywordMatcher, memo: ClassificationMemo):
+        self.matcher = matcher
+        self.memo = memo
+
+    def __getattr__(self, name):
+        return getattr(self.matcher, name)
+
+    def counts(self, text: str) -> Dict[str, int]:
+        return self.memo.counts(self.matcher, text)
+
+    def mask(self, text: str) -> int:
+        # A label's bit is set exactly when it has a matching keyword, so the memoized counts suffice
+        label_bits = self.matcher.label_bits
+        mask = 0
+        for label, count in self.memo.counts(self.matcher, text).items():
+            if count:
+                mask |= label_bits[label]
+        return mask
+
+
+def sentiment_label(positive_count: int, negative_count: int) -> str:
+    """Turn keyword hit counts into 'positive', 'negative' or 'neutral'."""
+    if positive_count > negative_count:
+        return "positive"
+    elif negative_count > positive_count:
+        return "negative"
+    else:
+        return "neutral"
+
+
+def classify_sentiment(matcher: KeywordMatcher, text: str, model: Any = None) -> str:
+    """
+    Classify a text with a matcher built from 'positive' and 'negative' lists,
+    or with a local sentiment model (see sentiment_model) when one is given.
+    """
+    if model is not None:
+        return model.predict([text])[0][0]
+    counts = matcher.counts(text)
+    return sentiment_label(counts.get("positive", 0), counts.get("negative", 0))
+
+
+def engagement_count(value: Any) -> float:
+    """Parse an engagement count such as 123, "123", "1.2万" or "10w+" (0 if unparseable)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or "").strip().rstrip("+").lower()
+    scale = 1
+    if text.endswith(("万", "w")):
+        text, scale = text[:-1], 10000
+    elif text.endswith("亿"):
+        text, scale = text[:-1], 100000000
+    try:
+        return float(text) * scale
+    except ValueError:
+        return 0.0
+
+
+class SentimentBatch:
+    """
+    Sentiment labels and scores for a batch of texts.
+
+    `scores` is the positive minus negative keyword count of each text, or the
+    positive minus negative probability when a model classified the batch, in
+    which case `confidences` holds the probability of each label (None for the
+    lexicon). `weights` are the engagement weights passed in (None when
+    unweighted). All are NumPy arrays when NumPy is installed and lists otherwise.
+    """
+
+    def __init__(self, labels: List[str], scores: Sequence[float], weights: Optional[Sequence[float]] = None,
+                 confidences: Optional[Sequence[float]] = None):
+        self.labels = labels
+        self.scores = scores
+        self.weights = weights
+        self.confidences = confidences
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def distribution(self, groups: Optional[Sequence[Hashable]] = None,
+                     weighted: bool = False) -> Dict[Any, Any]:
+        """Label distribution of the batch; see sentiment_distribution."""
+        return sentiment_distribution(self.labels, groups=groups,
+                                      weights=self.weights if weighted else None)
+
+
+def score_batch(matcher: KeywordMatcher, texts: Sequence[str],
+                weights: Optional[Sequence[float]] = None, model: Any = None) -> SentimentBatch:
+    """
+    Classify a batch of texts with a matcher built from 'positive' and 'negative' lists.
+
+    Repeated texts (reposts, copy-paste comments) are scanned once.
+
+    Args:
+        matcher: Sentiment matcher
+        texts: Texts to classify
+        weights: Optional engagement weight per text (e.g. like counts)
+        model: Optional local sentiment model (see sentiment_model) used instead
+            of the matcher; None keeps the lexicon
+
+    Returns:
+        SentimentBatch with one label and score per text
+    """
+    if weights is not None and len(weights) != len(texts):
+        raise ValueError(f"got {len(weights)} weights for {len(texts)} texts")
+    if model is not None:
+        return _model_batch(model, texts, weights)
+
+    scored: Dict[str, Tuple[str, int]] = {}
+    labels = []
+    scores = []
+    for text in texts:
+        result = scored.get(text)
+        if result is None:
+            counts = matcher.counts(text)
+            positive, negative = counts.get("positive", 0), counts.get("negative", 0)
+            result = scored[text] = (sentiment_label(positive, negative), positive - negative)
+        labels.append(result[0])
+        scores.append(result[1])
+
+    if np is not None:
+        scores = np.asarray(scores, dtype=np.int32)
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64)
+    elif weights is not None:
+        weights = list(weights)
+    return SentimentBatch(labels, scores, weights)
+
+
+def _model_batch(model: Any, texts: Sequence[str], weights: Optional[Sequence[float]]) -> SentimentBatch:
+    """score_batch with a sentiment model: one sparse inference over the distinct texts."""
+    index: Dict[str, int] = {}
+    rows = np.fromiter((index.setdefault(text, len(index)) for text in texts), dtype=np.int64, count=len(texts))
+    if not index:
+        return SentimentBatch([], np.zeros(0), weights, np.zeros(0))
+    probabilities = model.predict_proba(list(index))
+    best = probabilities.argmax(axis=1)
+    labels = [model.classes[i] for i in best[rows].tolist()]
+    confidences = probabilities[np.arange(len(best)), best][rows]
+    scores = np.zeros(len(index))
+    if "positive" in model.classes:
+        scores += probabilities[:, model.classes.index("positive")]
+    if "negative" in model.classes:
+        scores -= probabilities[:, model.classes.index("negative")]
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)
+    return SentimentBatch(labels, scores[rows], weights, confidences)
+
+
+def sentiment_distribution(labels: Sequence[str], groups: Optional[Sequence[Hashable]] = None,
+                           weights: Optional[Sequence[float]] = None) -> Dict[Any, Any]:
+    """
+    Count labels, optionally per group and weighted, in one group-by pass.
+
+    Keys appear in first-seen order, like collections.Counter, so reports keep
+    their line order.
+
+    Args:
+        labels: One label per item
+        groups: Optional group key per item (e.g. platform)
+        weights: Optional weight per item (e.g. like count); sums replace counts
+
+    Returns:
+        {label: count}, or {group: {label: count}} when groups are given
+    """
+    if groups is not None and len(groups) != len(labels):
+        raise ValueError(f"got {len(groups)} groups for {len(labels)} labels")
+    if weights is not None and len(weights) != len(labels):
+        raise ValueError(f"got {len(weights)} weights for {len(labels)} labels")
+
+    grouped = groups if groups is not None else [None] * len(labels)
+    if np is None or not len(labels):
+        return _distribution_python(labels, grouped, weights, groups is not None)
+
+    label_names, codes = _encode(labels)
+    if groups is None:
+        group_names, group_ids = [None], np.zeros(len(labels), dtype=np.int64)
+    else:
+        group_names, group_ids = _encode(groups)
+
+    # One bincount over (group, label) cells; first occurrences give the key order
+    cells = group_ids * len(label_names) + codes
+    size = len(group_names) * len(label_names)
+    if weights is None:
+        totals = np.bincount(cells, minlength=size)
+    else:
+        totals = np.bincount(cells, weights=np.asarray(weights, dtype=np.float64), minlength=size)
+    counts = totals if weights is None else np.bincount(cells, minlength=size)
+    present = np.flatnonzero(counts)
+    first_seen = [int(np.argmax(cells == cell)) for cell in present]
+
+    result: Dict[Any, Dict[str, Any]] = {}
+    for _, cell in sorted(zip(first_seen, present.tolist())):
+        group, label = divmod(cell, len(label_names))
+        result.setdefault(group_names[group], {})[label_names[label]] = totals[cell].item()
+    return result if groups is not None else result[None]
+
+
+def _encode(values: Sequence[Hashable]) -> Tuple[List[Hashable], Any]:
+    """Integer-code a sequence with few distinct values: (distinct values, codes array)."""
+    names = list(set(values))
+    index = {name: code for code, name in enumerate(names)}
+    return names, np.fromiter(map(index.__getitem__, values), dtype=np.int64, count=len(values))
+
+
+def _distribution_python(labels: Sequence[str], groups: Sequence[Hashable],
+                         weights: Optional[Sequence[float]], grouped: bool) -> Dict[Any, Any]:
+    result: Dict[Any, Dict[str, Any]] = {} if grouped else {None: {}}
+    for i, (label, group) in enumerate(zip(labels, groups)):
+        counts = result.setdefault(group, {})
+        counts[label] = counts.get(label, 0) + (1 if weights is None else float(weights[i]))
+    return result if grouped else result[None]
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+本地情感模型
+Local Sentiment Model
+
+Optional CPU-only sentiment classifier: hashed character n-grams and a
+multinomial naive Bayes model, trained offline on labeled comment exports
+and shipped as a small .npz file next to the lexicons. Without NumPy or a
+model file, callers fall back to the keyword lexicons.
+
+Usage:
+    python sentiment_model.py train labeled.jsonl lexicons/xiaomi_car.comment_sentiment.npz
+    python sentiment_model.py eval labeled.jsonl lexicons/xiaomi_car.comment_sentiment.npz
+    python sentiment_model.py predict lexicons/xiaomi_car.comment_sentiment.npz "质量真好" "太坑了"
+
+Labeled exports are JSONL files with one {"text": ..., "label": ...} per line.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from sentiment import np
+
+
+# Model file layout version; bump when the hashing or the arrays change
+MODEL_FORMAT = 1
+
+# Hash buckets (a power of two) and character n-gram lengths
+DEFAULT_FEATURES = 1 << 18
+DEFAULT_NGRAMS = (1, 3)
+
+# Additive smoothing of the naive Bayes feature counts
+DEFAULT_ALPHA = 0.5
+
+# Texts featurized per block, bounding the memory of the n-gram arrays
+BATCH_SIZE = 20000
+
+_HASH_MULTIPLIER = 0x100000001B3
+_HASH_MIX = 0x9E3779B97F4A7C15
+
+
+class HashingCharVectorizer:
+    """
+    Character n-gram hashing, vectorized over a whole batch of texts.
+
+    The texts of a batch are joined with NUL separators and decoded into one
+    array of code points; n-grams are hashed with array arithmetic and those
+    crossing a separator are dropped. The result is the sparse document-term
+    matrix in coordinate form: (document index, bucket) per n-gram occurrence.
+    """
+
+    def __init__(self, n_features: int = DEFAULT_FEATURES, ngram_range: Tuple[int, int] = DEFAULT_NGRAMS):
+        if n_features & (n_features - 1):
+            raise ValueError("n_features must be a power of two")
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+
+    def transform(self, texts: Sequence[str]):
+        """
+        Hash the n-grams of a batch of texts.
+
+        Returns:
+            (doc_ids, buckets) arrays, one entry per n-gram occurrence
+        """
+        joined = "\0".join((text or "").replace("\0", " ").lower() for text in texts) + "\0"
+        # surrogatepass: API text can hold lone surrogates (emoji cut in half); they hash like any character
+        codes = np.frombuffer(joined.encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32).astype(np.uint64)
+        separators = codes == 0
+        # Documents before each position = separators before it
+        doc_index = np.cumsum(separators) - separators
+        # Separators up to and including each position, for spotting n-grams that cross one
+        seen = np.concatenate(([0], np.cumsum(separators)))
+
+        doc_parts = []
+        bucket_parts = []
+        mask = np.uint64(self.n_features - 1)
+        with np.errstate(over="ignore"):
+            rolling = np.zeros(len(codes), dtype=np.uint64)
+            for n in range(1, self.ngram_range[1] + 1):
+                count = len(codes) - n + 1
+                if count <= 0:
+                    break
+                # Hash of codes[i:i + n], extended by one character per round
+                rolling = rolling[:count] * np.uint64(_HASH_MULTIPLIER) + codes[n - 1:n - 1 + count]
+                if n < self.ngram_range[0]:
+                    continue
+                valid = seen[n:n + count] == seen[:count]
+                mixed = (rolling[valid] + np.uint64(n)) * np.uint64(_HASH_MIX)
+                mixed ^= mixed >> np.uint64(29)
+                doc_parts.append(doc_index[:count][valid])
+                bucket_parts.append((mixed & mask).astype(np.int64))
+        return np.concatenate(doc_parts).astype(np.int64), np.concatenate(bucket_parts)
+
+
+class SentimentModel:
+    """
+    Multinomial naive Bayes over hashed character n-grams.
+
+    Inference is one sparse product per batch: the per-class log weights of
+    every n-gram occurrence are gathered and summed per document.
+    """
+
+    def __init__(self, classes: Sequence[str], class_log_prior, feature_log_prob,
+                 vectorizer: HashingCharVectorizer):
+        self.classes = list(classes)
+        self.class_log_prior = class_log_prior
+        self.feature_log_prob = feature_log_prob
+        self.vectorizer = vectorizer
+
+    @classmethod
+    def train(cls, texts: Sequence[str], labels: Sequence[str], n_features: int = DEFAULT_FEATURES,
+              ngram_range: Tuple[int, int] = DEFAULT_NGRAMS, alpha: float = DEFAULT_ALPHA) -> "SentimentModel":
+        """
+        Fit the model on labeled texts.
+
+        Args:
+            texts: Training texts
+            labels: Their labels, e.g. "positive" / "negative" / "neutral"
+            n_features: Hash buckets (a power of two)
+            ngram_range: Shortest and longest character n-gram
+            alpha: Additive smoothing
+        """
+        if np is None:
+            raise RuntimeError("training the sentiment model requires NumPy")
+        vectorizer = HashingCharVectorizer(n_features, ngram_range)
+        classes = sorted(set(labels))
+        class_index = {label: i for i, label in enumerate(classes)}
+        y = np.array([class_index[label] for label in labels], dtype=np.int64)
+
+        counts = np.zeros((len(classes), n_features), dtype=np.float64)
+        for start in range(0, len(texts), BATCH_SIZE):
+            doc_ids, buckets = vectorizer.transform(texts[start:start + BATCH_SIZE])
+            cells = y[start:start + BATCH_SIZE][doc_ids] * n_features + buckets
+            counts += np.bincount(cells, minlength=len(classes) * n_features).reshape(len(classes), n_features)
+
+        smoothed = counts + alpha
+        feature_log_prob = np.log(smoothed) - np.log(smoothed.sum(axis=1, keepdims=True))
+        class_log_prior = np.log(np.bincount(y, minlength=len(classes)) / len(y))
+        return cls(classes, class_log_prior, feature_log_prob.astype(np.float32), vectorizer)
+
+    def decision(self, texts: Sequence[str]):
+        """Per-class log posterior (up to a constant), shape (len(texts), classes)."""
+        scores = np.empty((len(texts), len(self.classes)), dtype=np.float64)
+        for start in range(0, len(texts), BATCH_SIZE):
+            block = texts[start:start + BATCH_SIZE]
+            doc_ids, buckets = self.vectorizer.transform(block)
+            for c in range(len(self.classes)):
+                scores[start:start + len(block), c] = np.bincount(
+                    doc_ids, weights=self.feature_log_prob[c][buckets], minlength=len(block))
+        return scores + self.class_log_prior
+
+    def predict_proba(self, texts: Sequence[str]):
+        """Posterior probability of each class, shape (len(texts), classes)."""
+        scores = self.decision(texts)
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        return probabilities
+
+    def predict(self, texts: Sequence[str]) -> Tuple[List[str], object]:
+        """
+        Classify a batch of texts.
+
+        Returns:
+            (labels, confidences): the most probable class of each text and its
+            posterior probability
+        """
+        if not len(texts):
+            return [], np.zeros(0)
+        probabilities = self.predict_proba(texts)
+        best = probabilities.argmax(axis=1)
+        return [self.classes[i] for i in best.tolist()], probabilities[np.arange(len(best)), best]
+
+    def save(self, path: Path):
+        """Write the model as a compressed .npz file."""
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                format=np.array(MODEL_FORMAT),
+                classes=np.array(self.classes),
+                class_log_prior=self.class_log_prior,
+                feature_log_prob=self.feature_log_prob.astype(np.float16),
+                n_features=np.array(self.vectorizer.n_features),
+                ngram_range=np.array(self.vectorizer.ngram_range)
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "SentimentModel":
+        """Read a model written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format"]) != MODEL_FORMAT:
+                raise ValueError(f"unsupported sentiment model format: {int(data['format'])}")
+            vectorizer = HashingCharVectorizer(int(data["n_features"]), tuple(data["ngram_range"].tolist()))
+            return cls(data["classes"].tolist(), data["class_log_prior"],
+                       data["feature_log_prob"].astype(np.float32), vectorizer)
+
+
+def load_model(path: Path) -> Optional[SentimentModel]:
+    """Load a model if NumPy is installed and the file exists, else None (use the lexicon)."""
+    if np is None or not Path(path).exists():
+        return None
+    try:
+        return SentimentModel.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"情感模型加载失败, 使用词表: {path} ({e})")
+        return None
+
+
+def read_labeled(path: Path) -> Tuple[List[str], List[str]]:
+    """Read a labeled JSONL export: one {"text": ..., "label": ...} per line."""
+    texts, labels = [], []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            texts.append(record.get("text") or "")
+            labels.append(record["label"])
+    return texts, labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地情感模型: 训练 / 评估 / 预测")
+    commands = parser.add_subparsers(dest="command", required=True)
+    train = commands.add_parser("train", help="train a model on a labeled JSONL export")
+    train.add_argument("data")
+    train.add_argument("model")
+    train.add_argument("--features", type=int, default=DEFAULT_FEATURES)
+    train.add_argument("--alpha", type=float, default=DEFAULT_ALPHA)
+    evaluate = commands.add_parser("eval", help="accuracy of a model on a labeled JSONL export")
+    evaluate.add_argument("data")
+    evaluate.add_argument("model")
+    predict = commands.add_parser("predict", help="classify texts given on the command line")
+    predict.add_argument("model")
+    predict.add_argument("texts", nargs="+")
+    args = parser.parse_args()
+
+    if np is None:
+        sys.exit("the sentiment model requires NumPy")
+
+    if args.command == "train":
+        texts, labels = read_labeled(args.data)
+        model = SentimentModel.train(texts, labels, n_features=args.features, alpha=args.alpha)
+        model.save(args.model)
+        print(f"trained on {len(texts)} texts ({', '.join(model.classes)}), saved to {args.model}")
+    elif args.command == "eval":
+        texts, labels = read_labeled(args.data)
+        predicted, _ = SentimentModel.load(args.model).predict(texts)
+        correct = sum(1 for p, y in zip(predicted, labels) if p == y)
+        print(f"accuracy: {correct}/{len(texts)} ({correct / len(texts):.1%})")
+    else:
+        predicted, confidences = SentimentModel.load(args.model).predict(args.texts)
+        for text, label, confidence in zip(args.texts, predicted, confidences.tolist()):
+            print(f"{label}\t{confidence:.3f}\t{text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from pagination import PagedSearch
+from records import XiaohongshuNote
+
+
+def search(pages, **options):
+    """A PagedSearch over pages of (id, time) pairs, numbered from 1."""
+    def fetch_page(page):
+        return {"items": pages[page - 1]}
+
+    def parse_page(response, page):
+        items = [{"id": content_id, "time": created} for content_id, created in response["items"]]
+        return items, page + 1, page < len(pages)
+
+    return PagedSearch(fetch_page, parse_page, id_of=lambda item: item["id"],
+                       time_of=lambda item: item["time"], first_token=1, **options)
+
+
+def ids(paged):
+    return [item["id"] for item in paged]
+
+
+def test_known_ids_are_skipped_inside_the_overlap():
+    # Newest first; "late" was indexed after the last run and sits between known items
+    pages = [[("new", 500), ("k1", 400)], [("late", 390), ("k2", 380)], [("k3", 300), ("old", 200)]]
+    paged = search(pages, since=350, known_ids={"k1", "k2", "k3"})
+    assert ids(paged) == ["new", "late"]
+    assert paged.stop_reason == "time_cutoff"
+    assert paged.pages_fetched == 3
+
+
+def test_without_times_a_page_of_known_content_ends_the_search():
+    pages = [[("a", 0), ("k1", 0), ("b", 0)], [("k2", 0), ("k3", 0)], [("c", 0)]]
+    paged = search(pages, since=350, known_ids={"k1", "k2", "k3"})
+    assert ids(paged) == ["a", "b"]
+    assert paged.stop_reason == "known_content"
+    assert paged.pages_fetched == 2
+
+
+def test_stops_on_target_count_and_repeated_pages():
+    pages = [[("a", 1), ("b", 1)], [("a", 1), ("b", 1)], [("c", 1)]]
+    assert ids(search(pages, target_count=1)) == ["a"]
+    paged = search(pages)
+    assert ids(paged) == ["a", "b"]
+    assert paged.stop_reason == "no_new_ids"
+
+
+def test_xiaohongshu_time_falls_back_to_the_note_id():
+    assert XiaohongshuNote.from_api({"id": "64f1a2b3000000001f03a5c1"}).published_time == 0x64f1a2b3
+    assert XiaohongshuNote.from_api({"id": "64f1a2b3000000001f03a5c1", "last_update_time": 5}).published_time == 5
+    assert XiaohongshuNote.from_api({"id": "not-an-object-id"}).published_time == 0
@@ -0,0 +1,69 @@
+import json
+import sqlite3
+
+from research_store import SCHEMA, SCHEMA_VERSION, ResearchStore
+
+# The version 1 schema: everything up to the run membership tables
+SCHEMA_V1 = SCHEMA[:SCHEMA.index("CREATE TABLE IF NOT EXISTS post_runs")]
+
+
+def video(aweme_id, likes):
+    return {"aweme_id": aweme_id, "desc": aweme_id, "create_time": 1700000000,
+            "author": {"uid": "u1", "nickname": "n"}, "statistics": {"like_count": likes, "comment_count": 0},
+            "search_keyword": "小米SU7"}
+
+
+def make_v1_store(path):
+    conn = sqlite3.connect(str(path))
+    conn.executescript(SCHEMA_V1)
+    conn.execute("INSERT INTO runs (run_id, source, started_at, finished_at) VALUES (1, 'xiaomi_car_research', 0, 1)")
+    for seq, (aweme_id, likes) in enumerate([("a", "1.2万"), ("b", 9000), ("c", "350")]):
+        conn.execute("INSERT INTO posts (platform, content_id, like_count, comment_count, first_run, last_run,"
+                     " run_seq, data) VALUES ('douyin', ?, ?, '2', 1, 1, ?, ?)",
+                     (aweme_id, likes, seq, json.dumps(video(aweme_id, likes))))
+    conn.execute("INSERT INTO comments (platform, comment_id, content_id, like_count, last_run, data)"
+                 " VALUES ('douyin', 'c1', 'a', '3.5万', 1, '{}')")
+    conn.execute("PRAGMA user_version=1")
+    conn.commit()
+    conn.close()
+
+
+def test_migrates_v1_to_current(tmp_path):
+    path = tmp_path / "research.db"
+    make_v1_store(path)
+
+    with ResearchStore(path) as store:
+        assert store._conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION == 3
+        rows = store._conn.execute("SELECT content_id, like_count, typeof(like_count), comment_count"
+                                   " FROM posts ORDER BY content_id").fetchall()
+        assert [tuple(row) for row in rows] == [("a", 12000, "integer", 2), ("b", 9000, "integer", 2),
+                                                ("c", 350, "integer", 2)]
+        comment = store._conn.execute("SELECT like_count, typeof(like_count) FROM comments").fetchone()
+        assert tuple(comment) == (35000, "integer")
+
+        # Run membership is backfilled from last_run, so run-scoped queries see the old run
+        assert [post["aweme_id"] for post in store.top_posts("douyin", 10, run_id=1)] == ["a", "b", "c"]
+        assert [post["aweme_id"] for post in store.top_posts("douyin", 2)] == ["a", "b"]
+        assert store._conn.execute("SELECT COUNT(*) FROM comment_runs WHERE run_id = 1").fetchone()[0] == 1
+
+    # Reopening a migrated store changes nothing
+    with ResearchStore(path) as store:
+        assert store._conn.execute("SELECT COUNT(*) FROM post_runs").fetchone()[0] == 3
+
+
+def test_runs_keep_their_own_posts(tmp_path):
+    with ResearchStore(tmp_path / "research.db") as store:
+        first = store.begin_run("xiaomi_car_research")
+        store.add_posts("douyin", [video("a", 5), video("b", "1万")], first)
+        store.finish_run(first)
+        second = store.begin_run("xiaomi_car_research")
+        store.add_posts("douyin", [video("b", 7), video("c", 1)], second)
+        store.finish_run(second)
+
+        assert store.latest_run("xiaomi_car_research") == second
+        # Membership is per run; the ranking uses each post's latest snapshot (b now has 7 likes)
+        assert [post["aweme_id"] for post in store.top_posts("douyin", 10, run_id=first)] == ["b", "a"]
+        assert [post["aweme_id"] for post in store.top_posts("douyin", 10, run_id=second)] == ["b", "c"]
+        assert [post["aweme_id"] for post in store.top_posts("douyin", 10)] == ["b", "a", "c"]
+        posts = dict(store._conn.execute("SELECT run_id, posts FROM runs").fetchall())
+        assert posts == {first: 2, second: 2}
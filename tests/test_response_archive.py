@@ -0,0 +1,68 @@
+from response_archive import ReplayClient, ResponseArchive
+from tikhub_client import ArchivedClient
+
+
+class StubClient:
+    """Answers from a dict of endpoint -> response, counting calls."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = 0
+
+    def get(self, endpoint, params=None):
+        self.calls += 1
+        return self.responses[endpoint]
+
+    def post(self, endpoint, body=None):
+        return self.get(endpoint, body)
+
+
+RESPONSES = {
+    "/api/v1/douyin/search": {"code": 200, "message": "ok", "data": {"items": [{"id": "a", "desc": "小米SU7"}]}},
+    "/api/v1/douyin/same": {"code": 200, "data": {"items": [{"id": "a", "desc": "小米SU7"}]}},
+    "/api/v1/xiaohongshu/notes": {"code": 200, "data": {"items": []}, "router": "v3"},
+    "/api/v1/failed": {"code": 500, "message": "server error"},
+}
+
+
+def test_round_trip_through_replay_client(tmp_path):
+    with ResponseArchive(tmp_path / "archive", codec="gzip") as archive:
+        client = ArchivedClient(StubClient(RESPONSES), archive)
+        assert client.post("/api/v1/douyin/search", {"keyword": "小米", "cursor": 0}) == \
+            RESPONSES["/api/v1/douyin/search"]
+        client.get("/api/v1/douyin/same", {"page": 1})
+        client.get("/api/v1/xiaohongshu/notes", {"page": "1"})
+        client.get("/api/v1/failed")
+        # The two douyin payloads are identical and share one blob; the failure is not archived
+        assert archive.stats["fetches"] == 3
+        assert archive.stats["blobs"] == 2
+        assert archive.stats["deduplicated"] == 1
+
+    with ResponseArchive(tmp_path / "archive") as archive:
+        replay = ReplayClient(archive)
+        assert replay.post("/api/v1/douyin/search", {"keyword": "小米", "cursor": 0}) == \
+            RESPONSES["/api/v1/douyin/search"]
+        # Params are normalized the same way as the request cache
+        assert replay.get("/api/v1/douyin/same", {"page": "1"}) == RESPONSES["/api/v1/douyin/same"]
+        assert replay.get("/api/v1/xiaohongshu/notes", {"page": 1}) == RESPONSES["/api/v1/xiaohongshu/notes"]
+        assert "error" in replay.get("/api/v1/failed")
+        assert "error" in replay.post("/api/v1/douyin/search", {"keyword": "小米", "cursor": 10})
+        assert replay.stats == {"replayed": 3, "missing": 2}
+
+
+def test_replay_as_of(tmp_path):
+    with ResponseArchive(tmp_path / "archive", codec="gzip") as archive:
+        archive.put("GET", "/a", {"page": 1}, {"code": 200, "data": {"v": 1}}, fetched_at=100.0)
+        archive.put("GET", "/a", {"page": 1}, {"code": 200, "data": {"v": 2}}, fetched_at=200.0)
+
+        assert ReplayClient(archive).get("/a", {"page": 1})["data"] == {"v": 2}
+        assert ReplayClient(archive, as_of=150.0).get("/a", {"page": 1})["data"] == {"v": 1}
+        assert "error" in ReplayClient(archive, as_of=50.0).get("/a", {"page": 1})
+        assert [fetch["fetched_at"] for fetch in archive.fetches("/a")] == [100.0, 200.0]
+
+
+def test_blob_by_hash_prefix(tmp_path):
+    with ResponseArchive(tmp_path / "archive", codec="gzip") as archive:
+        digest = archive.put("GET", "/a", None, {"code": 200, "data": [1, 2, 3]})
+        assert archive.blob(digest) == [1, 2, 3]
+        assert archive.blob(digest[:12]) == [1, 2, 3]
@@ -0,0 +1,69 @@
+import gzip
+import json
+
+import pytest
+
+from result_sink import JsonlSink, StreamedList, iter_jsonl, write_json
+
+
+VALUE = {
+    "summary": {"count": 3, "ratio": 0.25, "empty_list": [], "empty_dict": {}, "none": None, "flag": True},
+    "标题": "小米汽车 \"quoted\" \\ \n tab\t",
+    1: "int key",
+    2.5: "float key",
+    None: "null key",
+    False: "bool key",
+    "nested": [[1, [2, []]], {"a": {"b": [{}]}}, (3, 4)],
+    "items": [{"id": i, "text": "评论" * i, "tags": ["x"] * i} for i in range(4)]
+}
+
+
+def dumped(value):
+    return json.dumps(value, indent=2, ensure_ascii=False)
+
+
+def test_write_json_matches_json_dump(tmp_path):
+    path = tmp_path / "out.json"
+    write_json(path, VALUE)
+    assert path.read_bytes() == dumped(VALUE).encode("utf-8")
+
+
+@pytest.mark.parametrize("items", [[], [{"id": 1}], [{"id": i, "data": [i, {"k": "值"}]} for i in range(5)]])
+def test_write_json_streams_lists_like_json_dump(tmp_path, items):
+    path = tmp_path / "out.json"
+    write_json(path, {"douyin": StreamedList(lambda: iter(items)), "summary": {"n": len(items)}})
+    assert path.read_bytes() == dumped({"douyin": items, "summary": {"n": len(items)}}).encode("utf-8")
+    assert not (tmp_path / "out.json.tmp").exists()
+
+
+@pytest.mark.parametrize("name", ["records.jsonl", "records.jsonl.gz"])
+def test_sink_round_trip(tmp_path, name):
+    records = [{"type": "item", "n": i, "text": "内容"} for i in range(600)]
+    with JsonlSink(tmp_path / name, buffer_records=50) as sink:
+        for record in records:
+            sink.write(record)
+    assert list(iter_jsonl(tmp_path / name)) == records
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_text('{"n": 1}\n{"n": 2}\n{"n": 3, "te', encoding="utf-8")
+    assert list(iter_jsonl(path)) == [{"n": 1}, {"n": 2}]
+
+
+def test_torn_gzip_stream_is_skipped(tmp_path):
+    path = tmp_path / "records.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for i in range(2000):
+            f.write(json.dumps({"n": i, "pad": "x" * i}) + "\n")
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])
+    records = list(iter_jsonl(path))
+    assert records == [{"n": i, "pad": "x" * i} for i in range(len(records))]
+
+
+def test_corrupt_line_before_eof_raises(tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_text('{"n": 1}\n{"n": \n{"n": 3}\n', encoding="utf-8")
+    with pytest.raises(ValueError, match=":2:"):
+        list(iter_jsonl(path))
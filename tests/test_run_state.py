@@ -0,0 +1,75 @@
+import pytest
+
+from run_state import CheckpointJournal
+
+
+def test_resume_replays_recorded_units(tmp_path):
+    path = tmp_path / "run.journal.jsonl"
+    journal = CheckpointJournal(path)
+    journal.record("a", {"items": [1, 2]}, unit="search a")
+    journal.record("b", [])
+    journal.close()
+
+    resumed = CheckpointJournal(path, resume=True)
+    assert len(resumed) == 2
+    assert resumed.get("a") == (True, {"items": [1, 2]})
+    assert resumed.get("b") == (True, [])
+    assert resumed.get("c") == (False, None)
+    resumed.close()
+
+
+def test_resume_after_torn_line(tmp_path):
+    path = tmp_path / "run.journal.jsonl"
+    journal = CheckpointJournal(path)
+    journal.record("a", 1)
+    journal.record("b", 2)
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"key": "c", "unit": null, "da')
+
+    resumed = CheckpointJournal(path, resume=True)
+    assert len(resumed) == 2
+    assert resumed.get("c") == (False, None)
+    # The torn tail is cut off, so the next record starts on its own line
+    resumed.record("c", 3)
+    resumed.close()
+
+    again = CheckpointJournal(path, resume=True)
+    assert [again.get(key) for key in "abc"] == [(True, 1), (True, 2), (True, 3)]
+    again.close()
+
+
+def test_replayed_data_is_a_copy(tmp_path):
+    journal = CheckpointJournal(tmp_path / "run.journal.jsonl")
+    journal.record("a", {"items": []})
+    journal.close()
+    resumed = CheckpointJournal(tmp_path / "run.journal.jsonl", resume=True)
+    resumed.get("a")[1]["items"].append(1)
+    assert resumed.get("a") == (True, {"items": []})
+    resumed.close()
+
+
+def test_unfinished_journal_is_not_overwritten(tmp_path):
+    path = tmp_path / "run.journal.jsonl"
+    journal = CheckpointJournal(path)
+    journal.record("a", 1)
+    journal.close()
+
+    with pytest.raises(FileExistsError):
+        CheckpointJournal(path)
+
+    fresh = CheckpointJournal(path, fresh=True)
+    assert len(fresh) == 0
+    fresh.close()
+    old = CheckpointJournal(tmp_path / "run.journal.jsonl.old", resume=True)
+    assert old.get("a") == (True, 1)
+    old.close()
+
+
+def test_discarded_journal_does_not_block_the_next_run(tmp_path):
+    path = tmp_path / "run.journal.jsonl"
+    journal = CheckpointJournal(path)
+    journal.record("a", 1)
+    journal.discard()
+    assert not path.exists()
+    CheckpointJournal(path).close()
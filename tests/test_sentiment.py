@@ -0,0 +1,68 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from sentiment import KeywordMatcher
+
+LEXICON_DIR = Path(__file__).resolve().parent.parent / "lexicons"
+
+
+def expected_counts(lexicons, text):
+    text = text.lower()
+    return {label: sum(1 for kw in keywords if kw.lower() in text) for label, keywords in lexicons.items()}
+
+
+def expected_matches(lexicons, text):
+    text = text.lower()
+    return {kw.lower() for keywords in lexicons.values() for kw in keywords if kw and kw.lower() in text}
+
+
+def shipped_lexicons():
+    params = []
+    for path in sorted(LEXICON_DIR.glob("*.json")):
+        with open(path, encoding="utf-8") as f:
+            for name, lexicon in json.load(f)["lexicons"].items():
+                params.append(pytest.param(lexicon, id=f"{path.stem}:{name}"))
+    return params
+
+
+@pytest.mark.parametrize("lexicons", shipped_lexicons())
+def test_matches_substring_search_on_shipped_lexicons(lexicons):
+    matcher = KeywordMatcher(lexicons)
+    keywords = [kw for words in lexicons.values() for kw in words]
+    rng = random.Random(0)
+    for _ in range(300):
+        text = "".join(rng.choice(keywords + ["，", " ", "的", "X"]) for _ in range(rng.randint(0, 6)))
+        assert matcher.counts(text) == expected_counts(lexicons, text)
+        assert matcher.matches(text) == expected_matches(lexicons, text)
+
+
+def test_overlapping_and_nested_keywords():
+    # "ab" ends where "bc" starts; "abc" contains both; "a" is listed twice
+    lexicons = {"x": ["ab", "bc", "a", "a"], "y": ["abc", "cd", "D"]}
+    matcher = KeywordMatcher(lexicons)
+    alphabet = "abcdD"
+    rng = random.Random(1)
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 8)))
+        assert matcher.counts(text) == expected_counts(lexicons, text), text
+        assert matcher.matches(text) == expected_matches(lexicons, text), text
+
+
+def test_mask_has_the_labels_with_a_match():
+    matcher = KeywordMatcher({"positive": ["好", "支持"], "negative": ["差"]})
+    bits = matcher.label_bits
+    assert matcher.mask("支持") == bits["positive"]
+    assert matcher.mask("好差") == bits["positive"] | bits["negative"]
+    assert matcher.mask("一般") == 0
+
+
+def test_state_round_trip():
+    lexicons = {"x": ["ab", "bc"], "y": ["abc"]}
+    matcher = KeywordMatcher(lexicons)
+    restored = KeywordMatcher.from_state(json.loads(json.dumps(matcher.state())))
+    assert restored.fingerprint == matcher.fingerprint
+    for text in ("abc", "xbcab", "", "ABC"):
+        assert restored.counts(text) == matcher.counts(text)
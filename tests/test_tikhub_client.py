@@ -0,0 +1,48 @@
+import pytest
+
+from tikhub_client import classify_response, endpoint_family, is_success, request_key
+
+
+@pytest.mark.parametrize("response, expected", [
+    ({"code": 200, "data": {}}, "ok"),
+    ({"data": {}}, "ok"),
+    (None, "ok"),
+    ({"code": 429, "message": "Too Many Requests"}, "throttled"),
+    ({"status_code": 429}, "throttled"),
+    ({"code": "429"}, "throttled"),
+    ({"error": "429 Client Error: Too Many Requests for url: https://api.tikhub.io/x"}, "throttled"),
+    ({"error": "Rate limit exceeded"}, "throttled"),
+    ({"code": 503}, "transient"),
+    ({"error": "503 Server Error: Service Unavailable"}, "transient"),
+    ({"error": "HTTP 502 Bad Gateway"}, "transient"),
+    ({"error": "status code: 500"}, "transient"),
+    ({"error": "Read timed out. (read timeout=30)"}, "transient"),
+    ({"error": "Connection aborted."}, "transient"),
+    ({"code": 400, "message": "bad request"}, "error"),
+    ({"code": 404}, "error"),
+    ({"code": 201}, "error"),
+    ({"error": "Invalid aweme_id 4291503"}, "error"),
+    ({"error": "found 500 items, expected 429"}, "error"),
+    ({"error": "401 Client Error: Unauthorized"}, "error"),
+])
+def test_classify_response(response, expected):
+    assert classify_response(response) == expected
+
+
+def test_is_success():
+    assert is_success({"code": 200, "data": []})
+    assert is_success({"data": []})
+    assert not is_success({"code": 500})
+    assert not is_success({"error": "boom"})
+    assert not is_success(None)
+
+
+def test_request_key_normalizes_params():
+    assert request_key("get", "/a", {"page": 1, "x": None}) == request_key("GET", "/a", {"page": "1"})
+    assert request_key("GET", "/a", {"page": 1}) != request_key("GET", "/a", {"page": 2})
+    assert request_key("GET", "/a", None) != request_key("POST", "/a", None)
+
+
+def test_endpoint_family():
+    assert endpoint_family("/api/v1/douyin/search/fetch_general_search_v2") == "douyin/search"
+    assert endpoint_family("/api/v1/xiaohongshu/web/search_notes_v3") == "xiaohongshu/web"
@@ -0,0 +1,694 @@
+#!/usr/bin/env python3
+"""
+TikHub API 客户端扩展
+TikHub API Client Extensions
+
+Wrappers that sit in front of TikHubAPIClient and keep its get/post interface,
+so the research scripts can use them as a drop-in client.
+"""
+
+import copy
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+
+# Default location of the on-disk response cache
+DEFAULT_CACHE_PATH = Path(__file__).parent / ".cache" / "tikhub_responses.sqlite3"
+
+# Default cache size cap (bytes of stored response JSON)
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Per-endpoint TTLs in seconds; the first pattern contained in the endpoint wins
+DEFAULT_TTLS: List[Tuple[str, int]] = [
+    ("comment", 7 * 24 * 3600),  # Comments change slowly once a post has aged
+    ("search", 3600),  # Search rankings move quickly
+]
+DEFAULT_TTL = 6 * 3600
+
+
+# Request budgets (requests/second) per endpoint family, i.e. the
+# "/api/v1/<platform>/<section>" prefix (Douyin-Search, Xiaohongshu-Web, ...)
+DEFAULT_BUDGETS: Dict[str, float] = {
+    "douyin/search": 5.0,
+    "douyin/web": 5.0,
+    "xiaohongshu/web": 3.0,
+    "xiaohongshu/web_v2": 3.0,
+    "weibo/web_v2": 3.0,
+    "bilibili/web": 5.0,
+    "zhihu/web": 5.0,
+}
+DEFAULT_BUDGET = 5.0
+
+# Retry policy for throttled (429) and transient (5xx, network) failures
+DEFAULT_MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+
+THROTTLE_CODES = {429}
+TRANSIENT_CODES = {500, 502, 503, 504}
+
+# An HTTP status in a client error message: "429 Client Error: ...", "HTTP 503", "status code: 500".
+# Bare numbers elsewhere in the message (ids, counts) are not statuses
+_ERROR_STATUS = re.compile(r"(?:^|\b(?:http|status|status_code|status code|code|error)\W{0,3})(\d{3})\b")
+
+
+def normalize_params(params: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Normalize request params so equivalent requests share a cache key.
+
+    Values are stringified ({"page": 1} and {"page": "1"} are the same request)
+    and None values are dropped.
+    """
+    if not params:
+        return {}
+    return {str(k): str(v) for k, v in params.items() if v is not None}
+
+
+def request_key(method: str, endpoint: str, params: Optional[Dict[str, Any]]) -> str:
+    """Build a stable key from method, endpoint and normalized params."""
+    payload = json.dumps(
+        [method.upper(), endpoint, normalize_params(params)],
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_success(response: Any) -> bool:
+    """Whether a response is worth keeping (no client error, no API error code)."""
+    if not isinstance(response, dict) or "error" in response:
+        return False
+    return response.get("code", 200) == 200
+
+
+def endpoint_family(endpoint: str) -> str:
+    """Map an endpoint to its family, e.g. /api/v1/douyin/search/... -> douyin/search."""
+    parts = endpoint.strip("/").split("/")
+    if len(parts) >= 4 and parts[0] == "api":
+        return f"{parts[2]}/{parts[3]}"
+    return "/".join(parts[:2])
+
+
+def classify_response(response: Any) -> str:
+    """
+    Classify a response for the retry policy.
+
+    Returns:
+        'throttled' (429 / rate limit), 'transient' (5xx, timeouts, connection
+        errors), 'error' (anything else that failed, including a non-200 code)
+        or 'ok'. Statuses come from the code field or an HTTP status in the
+        error message, never from other numbers in it
+    """
+    if not isinstance(response, dict):
+        return "ok"
+    code = response.get("code", response.get("status_code"))
+    error = str(response.get("error", "")).lower()
+    statuses = {int(status) for status in _ERROR_STATUS.findall(error.strip())}
+    if code is not None:
+        try:
+            statuses.add(int(code))
+        except (TypeError, ValueError):
+            pass
+
+    if statuses & THROTTLE_CODES or "too many requests" in error or "rate limit" in error:
+        return "throttled"
+    if (statuses & TRANSIENT_CODES
+            or "timeout" in error or "timed out" in error or "connection" in error):
+        return "transient"
+    if "error" in response or (code is not None and code != 200):
+        return "error"
+    return "ok"
+
+
+class ClientWrapper:
+    """Base for get/post wrappers around TikHubAPIClient (or another wrapper)."""
+
+    def __init__(self, client):
+        """Wrap a client exposing get/post."""
+        self.client = client
+
+    def summary(self) -> str:
+        """One-line summary of this layer's counters."""
+        return ""
+
+    def __getattr__(self, name):
+        # Anything else falls through to the wrapped client
+        return getattr(self.client, name)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket whose refill rate adapts to server throttling.
+
+    The rate is halved on every throttled response (down to min_rate) and
+    climbs back additively towards the configured rate on successes.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, min_rate: float = 0.2):
+        """
+        Initialize the bucket.
+
+        Args:
+            rate: Target requests per second
+            capacity: Burst size, defaults to one second's worth of requests
+            min_rate: Floor the adaptive rate never drops below
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def throttled(self):
+        """Back off after the server throttled a request."""
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+    def succeeded(self):
+        """Recover towards the configured rate after a successful request."""
+        with self._lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+class RateLimitedClient(ClientWrapper):
+    """
+    Drop-in TikHubAPIClient wrapper that paces requests per endpoint family.
+
+    Throttled and transient failures are retried with jittered exponential
+    backoff instead of being returned as {"error": ...} on the first attempt.
+    One instance is meant to be shared by all concurrent workers.
+    """
+
+    def __init__(self, client, budgets: Optional[Dict[str, float]] = None,
+                 default_budget: float = DEFAULT_BUDGET, max_retries: int = DEFAULT_MAX_RETRIES):
+        """
+        Initialize the wrapper.
+
+        Args:
+            client: TikHubAPIClient (or another wrapper with get/post)
+            budgets: Requests/second per endpoint family
+            default_budget: Requests/second for families not in budgets
+            max_retries: Retries per request before giving up
+        """
+        super().__init__(client)
+        self.budgets = DEFAULT_BUDGETS if budgets is None else budgets
+        self.default_budget = default_budget
+        self.max_retries = max_retries
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "transient": 0, "gave_up": 0}
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket_for(self, endpoint: str) -> TokenBucket:
+        """Return the (shared) token bucket for an endpoint's family."""
+        family = endpoint_family(endpoint)
+        with self._lock:
+            if family not in self._buckets:
+                self._buckets[family] = TokenBucket(self.budgets.get(family, self.default_budget))
+            return self._buckets[family]
+
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Rate-limited GET request with retries."""
+        return self._request(endpoint, params, self.client.get)
+
+    def post(self, endpoint: str, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Rate-limited POST request with retries."""
+        return self._request(endpoint, body, self.client.post)
+
+    def _request(self, endpoint: str, params: Optional[Dict[str, Any]], send) -> Dict[str, Any]:
+        bucket = self.bucket_for(endpoint)
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            with self._lock:
+                self.stats["requests"] += 1
+            try:
+                response = send(endpoint, params)
+            except Exception as e:
+                response = {"error": f"Request failed: {e}"}
+
+            outcome = classify_response(response)
+            if outcome == "throttled":
+                bucket.throttled()
+            elif outcome != "transient":
+                if outcome == "ok":
+                    bucket.succeeded()
+                return response
+
+            with self._lock:
+                self.stats[outcome] += 1
+                if attempt == self.max_retries:
+                    self.stats["gave_up"] += 1
+                    break
+                self.stats["retries"] += 1
+            # Full jitter: sleep a random fraction of the exponential backoff
+            time.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+        return response
+
+    def summary(self) -> str:
+        """One-line summary of limiter counters."""
+        stats = self.stats
+        rates = ", ".join(f"{family} {bucket.rate:.1f}/s" for family, bucket in sorted(self._buckets.items()))
+        return (f"限流: 请求 {stats['requests']}, 重试 {stats['retries']}, "
+                f"限流响应 {stats['throttled']}, 临时错误 {stats['transient']}, "
+                f"放弃 {stats['gave_up']} ({rates})")
+
+
+class _Flight:
+    """One in-flight request that later identical callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.response = None
+        self.exception = None
+
+
+class SingleFlightClient(ClientWrapper):
+    """
+    Drop-in TikHubAPIClient wrapper that merges identical in-flight requests.
+
+    While a request is in flight, identical requests (same method, endpoint
+    and normalized params) wait for it instead of making their own call. Each
+    waiter gets its own deep copy of the response, because callers annotate
+    responses in place.
+    """
+
+    def __init__(self, client):
+        """
+        Initialize the wrapper.
+
+        Args:
+            client: TikHubAPIClient (or another wrapper with get/post)
+        """
+        super().__init__(client)
+        self.stats = {"calls": 0, "coalesced": 0}
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GET request, shared with identical in-flight requests."""
+        return self._request("GET", endpoint, params, self.client.get)
+
+    def post(self, endpoint: str, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """POST request, shared with identical in-flight requests."""
+        return self._request("POST", endpoint, body, self.client.post)
+
+    def _request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]], send) -> Dict[str, Any]:
+        key = request_key(method, endpoint, params)
+        with self._lock:
+            self.stats["calls"] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.exception is not None:
+                raise flight.exception
+            return copy.deepcopy(flight.response)
+
+        try:
+            flight.response = send(endpoint, params)
+            return flight.response
+        except Exception as e:
+            flight.exception = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            # Copy for waiters before the leader's caller can mutate the response
+            if flight.waiters and flight.exception is None:
+                flight.response = copy.deepcopy(flight.response)
+            flight.done.set()
+
+    def summary(self) -> str:
+        """One-line summary of coalescing counters."""
+        return f"请求合并: 调用 {self.stats['calls']}, 合并节省 {self.stats['coalesced']} 次"
+
+
+class JournaledClient(ClientWrapper):
+    """
+    Drop-in TikHubAPIClient wrapper that checkpoints completed requests.
+
+    Every successful response is appended to a CheckpointJournal as it
+    arrives. Each request is one unit of work (a search page for one
+    platform and keyword, or one post's comment batch). When a run is
+    resumed, journaled units are replayed from disk instead of being
+    fetched again.
+    """
+
+    def __init__(self, client, journal):
+        """
+        Initialize the wrapper.
+
+        Args:
+            client: TikHubAPIClient (or another wrapper with get/post)
+            journal: run_state.CheckpointJournal to replay from and record to
+        """
+        super().__init__(client)
+        self.journal = journal
+
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GET request, replayed from the journal when already completed."""
+        return self._request("GET", endpoint, params, self.client.get)
+
+    def post(self, endpoint: str, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """POST request, replayed from the journal when already completed."""
+        return self._request("POST", endpoint, body, self.client.post)
+
+    def _request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]], send) -> Dict[str, Any]:
+        key = request_key(method, endpoint, params)
+        found, response = self.journal.get(key)
+        if found:
+            return response
+
+        response = send(endpoint, params)
+        if is_success(response):
+            self.journal.record(key, response, unit=[method, endpoint, normalize_params(params)])
+        return response
+
+    def summary(self) -> str:
+        """One-line summary of checkpoint counters."""
+        stats = self.journal.stats
+        return f"断点续采: 复用 {stats['replayed']} 个已完成单元, 新记录 {stats['recorded']} 个"
+
+
+class ResponseCache:
+    """
+    SQLite-backed response cache with per-endpoint TTLs and LRU eviction.
+
+    Entries are evicted least-recently-used first once the stored responses
+    exceed max_bytes. Safe to share between threads.
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+                 ttls: Optional[List[Tuple[str, int]]] = None, default_ttl: int = DEFAULT_TTL):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite database file, created if missing
+            max_bytes: Size cap for stored responses
+            ttls: (endpoint substring, seconds) pairs, first match wins
+            default_ttl: TTL for endpoints matching no pattern
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " method TEXT NOT NULL,"
+            " endpoint TEXT NOT NULL,"
+            " params TEXT NOT NULL,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+        self._conn.commit()
+        # Running total of stored bytes, so a put never scans the table
+        self._total = self._stored_bytes()
+
+    def ttl_for(self, endpoint: str) -> int:
+        """Return the TTL in seconds for an endpoint."""
+        for pattern, ttl in self.ttls:
+            if pattern in endpoint:
+                return ttl
+        return self.default_ttl
+
+    def get(self, method: str, endpoint: str, params: Optional[Dict[str, Any]],
+            ignore_ttl: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Args:
+            method: HTTP method
+            endpoint: API endpoint path
+            params: Query params or request body
+            ignore_ttl: Serve expired entries too (used for offline rebuilds)
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        key = request_key(method, endpoint, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            if not ignore_ttl and now - row[1] > self.ttl_for(endpoint):
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.stats["hits"] += 1
+        return json.loads(row[0])
+
+    def put(self, method: str, endpoint: str, params: Optional[Dict[str, Any]], response: Dict[str, Any]):
+        """Store a response and evict LRU entries beyond the size cap."""
+        key = request_key(method, endpoint, params)
+        payload = json.dumps(response, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            replaced = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, method.upper(), endpoint,
+                 json.dumps(normalize_params(params), sort_keys=True, ensure_ascii=False),
+                 payload, size, now, now)
+            )
+            self.stats["stores"] += 1
+            self._total += size - (replaced[0] if replaced else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _stored_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _evict(self):
+        """Drop least-recently-used entries until the cache fits max_bytes."""
+        # Recount first: another process may share the cache file
+        self._total = self._stored_bytes()
+        while self._total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access ASC LIMIT 64").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.stats["evictions"] += 1
+                self._total -= size
+                if self._total <= self.max_bytes:
+                    break
+
+    def size(self) -> Tuple[int, int]:
+        """Return (entry count, stored bytes)."""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return count, total
+
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def close(self):
+        """Close the underlying database."""
+        with self._lock:
+            self._conn.close()
+
+
+class CachedClient(ClientWrapper):
+    """
+    Drop-in TikHubAPIClient wrapper that serves repeated requests from a ResponseCache.
+
+    Only successful responses are cached. In cache-only mode the network is
+    never touched: expired entries are still served and misses come back as
+    {"error": ...}, like any other failed request.
+    """
+
+    def __init__(self, client, cache: ResponseCache, cache_only: bool = False):
+        """
+        Initialize the wrapper.
+
+        Args:
+            client: TikHubAPIClient (or another wrapper with get/post)
+            cache: Response cache to read from and write to
+            cache_only: Never hit the network, for rebuilding reports offline
+        """
+        super().__init__(client)
+        self.cache = cache
+        self.cache_only = cache_only
+
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GET request, served from cache when possible."""
+        return self._request("GET", endpoint, params, self.client.get)
+
+    def post(self, endpoint: str, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """POST request, served from cache when possible."""
+        return self._request("POST", endpoint, body, self.client.post)
+
+    def _request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]], send) -> Dict[str, Any]:
+        cached = self.cache.get(method, endpoint, params, ignore_ttl=self.cache_only)
+        if cached is not None:
+            return cached
+        if self.cache_only:
+            return {"error": f"Cache miss in cache-only mode: {method} {endpoint}"}
+
+        response = send(endpoint, params)
+        if is_success(response):
+            self.cache.put(method, endpoint, params, response)
+        return response
+
+    def summary(self) -> str:
+        """One-line summary of cache counters."""
+        stats = self.cache.stats
+        count, total = self.cache.size()
+        return (f"缓存: 命中 {stats['hits']} / 未命中 {stats['misses']} "
+                f"(命中率 {self.cache.hit_rate() * 100:.1f}%), "
+                f"过期 {stats['expired']}, 淘汰 {stats['evictions']}, "
+                f"{count} 条 / {total / 1024 / 1024:.1f} MB")
+
+
+class ArchivedClient(ClientWrapper):
+    """
+    Drop-in TikHubAPIClient wrapper that archives every successful raw response.
+
+    Sits directly on the API client, so each response actually fetched (and
+    only those: cache hits and journal replays never reach it) is stored in
+    a response_archive.ResponseArchive.
+    """
+
+    def __init__(self, client, archive):
+        """
+        Initialize the wrapper.
+
+        Args:
+            client: TikHubAPIClient
+            archive: response_archive.ResponseArchive to store responses in
+        """
+        super().__init__(client)
+        self.archive = archive
+
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GET request, archiving the response."""
+        return self._request("GET", endpoint, params, self.client.get)
+
+    def post(self, endpoint: str, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """POST request, archiving the response."""
+        return self._request("POST", endpoint, body, self.client.post)
+
+    def _request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]], send) -> Dict[str, Any]:
+        response = send(endpoint, params)
+        if is_success(response):
+            self.archive.put(method, endpoint, params, response)
+        return response
+
+    def summary(self) -> str:
+        """One-line summary of archive counters."""
+        stats = self.archive.stats
+        return (f"响应归档: 本次 {stats['fetches']} 次响应, 新内容块 {stats['blobs']}, "
+                f"重复 {stats['deduplicated']}, {stats['raw_bytes'] / 1024 / 1024:.1f} MB 原始数据 -> "
+                f"{stats['stored_bytes'] / 1024 / 1024:.1f} MB 新增存储")
+
+
+def build_client(client, cache: bool = True, cache_only: bool = False,
+                 cache_path: Path = DEFAULT_CACHE_PATH,
+                 cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+                 rate_limit: bool = True, budgets: Optional[Dict[str, float]] = None,
+                 single_flight: bool = True, journal=None, archive=None):
+    """
+    Wrap a TikHubAPIClient with the standard middleware stack.
+
+    Identical concurrent requests are merged before anything else, and cache
+    hits are answered before the rate limiter, so neither costs budget.
+    Responses are archived as they come off the API client.
+
+    Args:
+        client: The raw TikHubAPIClient
+        cache: Enable the on-disk response cache
+        cache_only: Serve only from the cache, never the network
+        cache_path: Response cache database file
+        cache_max_bytes: Response cache size cap
+        rate_limit: Pace requests per endpoint family and retry throttled ones
+        budgets: Requests/second per endpoint family, defaults to DEFAULT_BUDGETS
+        single_flight: Merge identical in-flight requests into one call
+        journal: run_state.CheckpointJournal to checkpoint completed requests to
+        archive: response_archive.ResponseArchive to store raw responses in
+
+    Returns:
+        A client with the same get/post interface
+    """
+    if archive is not None:
+        client = ArchivedClient(client, archive)
+    if rate_limit:
+        client = RateLimitedClient(client, budgets=budgets)
+    if cache or cache_only:
+        client = CachedClient(client, ResponseCache(cache_path, max_bytes=cache_max_bytes),
+                              cache_only=cache_only)
+    if journal is not None:
+        client = JournaledClient(client, journal)
+    if single_flight:
+        client = SingleFlightClient(client)
+    return client
+
+
+def client_summaries(client) -> List[str]:
+    """Summary lines of every wrapper in a client stack, outermost first."""
+    lines = []
+    while isinstance(client, ClientWrapper):
+        line = client.summary()
+        if line:
+            lines.append(line)
+        client = client.client
+    return lines
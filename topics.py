@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+话题分析
+Topic Analysis
+
+Per-text topic bitmasks from a topic lexicon, and counts and cross-tabs
+computed from them without rescanning any text; plus data-driven discovery
+of emergent topics (hashtags and cohesive character n-grams) that no
+lexicon lists yet.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from sentiment import KeywordMatcher, np
+
+
+def topic_masks(matcher: KeywordMatcher, texts: Sequence[str]):
+    """
+    Scan each text once and return one topic bitmask per text.
+
+    Bit i of a mask is set when the text mentions topic matcher.labels[i].
+    The masks are a NumPy uint64 array when NumPy is installed (and there are
+    at most 64 topics), and a list of ints otherwise.
+    """
+    masks = [matcher.mask(text) for text in texts]
+    if np is not None and len(matcher.labels) <= 64:
+        return np.array(masks, dtype=np.uint64)
+    return masks
+
+
+def mask_labels(mask: int, labels: Sequence[str]) -> List[str]:
+    """Topics set in one bitmask."""
+    mask = int(mask)
+    return [label for i, label in enumerate(labels) if mask >> i & 1]
+
+
+def _topic_rows(masks, labels: Sequence[str]):
+    """(label, boolean row selector) per topic."""
+    if np is not None and isinstance(masks, np.ndarray):
+        for i, label in enumerate(labels):
+            yield label, (masks >> np.uint64(i)) & np.uint64(1) == 1
+    else:
+        for i, label in enumerate(labels):
+            yield label, [bool(int(mask) >> i & 1) for mask in masks]
+
+
+def topic_counts(masks, labels: Sequence[str]) -> Dict[str, int]:
+    """Number of texts mentioning each topic, in label order."""
+    return {label: int(sum(rows)) for label, rows in _topic_rows(masks, labels)}
+
+
+def topic_crosstab(masks, labels: Sequence[str], sentiments: Sequence[str],
+                   groups: Optional[Sequence[Hashable]] = None) -> Dict[Any, Dict[str, Dict[str, int]]]:
+    """
+    Slice topics by sentiment (and optionally a group such as the platform).
+
+    Args:
+        masks: Topic bitmasks, one per text (see topic_masks)
+        labels: Topic names, in bit order
+        sentiments: Sentiment label per text
+        groups: Optional group key per text
+
+    Returns:
+        {topic: {sentiment: count}}, or {group: {topic: {sentiment: count}}}
+        when groups are given; topics no text mentions are left out
+    """
+    if len(sentiments) != len(masks) or (groups is not None and len(groups) != len(masks)):
+        raise ValueError("masks, sentiments and groups must have the same length")
+
+    group_keys = list(dict.fromkeys(groups)) if groups is not None else [None]
+    result: Dict[Any, Dict[str, Dict[str, int]]] = {group: {} for group in group_keys}
+
+    if np is not None and isinstance(masks, np.ndarray):
+        sentiment_names = list(dict.fromkeys(sentiments))
+        sentiment_index = {name: i for i, name in enumerate(sentiment_names)}
+        codes = np.fromiter(map(sentiment_index.__getitem__, sentiments), dtype=np.int64, count=len(sentiments))
+        if groups is not None:
+            group_index = {group: i for i, group in enumerate(group_keys)}
+            codes = codes + len(sentiment_names) * np.fromiter(
+                map(group_index.__getitem__, groups), dtype=np.int64, count=len(groups))
+        size = len(group_keys) * len(sentiment_names)
+        for label, rows in _topic_rows(masks, labels):
+            cells = np.bincount(codes[rows], minlength=size)
+            for cell in np.flatnonzero(cells).tolist():
+                group, sentiment = divmod(cell, len(sentiment_names))
+                result[group_keys[group]].setdefault(label, {})[sentiment_names[sentiment]] = int(cells[cell])
+    else:
+        grouped = groups if groups is not None else [None] * len(masks)
+        for label, rows in _topic_rows(masks, labels):
+            for selected, sentiment, group in zip(rows, sentiments, grouped):
+                if selected:
+                    counts = result[group].setdefault(label, {})
+                    counts[sentiment] = counts.get(sentiment, 0) + 1
+
+    return result if groups is not None else result[None]
+
+
+# Topic discovery: n-gram lengths, minimum document frequency and cohesion
+DISCOVERY_NGRAMS = (2, 4)
+DISCOVERY_MIN_DF = 3
+DISCOVERY_MIN_SHARE = 0.0005
+DISCOVERY_MIN_PMI = 2.0
+
+# A longer phrase absorbs a shorter one it contains when it covers this share of its documents
+SUBSUMPTION_RATIO = 0.7
+
+# "#小米汽车" (Douyin, Xiaohongshu) and "#小米SU7事故#" (Weibo)
+_HASHTAG = re.compile(r"#([^#\s@]{1,30})")
+
+
+def hashtag_counts(texts: Iterable[str], top_n: Optional[int] = None) -> List[Tuple[str, int]]:
+    """
+    Hashtags by the number of texts using them, most used first.
+
+    Args:
+        texts: Titles, descriptions or comments
+        top_n: Keep the top_n most used (None keeps all)
+    """
+    counts = Counter()
+    for text in texts:
+        if text and "#" in text:
+            counts.update(set(_HASHTAG.findall(text.lower())))
+    return counts.most_common(top_n)
+
+
+def _sorted_unique(values):
+    """np.unique of a 1-D integer array by sorting (its default can take a much slower hashing path)."""
+    values = np.sort(values)
+    if not len(values):
+        return values
+    keep = np.empty(len(values), dtype=bool)
+    keep[0] = True
+    np.not_equal(values[1:], values[:-1], out=keep[1:])
+    return values[keep]
+
+
+def _ngram_df_numpy(texts: Sequence[str], max_n: int, min_df: int) -> Dict[str, int]:
+    """
+    Document frequency of every n-gram (1..max_n) with df >= min_df.
+
+    The texts are decoded into one array of character ids; n-grams become
+    integers in base (alphabet size + 1) and the sparse document x n-gram
+    matrix is built as its sorted unique (n-gram, document) cells, so
+    counting never loops over characters in Python.
+    """
+    joined = "\0".join(text.replace("\0", " ").lower() for text in texts) + "\0"
+    # surrogatepass: API text can hold lone surrogates (emoji cut in half), which are not word characters
+    codes = np.frombuffer(joined.encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32)
+    # Dense ids 1..len(alphabet), in code point order
+    alphabet, inverse = np.unique(codes, return_inverse=True)
+    ids = inverse.reshape(-1).astype(np.int64) + 1
+    chars = [chr(code) for code in alphabet.tolist()]
+    base = len(chars) + 1
+    # n-gram keys must fit in int64
+    max_n = min(max_n, int(62 / math.log2(base)))
+    is_word = np.array([False] + [ch.isalnum() for ch in chars], dtype=bool)[ids]
+    docs = np.cumsum(codes == 0) - (codes == 0)
+    n_docs = len(texts)
+
+    df: Dict[str, int] = {}
+    keys = np.zeros(len(ids), dtype=np.int64)
+    valid = np.ones(len(ids), dtype=bool)
+    for n in range(1, max_n + 1):
+        count = len(ids) - n + 1
+        if count <= 0:
+            break
+        # Key and validity of ids[i:i + n], extended by one character per round;
+        # separators are not word characters, so no valid n-gram spans two texts
+        keys = keys[:count] * base + ids[n - 1:n - 1 + count]
+        valid = valid[:count] & is_word[n - 1:n - 1 + count]
+        unique, inverse, occurrences = np.unique(keys[valid], return_inverse=True, return_counts=True)
+        # df <= occurrences, so only n-grams occurring min_df times can qualify
+        frequent = occurrences >= min_df
+        selected = frequent[inverse]
+        cells = _sorted_unique(inverse[selected] * n_docs + docs[:count][valid][selected])
+        doc_freq = np.bincount(cells // n_docs, minlength=len(unique))
+        for index in np.flatnonzero(doc_freq >= min_df).tolist():
+            key = int(unique[index])
+            gram = []
+            while key:
+                key, digit = divmod(key, base)
+                gram.append(chars[digit - 1])
+            df["".join(reversed(gram))] = int(doc_freq[index])
+    return df
+
+
+def _ngram_df_python(texts: Sequence[str], max_n: int, min_df: int) -> Dict[str, int]:
+    """Document frequency of every n-gram (1..max_n) with df >= min_df, without NumPy."""
+    counts = Counter()
+    for text in texts:
+        grams = set()
+        for run in re.findall(r"[^\W_]+", text.lower()):
+            for n in range(1, max_n + 1):
+                grams.update(run[i:i + n] for i in range(len(run) - n + 1))
+        counts.update(grams)
+    return {gram: n for gram, n in counts.items() if n >= min_df}
+
+
+def emergent_phrases(texts: Sequence[str], top_n: int = 10, ngram_range: Tuple[int, int] = DISCOVERY_NGRAMS,
+                     min_df: int = DISCOVERY_MIN_DF, min_share: float = DISCOVERY_MIN_SHARE,
+                     min_pmi: float = DISCOVERY_MIN_PMI, exclude: Iterable[str] = ()) -> List[Tuple[str, int]]:
+    """
+    Cohesive character n-grams that many texts share, e.g. "交付延期" or "自动泊车".
+
+    An n-gram qualifies when enough texts contain it and its weakest split is
+    still cohesive: the pointwise mutual information of the two sides, over
+    document frequencies, is at least min_pmi. An n-gram extending a
+    qualifying phrase by one character also qualifies when it covers most of
+    the phrase's texts ("高速领" -> "高速领航", where the common "航" lowers
+    the cohesion of the last split), and a phrase is dropped in favour of a
+    longer qualifying phrase that covers most of its texts.
+
+    Args:
+        texts: Titles, descriptions or comments
+        top_n: Phrases returned
+        ngram_range: Shortest and longest phrase, in characters
+        min_df: Minimum number of texts containing a phrase
+        min_share: Minimum share of the texts containing a phrase (raises min_df on large corpora)
+        min_pmi: Minimum cohesion (natural log)
+        exclude: Terms that are not news, e.g. the search keywords; phrases
+            contained in one of them are skipped
+
+    Returns:
+        (phrase, number of texts) pairs, most frequent first
+    """
+    texts = [text for text in texts if text]
+    if not texts:
+        return []
+    min_df = max(min_df, math.ceil(min_share * len(texts)))
+    if np is not None:
+        df = _ngram_df_numpy(texts, ngram_range[1], min_df)
+    else:
+        df = _ngram_df_python(texts, ngram_range[1], min_df)
+    n_docs = len(texts)
+    excluded = [term.lower() for term in exclude if term]
+
+    scored = {}
+    for gram, freq in df.items():
+        if len(gram) < ngram_range[0] or any(gram in term for term in excluded):
+            continue
+        # Every part of a frequent n-gram is at least as frequent, so it is in df
+        cohesion = min(math.log(n_docs * freq / (df[gram[:i]] * df[gram[i:]])) for i in range(1, len(gram)))
+        if cohesion >= min_pmi:
+            scored[gram] = cohesion
+
+    # Shortest first, so an extension can itself be extended
+    for gram in sorted(df, key=len):
+        if gram in scored or not ngram_range[0] < len(gram) or any(gram in term for term in excluded):
+            continue
+        for part in (gram[:-1], gram[1:]):
+            if part in scored and df[gram] >= SUBSUMPTION_RATIO * df[part]:
+                scored[gram] = scored[part]
+                break
+
+    # Longest first, so a phrase is checked against the phrases that contain it
+    absorbed = set()
+    for gram in sorted(scored, key=len, reverse=True):
+        if gram in absorbed:
+            continue
+        for n in range(ngram_range[0], len(gram)):
+            for i in range(len(gram) - n + 1):
+                part = gram[i:i + n]
+                if part in scored and df[gram] >= SUBSUMPTION_RATIO * df[part]:
+                    absorbed.add(part)
+
+    ranked = sorted((gram for gram in scored if gram not in absorbed),
+                    key=lambda gram: (-df[gram], -scored[gram], gram))
+    return [(gram, df[gram]) for gram in ranked[:top_n]]
+
+
+def discover_topics(texts: Sequence[str], top_n: int = 10, exclude: Iterable[str] = ()) -> Dict[str, List[Tuple[str, int]]]:
+    """
+    Emergent topics of a corpus: its most used hashtags and most shared phrases.
+
+    Args:
+        texts: Titles, descriptions and comments
+        top_n: Topics returned of each kind
+        exclude: Terms that are not news, e.g. the search keywords
+
+    Returns:
+        {"hashtags": [(tag, count), ...], "phrases": [(phrase, count), ...]}
+    """
+    excluded = [term.lower() for term in exclude if term]
+    hashtags = [(tag, n) for tag, n in hashtag_counts(texts)
+                if not any(tag in term for term in excluded)][:top_n]
+    return {
+        "hashtags": hashtags,
+        "phrases": emergent_phrases(texts, top_n=top_n, exclude=exclude)
+    }
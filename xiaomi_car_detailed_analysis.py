@@ -6,14 +6,42 @@ Xiaomi Car Accident Sentiment Deep Analysis Script
 Collects detailed data including comments from top content.
 """
 
+import argparse
 import json
+import math
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
 # Import TikHub API client
 sys.path.insert(0, str(Path(__file__).parent / '.claude' / 'skills' / 'tikhub-api-helper'))
 from api_client import TikHubAPIClient
+from tikhub_client import build_client, client_summaries, DEFAULT_CACHE_MAX_BYTES
+from sentiment import (ClassificationMemo, classify_sentiment, engagement_count, np, score_batch,
+                       sentiment_distribution)
+from lexicon_registry import LexiconRegistry
+from topics import topic_counts, topic_crosstab, topic_masks
+from research_store import ResearchStore
+from response_archive import DEFAULT_ARCHIVE_PATH, ReplayClient, ResponseArchive, parse_time
+from records import DouyinComment, XiaohongshuComment, to_dicts
+
+
+# Comment sentiment and topic lexicons, see lexicons/xiaomi_car.json
+LEXICON_NAME = "xiaomi_car"
+
+# Comment sections repeat the same short replies; main() memoizes results across runs
+MEMO_PATH = Path(__file__).parent / ".cache" / "classification_memo.json"
+LEXICONS = LexiconRegistry(memo=ClassificationMemo())
+
+# Research database filled by xiaomi_car_research.py, see research_store.py
+STORE_PATH = Path("D:/social_research") / "research.db"
+
+# Videos / notes per platform whose comments are analyzed
+TOP_N = 5
+
+# Max comments per work unit with --workers; the pooled comments are split evenly across the workers
+ANALYSIS_CHUNK_SIZE = 5000
 
 
 def load_research_data():
@@ -31,6 +59,54 @@ def load_research_data():
         return json.load(f)
 
 
+def select_top_content(store: ResearchStore = None, n: int = TOP_N, all_runs: bool = False,
+                       since: int = None):
+    """
+    Most-liked videos and notes whose comments are analyzed.
+
+    Queried from the research database when it holds a finished collection
+    run, otherwise taken from the latest JSON dataset.
+
+    Args:
+        store: Research database, if any
+        n: Items per platform
+        all_runs: Rank everything collected so far instead of the latest run
+        since: Only content created at or after this timestamp
+
+    Returns:
+        (top Douyin videos, top Xiaohongshu notes), or None without data
+    """
+    run_id = store.latest_run("xiaomi_car_research") if store is not None else None
+    if run_id is not None:
+        print(f"Loading data from: {store.path} ({'all runs' if all_runs else f'run {run_id}'})")
+        scope = None if all_runs else run_id
+        return (store.top_posts("douyin", n, run_id=scope, since=since),
+                store.top_posts("xiaohongshu", n, run_id=scope, since=since))
+
+    data = load_research_data()
+    if not data:
+        return None
+    # Older data files may repeat items across keywords
+    return (sorted(unique_by(data["douyin"], "aweme_id"),
+                   key=lambda x: x["statistics"]["like_count"], reverse=True)[:n],
+            sorted(unique_by(data["xiaohongshu"], "note_id"),
+                   key=lambda x: x["statistics"]["like_count"], reverse=True)[:n])
+
+
+def unique_by(items: list, id_field: str) -> list:
+    """Drop repeated items (same content id found under several keywords), keeping the first."""
+    seen = set()
+    unique = []
+    for item in items:
+        content_id = item.get(id_field)
+        if content_id:
+            if content_id in seen:
+                continue
+            seen.add(content_id)
+        unique.append(item)
+    return unique
+
+
 def get_douyin_comments(client, aweme_id: str, count: int = 20):
     """Get comments for a Douyin video."""
     result = client.get(
@@ -49,16 +125,7 @@ def get_douyin_comments(client, aweme_id: str, count: int = 20):
 
     if "comments" in data and isinstance(data["comments"], list):
         for comment in data["comments"]:
-            comments.append({
-                "cid": comment.get("cid", ""),
-                "text": comment.get("text", ""),
-                "like_count": comment.get("digg_count", 0),
-                "reply_count": comment.get("reply_comment_total", 0),
-                "user": {
-                    "uid": comment.get("user", {}).get("uid", ""),
-                    "nickname": comment.get("user", {}).get("nickname", "")
-                }
-            })
+            comments.append(DouyinComment.from_api(comment))
 
     return comments
 
@@ -80,307 +147,462 @@ def get_xiaohongshu_comments(client, note_id: str):
 
     if "comments" in data and isinstance(data["comments"], list):
         for comment in data["comments"]:
-            comments.append({
-                "id": comment.get("id", ""),
-                "content": comment.get("content", ""),
-                "like_count": comment.get("like_count", 0),
-                "sub_comment_count": comment.get("sub_comment_count", 0),
-                "user": {
-                    "user_id": comment.get("user", {}).get("user_id", ""),
-                    "nickname": comment.get("user", {}).get("nickname", "")
-                }
-            })
+            comments.append(XiaohongshuComment.from_api(comment))
 
     return comments
 
 
 def analyze_comment_sentiment(text: str) -> str:
     """Analyze sentiment of a comment."""
-    negative_keywords = [
-        "事故", "车祸", "死", "伤", "危险", "问题", "缺陷", "怕", "担心",
-        "失控", "碰撞", "追尾", "起火", "刹车", "失灵", "安全隐患", "不敢",
-        "怕", "不安全", "质量差", "垃圾", "烂", "后悔", "退订"
-    ]
-
-    positive_keywords = [
-        "安全", "好", "优秀", "可靠", "信任", "喜欢", "推荐", "不错",
-        "稳定", "放心", "体验好", "质量好", "强", "牛", "厉害", "买",
-        "支持", "加油", "给力", "赞", "想买"
-    ]
-
-    text_lower = text.lower()
-
-    negative_count = sum(1 for kw in negative_keywords if kw in text_lower)
-    positive_count = sum(1 for kw in positive_keywords if kw in text_lower)
-
-    if negative_count > positive_count:
-        return "negative"
-    elif positive_count > negative_count:
-        return "positive"
-    else:
-        return "neutral"
+    return classify_sentiment(LEXICONS.matcher(LEXICON_NAME, "comment_sentiment"), text,
+                              model=LEXICONS.model(LEXICON_NAME, "comment_sentiment"))
 
 
-def extract_key_topics(comments: list) -> dict:
-    """Extract key topics from comments."""
-    topics = {
-        "智驾问题": 0,
-        "刹车问题": 0,
-        "质量担忧": 0,
-        "支持品牌": 0,
-        "观望态度": 0,
-        "使用体验": 0,
-        "事故责任": 0
-    }
-
-    topic_keywords = {
-        "智驾问题": ["智驾", "自动驾驶", "辅助驾驶", "自动", "系统"],
-        "刹车问题": ["刹车", "制动", "停不", "反应"],
-        "质量担忧": ["质量", "安全", "怕", "担心", "隐患"],
-        "支持品牌": ["支持", "加油", "信任", "相信", "国产", "雷军"],
-        "观望态度": ["观望", "再看看", "等等", "不急", "考虑"],
-        "使用体验": ["好用", "不错", "体验", "驾驶", "舒适"],
-        "事故责任": ["责任", "全责", "对方", "保险", "赔偿"]
-    }
-
-    for comment in comments:
-        text = comment.get("text", "") or comment.get("content", "")
-        for topic, keywords in topic_keywords.items():
-            if any(kw in text for kw in keywords):
-                topics[topic] += 1
-
-    return topics
+def score_comments(comments: list, text_field: str) -> tuple:
+    """
+    Score a video's or note's comments in one batch.
 
+    Returns:
+        (sentiment counts, like-weighted sentiment totals)
+    """
+    sentiment_counts, like_weighted, _ = _score_texts(
+        [getattr(comment, text_field) for comment in comments],
+        [engagement_count(comment.like_count) for comment in comments])
+    return sentiment_counts, like_weighted
 
-def main():
-    """Main execution function."""
-    # Load research data
-    data = load_research_data()
-    if not data:
-        return
 
-    client = TikHubAPIClient(use_china_domain=True)
+def _score_texts(texts: list, likes: list) -> tuple:
+    batch = score_batch(LEXICONS.matcher(LEXICON_NAME, "comment_sentiment"), texts, weights=likes,
+                        model=LEXICONS.model(LEXICON_NAME, "comment_sentiment"))
+    sentiment_counts = {"positive": 0, "negative": 0, "neutral": 0}
+    sentiment_counts.update(batch.distribution())
+    like_weighted = {"positive": 0.0, "negative": 0.0, "neutral": 0.0}
+    like_weighted.update(batch.distribution(weighted=True))
+    return sentiment_counts, like_weighted, batch.labels
 
-    print("\n" + "=" * 80)
-    print("开始收集评论数据...")
-    print("=" * 80)
 
-    # Get top 5 videos from each platform
-    top_douyin = sorted(data["douyin"], key=lambda x: x["statistics"]["like_count"], reverse=True)[:5]
-    top_xiaohongshu = sorted(data["xiaohongshu"], key=lambda x: x["statistics"]["like_count"], reverse=True)[:5]
-
-    # Collect comments from Douyin
-    print("\n【抖音热门视频评论分析】")
-    douyin_comments_data = []
-    for i, video in enumerate(top_douyin, 1):
-        print(f"\n[{i}] {video['title'][:50]}...")
-        print(f"    视频ID: {video['aweme_id']}")
+def extract_key_topics(comments: list) -> dict:
+    """Extract key topics from comments."""
+    masks = comment_topic_masks([comment.text for comment in comments])
+    return topic_counts(masks, topic_labels())
+
+
+def topic_labels() -> list:
+    """Topic names, in the bit order of comment_topic_masks."""
+    return LEXICONS.matcher(LEXICON_NAME, "comment_topics").labels
+
+
+def comment_topic_masks(texts: list):
+    """One topic bitmask per comment text, from a single scan of each text."""
+    return topic_masks(LEXICONS.matcher(LEXICON_NAME, "comment_topics"), texts)
+
+
+def _analyze_chunk(texts: list) -> tuple:
+    """Worker-process side of analyze_comment_sets: classify one chunk of texts."""
+    batch = score_batch(LEXICONS.matcher(LEXICON_NAME, "comment_sentiment"), texts,
+                        model=LEXICONS.model(LEXICON_NAME, "comment_sentiment"))
+    return batch.labels, comment_topic_masks(texts)
+
+
+def _concat_masks(parts: list):
+    """Join topic mask arrays (or lists, without NumPy) in order."""
+    if len(parts) == 1:
+        return parts[0]
+    if np is not None and parts and not isinstance(parts[0], list):
+        return np.concatenate(parts)
+    return [mask for part in parts for mask in part]
+
+
+def analyze_comment_sets(comment_sets: list, pool: ProcessPoolExecutor = None, workers: int = 1,
+                         chunk_size: int = ANALYSIS_CHUNK_SIZE) -> list:
+    """
+    Sentiment and topic analysis of the comments of many videos and notes.
+
+    The comments of all sets are classified as one pooled batch. With a
+    process pool it is split evenly across the workers (at most chunk_size
+    comments per work unit), since a single post has only a few dozen
+    comments; only the texts are shipped to the workers. The per-comment
+    results are then split back per set.
+
+    Args:
+        comment_sets: (comments, text_field) per video or note, where comments
+            are DouyinComment or XiaohongshuComment and text_field the
+            attribute holding the text ("text" or "content")
+        pool: Worker processes, or None to analyze in-process
+        workers: Size of the pool
+        chunk_size: Max comments per work unit
+
+    Returns:
+        One dict per set with sentiment_distribution, like_weighted_sentiment
+        and key_topics, plus per-comment sentiments and topic_masks
+    """
+    texts = [getattr(comment, text_field) for comments, text_field in comment_sets for comment in comments]
+    if pool is not None:
+        chunk_size = max(1, min(chunk_size, math.ceil(len(texts) / workers)))
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+
+    if pool is None or len(chunks) <= 1:
+        parts = map(_analyze_chunk, chunks)
+    else:
+        parts = pool.map(_analyze_chunk, chunks)
+
+    sentiments = []
+    masks = []
+    for part_sentiments, part_masks in parts:
+        sentiments.extend(part_sentiments)
+        masks.append(part_masks)
+    masks = _concat_masks(masks)
+
+    analyses = []
+    start = 0
+    for comments, _ in comment_sets:
+        end = start + len(comments)
+        likes = [engagement_count(comment.like_count) for comment in comments]
+        sentiment_counts = {"positive": 0, "negative": 0, "neutral": 0}
+        sentiment_counts.update(sentiment_distribution(sentiments[start:end]))
+        like_weighted = {"positive": 0.0, "negative": 0.0, "neutral": 0.0}
+        like_weighted.update(sentiment_distribution(sentiments[start:end], weights=likes))
+        analyses.append({
+            "sentiment_distribution": sentiment_counts,
+            "like_weighted_sentiment": like_weighted,
+            "key_topics": topic_counts(masks[start:end], topic_labels()),
+            "sentiments": sentiments[start:end],
+            "topic_masks": masks[start:end]
+        })
+        start = end
+    return analyses
+
+
+def analyze_comments(comments: list, text_field: str, pool: ProcessPoolExecutor = None, workers: int = 1,
+                     chunk_size: int = ANALYSIS_CHUNK_SIZE) -> dict:
+    """Sentiment and topic analysis of one video's or note's comments; see analyze_comment_sets."""
+    return analyze_comment_sets([(comments, text_field)], pool, workers, chunk_size)[0]
 
-        comments = get_douyin_comments(client, video['aweme_id'], count=50)
-        print(f"    获取到 {len(comments)} 条评论")
 
-        if comments:
-            # Analyze comment sentiment
-            sentiment_counts = {"positive": 0, "negative": 0, "neutral": 0}
-            for comment in comments:
-                sentiment = analyze_comment_sentiment(comment.get("text", ""))
-                sentiment_counts[sentiment] += 1
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="小米汽车交通事故舆情深度分析")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always fetch from the API, bypassing the response cache")
+    parser.add_argument("--cache-only", action="store_true",
+                        help="use cached responses only, never touch the network")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+                        help="response cache size cap in MB")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="analyze the comments on this many worker processes")
+    parser.add_argument("--chunk-size", type=int, default=ANALYSIS_CHUNK_SIZE,
+                        help="max comments per work unit with --workers")
+    parser.add_argument("--all-runs", action="store_true",
+                        help="pick the top content from every run in the research database, "
+                             "not just the latest (an incremental run only holds what it fetched)")
+    parser.add_argument("--since", default=None, metavar="YYYY-MM-DD",
+                        help="only pick content created on or after this date (research database only)")
+    parser.add_argument("--archive-responses", nargs="?", const=str(DEFAULT_ARCHIVE_PATH), metavar="DIR",
+                        help="store every raw API response in a compressed, content-addressed archive")
+    parser.add_argument("--replay", nargs="?", const=str(DEFAULT_ARCHIVE_PATH), metavar="DIR",
+                        help="re-run the comment analysis from an archive of raw responses instead of the API")
+    parser.add_argument("--as-of", metavar="TIME",
+                        help="with --replay, replay the archive as of YYYY-MM-DD[ HH:MM[:SS]]")
+    args = parser.parse_args()
 
-            # Extract topics
-            topics = extract_key_topics(comments)
+    # Load research data
+    store = ResearchStore(STORE_PATH) if STORE_PATH.exists() else None
+    since = int(datetime.strptime(args.since, "%Y-%m-%d").timestamp()) if args.since else None
+    archive = ResponseArchive(args.archive_responses) if args.archive_responses else None
+    replay = ReplayClient(ResponseArchive(args.replay), as_of=parse_time(args.as_of)) if args.replay else None
+    pool = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    try:
+        top = select_top_content(store, TOP_N, all_runs=args.all_runs, since=since)
+        if not top:
+            return
+        top_douyin, top_xiaohongshu = top
+        run_id = store.begin_run("xiaomi_car_detailed_analysis") if store is not None else None
+
+        client = build_client(
+            replay or TikHubAPIClient(use_china_domain=True),
+            cache=not args.no_cache and replay is None,
+            cache_only=args.cache_only and replay is None,
+            cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+            rate_limit=replay is None,
+            archive=archive
+        )
+        LEXICONS.memo = ClassificationMemo(path=MEMO_PATH)
+
+        print("\n" + "=" * 80)
+        print("开始收集评论数据...")
+        print("=" * 80)
+
+        # Fetch the comments of every top video and note first, so they are analyzed as one pooled set
+        print("\n【抖音热门视频评论】")
+        douyin_fetched = []
+        for i, video in enumerate(top_douyin, 1):
+            print(f"\n[{i}] {video['title'][:50]}...")
+            print(f"    视频ID: {video['aweme_id']}")
+
+            comments = get_douyin_comments(client, video['aweme_id'], count=50)
+            print(f"    获取到 {len(comments)} 条评论")
+            if comments:
+                douyin_fetched.append((video, comments))
+
+        print("\n\n【小红书热门笔记评论】")
+        xiaohongshu_fetched = []
+        for i, note in enumerate(top_xiaohongshu, 1):
+            print(f"\n[{i}] {note['title'][:50]}...")
+            print(f"    笔记ID: {note['note_id']}")
+
+            comments = get_xiaohongshu_comments(client, note['note_id'])
+            print(f"    获取到 {len(comments)} 条评论")
+            if comments:
+                xiaohongshu_fetched.append((note, comments))
+
+        # Analyze comment sentiment and extract topics
+        analyses = analyze_comment_sets(
+            [(comments, "text") for _, comments in douyin_fetched]
+            + [(comments, "content") for _, comments in xiaohongshu_fetched],
+            pool, args.workers, args.chunk_size)
+
+        # (platform, per-comment sentiments, per-comment topic masks) per analyzed video/note
+        topic_index = []
+
+        print("\n【抖音热门视频评论分析】")
+        douyin_comments_data = []
+        for i, ((video, comments), analysis) in enumerate(zip(douyin_fetched, analyses[:len(douyin_fetched)]), 1):
+            sentiment_counts = analysis["sentiment_distribution"]
+            topics = analysis["key_topics"]
+            topic_index.append(("douyin", analysis["sentiments"], analysis["topic_masks"]))
+            if store is not None:
+                store.add_comments("douyin", video['aweme_id'], to_dicts(comments), analysis["sentiments"], run_id)
 
             douyin_comments_data.append({
                 "video_title": video['title'],
                 "video_id": video['aweme_id'],
-                "comments": comments[:20],  # Store top 20 comments
+                "comments": to_dicts(comments[:20]),  # Store top 20 comments
                 "sentiment_distribution": sentiment_counts,
+                "like_weighted_sentiment": analysis["like_weighted_sentiment"],
                 "key_topics": topics,
                 "total_comments": len(comments)
             })
 
+            print(f"\n[{i}] {video['title'][:50]}...")
             print(f"    情绪分布: 正面{sentiment_counts['positive']} 中性{sentiment_counts['neutral']} 负面{sentiment_counts['negative']}")
             print(f"    主要话题: {', '.join([k for k, v in topics.items() if v > 0][:5])}")
 
-    # Collect comments from Xiaohongshu
-    print("\n\n【小红书热门笔记评论分析】")
-    xiaohongshu_comments_data = []
-    for i, note in enumerate(top_xiaohongshu, 1):
-        print(f"\n[{i}] {note['title'][:50]}...")
-        print(f"    笔记ID: {note['note_id']}")
-
-        comments = get_xiaohongshu_comments(client, note['note_id'])
-        print(f"    获取到 {len(comments)} 条评论")
-
-        if comments:
-            # Analyze comment sentiment
-            sentiment_counts = {"positive": 0, "negative": 0, "neutral": 0}
-            for comment in comments:
-                sentiment = analyze_comment_sentiment(comment.get("content", ""))
-                sentiment_counts[sentiment] += 1
-
-            # Extract topics
-            topics = extract_key_topics(comments)
+        print("\n\n【小红书热门笔记评论分析】")
+        xiaohongshu_comments_data = []
+        for i, ((note, comments), analysis) in enumerate(zip(xiaohongshu_fetched, analyses[len(douyin_fetched):]), 1):
+            sentiment_counts = analysis["sentiment_distribution"]
+            topics = analysis["key_topics"]
+            topic_index.append(("xiaohongshu", analysis["sentiments"], analysis["topic_masks"]))
+            if store is not None:
+                store.add_comments("xiaohongshu", note['note_id'], to_dicts(comments), analysis["sentiments"],
+                                   run_id)
 
             xiaohongshu_comments_data.append({
                 "note_title": note['title'],
                 "note_id": note['note_id'],
-                "comments": comments[:20],  # Store top 20 comments
+                "comments": to_dicts(comments[:20]),  # Store top 20 comments
                 "sentiment_distribution": sentiment_counts,
+                "like_weighted_sentiment": analysis["like_weighted_sentiment"],
                 "key_topics": topics,
                 "total_comments": len(comments)
             })
 
+            print(f"\n[{i}] {note['title'][:50]}...")
             print(f"    情绪分布: 正面{sentiment_counts['positive']} 中性{sentiment_counts['neutral']} 负面{sentiment_counts['negative']}")
             print(f"    主要话题: {', '.join([k for k, v in topics.items() if v > 0][:5])}")
 
-    # Generate detailed report
-    print("\n\n" + "=" * 80)
-    print("生成详细分析报告...")
-    print("=" * 80)
-
-    report = []
-    report.append("=" * 80)
-    report.append("小米汽车交通事故舆情深度分析报告")
-    report.append("Xiaomi Car Accident Sentiment Deep Analysis Report")
-    report.append(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    report.append("=" * 80)
-
-    # Douyin comment analysis
-    report.append("\n【一、抖音平台评论分析】")
-    report.append("-" * 80)
-
-    if douyin_comments_data:
-        total_douyin_comments = sum(d['total_comments'] for d in douyin_comments_data)
-        total_sentiment = {"positive": 0, "negative": 0, "neutral": 0}
-        total_topics = {}
-
-        for data in douyin_comments_data:
-            for sentiment, count in data['sentiment_distribution'].items():
-                total_sentiment[sentiment] += count
-            for topic, count in data['key_topics'].items():
-                total_topics[topic] = total_topics.get(topic, 0) + count
-
-        report.append(f"\n1. 评论总体统计")
-        report.append(f"   - 分析视频数: {len(douyin_comments_data)}")
-        report.append(f"   - 总评论数: {total_douyin_comments}")
-
-        report.append(f"\n2. 评论情绪分布")
-        for sentiment, count in total_sentiment.items():
-            percentage = count / total_douyin_comments * 100 if total_douyin_comments > 0 else 0
-            sentiment_cn = {"positive": "正面", "negative": "负面", "neutral": "中性"}[sentiment]
-            report.append(f"   - {sentiment_cn}: {count} ({percentage:.1f}%)")
-
-        report.append(f"\n3. 主要讨论话题TOP 5")
-        sorted_topics = sorted(total_topics.items(), key=lambda x: x[1], reverse=True)[:5]
-        for topic, count in sorted_topics:
-            if count > 0:
-                report.append(f"   - {topic}: {count}条提及")
-
-        report.append(f"\n4. 热门视频评论详情")
-        for i, data in enumerate(douyin_comments_data, 1):
-            report.append(f"\n   [{i}] {data['video_title'][:60]}...")
-            report.append(f"       评论数: {data['total_comments']}")
-            report.append(f"       情绪: 正面{data['sentiment_distribution']['positive']} "
-                         f"中性{data['sentiment_distribution']['neutral']} "
-                         f"负面{data['sentiment_distribution']['negative']}")
-
-            # Show top 5 comments
-            top_comments = sorted(data['comments'], key=lambda x: x.get('like_count', 0), reverse=True)[:5]
-            report.append(f"       热门评论:")
-            for j, comment in enumerate(top_comments, 1):
-                text = comment.get('text', '')
-                report.append(f"         {j}. {text[:50]}... (赞{comment.get('like_count', 0)})")
-
-    # Xiaohongshu comment analysis
-    report.append("\n\n【二、小红书平台评论分析】")
-    report.append("-" * 80)
-
-    if xiaohongshu_comments_data:
-        total_xiaohongshu_comments = sum(d['total_comments'] for d in xiaohongshu_comments_data)
-        total_sentiment = {"positive": 0, "negative": 0, "neutral": 0}
-        total_topics = {}
-
-        for data in xiaohongshu_comments_data:
-            for sentiment, count in data['sentiment_distribution'].items():
-                total_sentiment[sentiment] += count
-            for topic, count in data['key_topics'].items():
-                total_topics[topic] = total_topics.get(topic, 0) + count
-
-        report.append(f"\n1. 评论总体统计")
-        report.append(f"   - 分析笔记数: {len(xiaohongshu_comments_data)}")
-        report.append(f"   - 总评论数: {total_xiaohongshu_comments}")
-
-        report.append(f"\n2. 评论情绪分布")
-        for sentiment, count in total_sentiment.items():
-            percentage = count / total_xiaohongshu_comments * 100 if total_xiaohongshu_comments > 0 else 0
-            sentiment_cn = {"positive": "正面", "negative": "负面", "neutral": "中性"}[sentiment]
-            report.append(f"   - {sentiment_cn}: {count} ({percentage:.1f}%)")
-
-        report.append(f"\n3. 主要讨论话题TOP 5")
-        sorted_topics = sorted(total_topics.items(), key=lambda x: x[1], reverse=True)[:5]
-        for topic, count in sorted_topics:
-            if count > 0:
-                report.append(f"   - {topic}: {count}条提及")
-
-        report.append(f"\n4. 热门笔记评论详情")
-        for i, data in enumerate(xiaohongshu_comments_data, 1):
-            report.append(f"\n   [{i}] {data['note_title'][:60]}...")
-            report.append(f"       评论数: {data['total_comments']}")
-            report.append(f"       情绪: 正面{data['sentiment_distribution']['positive']} "
-                         f"中性{data['sentiment_distribution']['neutral']} "
-                         f"负面{data['sentiment_distribution']['negative']}")
-
-            # Show top 5 comments
-            top_comments = sorted(data['comments'], key=lambda x: x.get('like_count', 0), reverse=True)[:5]
-            report.append(f"       热门评论:")
-            for j, comment in enumerate(top_comments, 1):
-                text = comment.get('content', '')
-                report.append(f"         {j}. {text[:50]}... (赞{comment.get('like_count', 0)})")
-
-    # Comprehensive insights
-    report.append("\n\n【三、综合洞察】")
-    report.append("-" * 80)
-
-    report.append(f"\n1. 用户关注焦点")
-    report.append(f"   - 抖音用户更关注: 事故现场、智驾安全、质量问题")
-    report.append(f"   - 小红书用户更关注: 用车体验、维修保养、购买决策")
-
-    report.append(f"\n2. 舆情特点")
-    report.append(f"   - 事故相关内容引发高度关注和讨论")
-    report.append(f"   - 用户对智驾系统安全性存在担忧")
-    report.append(f"   - 质量问题是用户讨论的核心")
-    report.append(f"   - 部分用户持观望态度，期待产品改进")
-
-    report.append(f"\n3. 建议")
-    report.append(f"   - 加强智驾系统安全性和透明度沟通")
-    report.append(f"   - 及时回应用户关于质量问题的关切")
-    report.append(f"   - 提供更多真实用户使用案例")
-    report.append(f"   - 建立更完善的售后服务体系")
-
-    report.append("\n" + "=" * 80)
-    report.append("报告结束")
-
-    # Print and save report
-    report_text = "\n".join(report)
-    print("\n" + report_text)
-
-    # Save detailed data
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    detailed_data_file = f"D:/social_research/xiaomi_car_detailed_{timestamp}.json"
-    with open(detailed_data_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            "douyin_comments": douyin_comments_data,
-            "xiaohongshu_comments": xiaohongshu_comments_data
-        }, f, indent=2, ensure_ascii=False)
-
-    print(f"\n详细数据已保存到: {detailed_data_file}")
-
-    # Save report
-    report_file = f"D:/social_research/xiaomi_car_detailed_report_{timestamp}.txt"
-    with open(report_file, 'w', encoding='utf-8') as f:
-        f.write(report_text)
-
-    print(f"详细报告已保存到: {report_file}")
+        # Generate detailed report
+        print("\n\n" + "=" * 80)
+        print("生成详细分析报告...")
+        print("=" * 80)
+
+        report = []
+        report.append("=" * 80)
+        report.append("小米汽车交通事故舆情深度分析报告")
+        report.append("Xiaomi Car Accident Sentiment Deep Analysis Report")
+        report.append(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        report.append("=" * 80)
+
+        # Douyin comment analysis
+        report.append("\n【一、抖音平台评论分析】")
+        report.append("-" * 80)
+
+        if douyin_comments_data:
+            total_douyin_comments = sum(d['total_comments'] for d in douyin_comments_data)
+            total_sentiment = {"positive": 0, "negative": 0, "neutral": 0}
+            total_topics = {}
+
+            for data in douyin_comments_data:
+                for sentiment, count in data['sentiment_distribution'].items():
+                    total_sentiment[sentiment] += count
+                for topic, count in data['key_topics'].items():
+                    total_topics[topic] = total_topics.get(topic, 0) + count
+
+            report.append(f"\n1. 评论总体统计")
+            report.append(f"   - 分析视频数: {len(douyin_comments_data)}")
+            report.append(f"   - 总评论数: {total_douyin_comments}")
+
+            report.append(f"\n2. 评论情绪分布")
+            for sentiment, count in total_sentiment.items():
+                percentage = count / total_douyin_comments * 100 if total_douyin_comments > 0 else 0
+                sentiment_cn = {"positive": "正面", "negative": "负面", "neutral": "中性"}[sentiment]
+                report.append(f"   - {sentiment_cn}: {count} ({percentage:.1f}%)")
+
+            report.append(f"\n3. 主要讨论话题TOP 5")
+            sorted_topics = sorted(total_topics.items(), key=lambda x: x[1], reverse=True)[:5]
+            for topic, count in sorted_topics:
+                if count > 0:
+                    report.append(f"   - {topic}: {count}条提及")
+
+            report.append(f"\n4. 热门视频评论详情")
+            for i, data in enumerate(douyin_comments_data, 1):
+                report.append(f"\n   [{i}] {data['video_title'][:60]}...")
+                report.append(f"       评论数: {data['total_comments']}")
+                report.append(f"       情绪: 正面{data['sentiment_distribution']['positive']} "
+                             f"中性{data['sentiment_distribution']['neutral']} "
+                             f"负面{data['sentiment_distribution']['negative']}")
+
+                # Show top 5 comments
+                top_comments = sorted(data['comments'], key=lambda x: x.get('like_count', 0), reverse=True)[:5]
+                report.append(f"       热门评论:")
+                for j, comment in enumerate(top_comments, 1):
+                    text = comment.get('text', '')
+                    report.append(f"         {j}. {text[:50]}... (赞{comment.get('like_count', 0)})")
+
+        # Xiaohongshu comment analysis
+        report.append("\n\n【二、小红书平台评论分析】")
+        report.append("-" * 80)
+
+        if xiaohongshu_comments_data:
+            total_xiaohongshu_comments = sum(d['total_comments'] for d in xiaohongshu_comments_data)
+            total_sentiment = {"positive": 0, "negative": 0, "neutral": 0}
+            total_topics = {}
+
+            for data in xiaohongshu_comments_data:
+                for sentiment, count in data['sentiment_distribution'].items():
+                    total_sentiment[sentiment] += count
+                for topic, count in data['key_topics'].items():
+                    total_topics[topic] = total_topics.get(topic, 0) + count
+
+            report.append(f"\n1. 评论总体统计")
+            report.append(f"   - 分析笔记数: {len(xiaohongshu_comments_data)}")
+            report.append(f"   - 总评论数: {total_xiaohongshu_comments}")
+
+            report.append(f"\n2. 评论情绪分布")
+            for sentiment, count in total_sentiment.items():
+                percentage = count / total_xiaohongshu_comments * 100 if total_xiaohongshu_comments > 0 else 0
+                sentiment_cn = {"positive": "正面", "negative": "负面", "neutral": "中性"}[sentiment]
+                report.append(f"   - {sentiment_cn}: {count} ({percentage:.1f}%)")
+
+            report.append(f"\n3. 主要讨论话题TOP 5")
+            sorted_topics = sorted(total_topics.items(), key=lambda x: x[1], reverse=True)[:5]
+            for topic, count in sorted_topics:
+                if count > 0:
+                    report.append(f"   - {topic}: {count}条提及")
+
+            report.append(f"\n4. 热门笔记评论详情")
+            for i, data in enumerate(xiaohongshu_comments_data, 1):
+                report.append(f"\n   [{i}] {data['note_title'][:60]}...")
+                report.append(f"       评论数: {data['total_comments']}")
+                report.append(f"       情绪: 正面{data['sentiment_distribution']['positive']} "
+                             f"中性{data['sentiment_distribution']['neutral']} "
+                             f"负面{data['sentiment_distribution']['negative']}")
+
+                # Show top 5 comments
+                top_comments = sorted(data['comments'], key=lambda x: x.get('like_count', 0), reverse=True)[:5]
+                report.append(f"       热门评论:")
+                for j, comment in enumerate(top_comments, 1):
+                    text = comment.get('content', '')
+                    report.append(f"         {j}. {text[:50]}... (赞{comment.get('like_count', 0)})")
+
+        # Comprehensive insights
+        report.append("\n\n【三、综合洞察】")
+        report.append("-" * 80)
+
+        report.append(f"\n1. 用户关注焦点")
+        report.append(f"   - 抖音用户更关注: 事故现场、智驾安全、质量问题")
+        report.append(f"   - 小红书用户更关注: 用车体验、维修保养、购买决策")
+
+        report.append(f"\n2. 舆情特点")
+        report.append(f"   - 事故相关内容引发高度关注和讨论")
+        report.append(f"   - 用户对智驾系统安全性存在担忧")
+        report.append(f"   - 质量问题是用户讨论的核心")
+        report.append(f"   - 部分用户持观望态度，期待产品改进")
+
+        crosstab = {}
+        if topic_index:
+            # Topic x sentiment x platform, sliced from the per-comment topic bitmasks
+            crosstab = topic_crosstab(
+                _concat_masks([masks for _, _, masks in topic_index]), topic_labels(),
+                [sentiment for _, sentiments, _ in topic_index for sentiment in sentiments],
+                groups=[platform for platform, sentiments, _ in topic_index for _ in sentiments]
+            )
+            report.append(f"\n3. 话题情绪交叉分析")
+            for platform, platform_cn in (("douyin", "抖音"), ("xiaohongshu", "小红书")):
+                if not crosstab.get(platform):
+                    continue
+                report.append(f"   - {platform_cn}:")
+                for topic, counts in crosstab[platform].items():
+                    report.append(f"     - {topic}: {sum(counts.values())}条 "
+                                  f"(正面{counts.get('positive', 0)} 中性{counts.get('neutral', 0)} "
+                                  f"负面{counts.get('negative', 0)})")
+
+        report.append(f"\n4. 建议")
+        report.append(f"   - 加强智驾系统安全性和透明度沟通")
+        report.append(f"   - 及时回应用户关于质量问题的关切")
+        report.append(f"   - 提供更多真实用户使用案例")
+        report.append(f"   - 建立更完善的售后服务体系")
+
+        report.append("\n" + "=" * 80)
+        report.append("报告结束")
+
+        # Print and save report
+        report_text = "\n".join(report)
+        print("\n" + report_text)
+
+        # Save detailed data
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        detailed_data_file = f"D:/social_research/xiaomi_car_detailed_{timestamp}.json"
+        with open(detailed_data_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                "douyin_comments": douyin_comments_data,
+                "xiaohongshu_comments": xiaohongshu_comments_data,
+                "topic_sentiment": crosstab
+            }, f, indent=2, ensure_ascii=False)
+
+        print(f"\n详细数据已保存到: {detailed_data_file}")
+
+        # Save report
+        report_file = f"D:/social_research/xiaomi_car_detailed_report_{timestamp}.txt"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write(report_text)
+
+        print(f"详细报告已保存到: {report_file}")
+
+        if store is not None:
+            store.finish_run(run_id, detailed_data_file)
+            print(store.summary())
+
+        for line in client_summaries(client):
+            print(line)
+        if replay is not None:
+            print(replay.summary())
+        if archive is not None:
+            print(archive.summary())
+    finally:
+        # Every exit path, including an error or Ctrl-C mid-analysis, releases what was opened
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if store is not None:
+            store.close()
+        if archive is not None:
+            archive.close()
+        if replay is not None:
+            replay.archive.close()
+        LEXICONS.memo.save()
+
+    for line in LEXICONS.summary():
+        print(line)
 
 
 if __name__ == '__main__':
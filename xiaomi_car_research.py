@@ -6,174 +6,346 @@ Xiaomi Car Accident Sentiment Research Script
 Collects data from Douyin and Xiaohongshu about Xiaomi car accidents.
 """
 
+import argparse
+import asyncio
 import json
 import sys
+import time
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
 # Import TikHub API client
 sys.path.insert(0, str(Path(__file__).parent / '.claude' / 'skills' / 'tikhub-api-helper'))
 from api_client import TikHubAPIClient
+from tikhub_client import build_client, client_summaries, DEFAULT_CACHE_MAX_BYTES
+from pagination import PagedSearch
+from run_state import CheckpointJournal, WatermarkStore
+from sentiment import ClassificationMemo, classify_sentiment, score_batch
+from lexicon_registry import LexiconRegistry
+from aggregates import StreamAggregator
+from result_sink import JsonlSink, StreamedList, iter_jsonl, write_json
+from research_store import ResearchStore
+from response_archive import DEFAULT_ARCHIVE_PATH, ReplayClient, ResponseArchive, parse_time
+from records import DouyinComment, DouyinVideo, Post, POST_TYPES, XiaohongshuComment, XiaohongshuNote
+
+
+# Search keywords
+SEARCH_KEYWORDS = [
+    "小米汽车事故",
+    "小米SU7事故",
+    "小米汽车车祸",
+    "小米SU7"
+]
+
+# Checkpoint journal used by --resume
+JOURNAL_PATH = Path(__file__).parent / ".cache" / "xiaomi_car_research.journal.jsonl"
+
+# Where datasets and reports are written
+OUTPUT_DIR = Path("D:/social_research")
+
+# Posts of every run accumulate here, see research_store.py
+STORE_PATH = OUTPUT_DIR / "research.db"
+
+# Incremental mode re-reads this far behind the watermark (seconds), to pick
+# up content the platform indexed late
+WATERMARK_OVERLAP = 3600
+
+# Page cap per keyword search
+MAX_SEARCH_PAGES = 5
+
+# Sentiment lexicons of this research topic, see lexicons/xiaomi_car.json
+LEXICON_NAME = "xiaomi_car"
+
+# Titles repeat across keywords and runs; results are memoized across runs
+# (the persisted memo is attached in main(), so importing this module stays cheap)
+MEMO_PATH = Path(__file__).parent / ".cache" / "classification_memo.json"
+LEXICONS = LexiconRegistry(memo=ClassificationMemo())
+
+# Content id field per platform
+ID_FIELDS = {"douyin": "aweme_id", "xiaohongshu": "note_id"}
+
+# Title keywords that mark content as accident-related
+ACCIDENT_KEYWORDS = ["事故", "车祸", "碰撞"]
+
+# Max in-flight searches per platform in async mode
+DEFAULT_CONCURRENCY = {
+    "douyin": 4,
+    "xiaohongshu": 2
+}
 
 
 class XiaomiCarResearcher:
     """Researcher for Xiaomi car accident sentiment on social media."""
 
-    def __init__(self):
-        """Initialize the researcher with API client."""
-        self.client = TikHubAPIClient(use_china_domain=True)
+    def __init__(self, cache: bool = True, cache_only: bool = False,
+                 cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+                 journal: Optional[CheckpointJournal] = None,
+                 sink: Optional[JsonlSink] = None,
+                 store: Optional[ResearchStore] = None,
+                 archive: Optional[ResponseArchive] = None,
+                 replay: Optional[ReplayClient] = None):
+        """
+        Initialize the researcher with API client.
+
+        Args:
+            cache: Serve repeated requests from the on-disk response cache
+            cache_only: Rebuild from cached responses only, without network access
+            cache_max_bytes: Response cache size cap
+            journal: Checkpoint journal for completed requests (see --resume)
+            sink: JSONL sink every stored item is streamed to (see save_results)
+            store: Research database the stored items are upserted into, as one run
+            archive: Response archive raw API responses are stored in
+            replay: Answer requests from a response archive instead of the API
+                (bypasses the response cache and rate limiter)
+        """
+        self.client = build_client(
+            replay or TikHubAPIClient(use_china_domain=True),
+            cache=cache and replay is None,
+            cache_only=cache_only and replay is None,
+            cache_max_bytes=cache_max_bytes,
+            rate_limit=replay is None,
+            journal=journal,
+            archive=archive
+        )
         self.results = {
             "douyin": [],
             "xiaohongshu": [],
             "summary": {}
         }
+        self.collection_stats = {}
+        self.sink = sink
+        self.store = store
+        self.run_id = store.begin_run("xiaomi_car_research") if store is not None else None
+
+        # Content id -> stored record, per platform, for cross-keyword de-duplication
+        self.index = {"douyin": {}, "xiaohongshu": {}}
+        self.raw_counts = {"douyin": 0, "xiaohongshu": 0}
+
+        # Report statistics, updated as items are stored
+        self.aggregates = {
+            "douyin": StreamAggregator(
+                metrics={
+                    "plays": lambda video: video.play_count,
+                    "likes": lambda video: video.like_count,
+                    "comments": lambda video: video.comment_count,
+                    "accidents": lambda video: any(kw in video.title for kw in ACCIDENT_KEYWORDS)
+                },
+                label_of=lambda video: video.sentiment or "neutral",
+                weight_of=lambda video: video.like_count,
+                rank_by={"plays": lambda video: video.play_count}
+            ),
+            "xiaohongshu": StreamAggregator(
+                metrics={
+                    "likes": lambda note: note.like_count,
+                    "collects": lambda note: note.collect_count,
+                    "comments": lambda note: note.comment_count,
+                    "accidents": lambda note: any(kw in note.title or kw in note.desc
+                                                  for kw in ACCIDENT_KEYWORDS)
+                },
+                label_of=lambda note: note.sentiment or "neutral",
+                weight_of=lambda note: note.like_count,
+                rank_by={"likes": lambda note: note.like_count}
+            )
+        }
 
-    def search_douyin(self, keyword: str, count: int = 20) -> List[Dict[str, Any]]:
+        # Incremental collection state, see collect_data(incremental=True)
+        self.incremental = False
+        self.watermarks: Optional[WatermarkStore] = None
+
+    def search_douyin(self, keyword: str, count: Optional[int] = 20, since: Optional[int] = None,
+                      known_ids: Optional[set] = None, latest_first: bool = False) -> List[DouyinVideo]:
         """
         Search Douyin for videos about Xiaomi car accidents.
 
         Args:
             keyword: Search keyword
-            count: Number of results to fetch
+            count: Number of results to fetch (None: no limit besides the page cap)
+            since: Ignore videos created before this timestamp
+            known_ids: Ids of videos collected earlier, skipped when met
+            latest_first: Sort by publish time instead of relevance
 
         Returns:
             List of video data
         """
         print(f"\n=== 抖音搜索: {keyword} ===")
 
-        # Use Douyin Search API V2 (general search which includes videos)
-        result = self.client.post(
-            "/api/v1/douyin/search/fetch_general_search_v2",
-            body={
-                "keyword": keyword,
-                "count": count,
-                "sort_type": "0",  # 0: 综合排序
-                "publish_time": "0",  # 0: 全部时间
-                "filter_duration": "0",  # 0: 全部时长
-                "content_type": "0"  # 0: 全部内容
-            }
-        )
+        videos = list(self.iter_douyin(keyword, target_count=count, since=since,
+                                       known_ids=known_ids, latest_first=latest_first))
 
-        if "error" in result or result.get("code") != 200:
-            error_msg = result.get("error") or result.get("message", "Unknown error")
-            print(f"Error searching Douyin: {error_msg}")
-            return []
+        print(f"Found {len(videos)} videos")
+        return videos
 
-        videos = []
-        data = result.get("data", {})
+    def iter_douyin(self, keyword: str, target_count: Optional[int] = None,
+                    since: Optional[int] = None, page_size: int = 20,
+                    max_pages: int = MAX_SEARCH_PAGES, known_ids: Optional[set] = None,
+                    latest_first: bool = False) -> PagedSearch:
+        """
+        Lazily page through Douyin search results, following the API cursor.
 
-        # Extract video data from response structure
-        business_data = data.get("business_data", [])
-        for item in business_data:
-            if item.get("type") == 1:  # Type 1 is video
-                video_data = item.get("data", {})
-                video_info = self._parse_douyin_video(video_data)
-                if video_info:
-                    videos.append(video_info)
+        Args:
+            keyword: Search keyword
+            target_count: Stop after this many videos
+            since: Skip videos with create_time before this timestamp and stop
+                on a page with none newer
+            page_size: Results requested per page
+            max_pages: Hard cap on pages fetched
+            known_ids: Ids of videos collected earlier, skipped when met
+            latest_first: Sort by publish time instead of relevance
 
-        print(f"Found {len(videos)} videos")
-        return videos
+        Returns:
+            Iterable of parsed videos
+        """
+        def fetch_page(cursor):
+            # Use Douyin Search API V2 (general search which includes videos)
+            result = self.client.post(
+                "/api/v1/douyin/search/fetch_general_search_v2",
+                body={
+                    "keyword": keyword,
+                    "count": page_size,
+                    "cursor": cursor,
+                    "sort_type": "2" if latest_first else "0",  # 0: 综合排序, 2: 最新发布
+                    "publish_time": "0",  # 0: 全部时间
+                    "filter_duration": "0",  # 0: 全部时长
+                    "content_type": "0"  # 0: 全部内容
+                }
+            )
+
+            if "error" in result or result.get("code") != 200:
+                error_msg = result.get("error") or result.get("message", "Unknown error")
+                print(f"Error searching Douyin: {error_msg}")
+                return None
+            return result
+
+        def parse_page(result, cursor):
+            videos = []
+            data = result.get("data", {})
+
+            # Extract video data from response structure
+            business_data = data.get("business_data", [])
+            for item in business_data:
+                if item.get("type") == 1:  # Type 1 is video
+                    video_data = item.get("data", {})
+                    video_info = self._parse_douyin_video(video_data)
+                    if video_info:
+                        videos.append(video_info)
+
+            return videos, data.get("cursor"), bool(data.get("has_more"))
+
+        return PagedSearch(
+            fetch_page, parse_page,
+            id_of=lambda video: video.aweme_id,
+            time_of=lambda video: video.create_time,
+            first_token=0,
+            target_count=target_count,
+            since=since,
+            max_pages=max_pages,
+            known_ids=known_ids
+        )
 
-    def search_xiaohongshu(self, keyword: str, count: int = 20) -> List[Dict[str, Any]]:
+    def search_xiaohongshu(self, keyword: str, count: Optional[int] = 20, since: Optional[int] = None,
+                           known_ids: Optional[set] = None, latest_first: bool = False) -> List[XiaohongshuNote]:
         """
         Search Xiaohongshu for notes about Xiaomi car accidents.
 
         Args:
             keyword: Search keyword
-            count: Number of results to fetch
+            count: Number of results to fetch (None: no limit besides the page cap)
+            since: Ignore notes published before this timestamp
+            known_ids: Ids of notes collected earlier, skipped when met
+            latest_first: Sort by time instead of relevance
 
         Returns:
             List of note data
         """
         print(f"\n=== 小红书搜索: {keyword} ===")
 
-        # Use Xiaohongshu Web API v3
-        result = self.client.get(
-            "/api/v1/xiaohongshu/web/search_notes_v3",
-            params={
-                "keyword": keyword,
-                "page": "1"
-            }
-        )
+        notes = list(self.iter_xiaohongshu(keyword, target_count=count, since=since,
+                                           known_ids=known_ids, latest_first=latest_first))
 
-        if "error" in result or result.get("code") != 200:
-            error_msg = result.get("error") or result.get("message", "Unknown error")
-            print(f"Error searching Xiaohongshu: {error_msg}")
-            return []
+        print(f"Found {len(notes)} notes")
+        return notes
 
-        notes = []
-        data = result.get("data", {})
-        items_data = data.get("data", {})
-        items = items_data.get("items", [])
+    def iter_xiaohongshu(self, keyword: str, target_count: Optional[int] = None,
+                         since: Optional[int] = None,
+                         max_pages: int = MAX_SEARCH_PAGES, known_ids: Optional[set] = None,
+                         latest_first: bool = False) -> PagedSearch:
+        """
+        Lazily page through Xiaohongshu search results.
 
-        # Extract note data from response
-        for item in items:
-            if item.get("model_type") == "note":
-                note_data = item.get("note", {})
-                note_info = self._parse_xiaohongshu_note(note_data)
-                if note_info:
-                    notes.append(note_info)
-                    if len(notes) >= count:
-                        break
+        Args:
+            keyword: Search keyword
+            target_count: Stop after this many notes
+            since: Skip notes with published_time before this timestamp and stop on a
+                page with none newer
+            max_pages: Hard cap on pages fetched
+            known_ids: Ids of notes collected earlier, skipped when met
+            latest_first: Sort by time instead of relevance
 
-        print(f"Found {len(notes)} notes")
-        return notes
+        Returns:
+            Iterable of parsed notes
+        """
+        def fetch_page(page):
+            # Use Xiaohongshu Web API v3
+            params = {
+                "keyword": keyword,
+                "page": str(page)
+            }
+            if latest_first:
+                params["sort"] = "time_descending"
+            result = self.client.get("/api/v1/xiaohongshu/web/search_notes_v3", params=params)
+
+            if "error" in result or result.get("code") != 200:
+                error_msg = result.get("error") or result.get("message", "Unknown error")
+                print(f"Error searching Xiaohongshu: {error_msg}")
+                return None
+            return result
+
+        def parse_page(result, page):
+            notes = []
+            data = result.get("data", {})
+            items_data = data.get("data", {})
+            items = items_data.get("items", [])
+
+            # Extract note data from response
+            for item in items:
+                if item.get("model_type") == "note":
+                    note_data = item.get("note", {})
+                    note_info = self._parse_xiaohongshu_note(note_data)
+                    if note_info:
+                        notes.append(note_info)
+
+            return notes, page + 1, bool(items_data.get("has_more", bool(items)))
+
+        return PagedSearch(
+            fetch_page, parse_page,
+            id_of=lambda note: note.note_id,
+            time_of=lambda note: note.published_time,
+            first_token=1,
+            target_count=target_count,
+            since=since,
+            max_pages=max_pages,
+            known_ids=known_ids
+        )
 
-    def _parse_douyin_video(self, item: Dict[str, Any]) -> Dict[str, Any]:
+    def _parse_douyin_video(self, item: Dict[str, Any]) -> Optional[DouyinVideo]:
         """Parse Douyin video data from API response."""
         try:
             # Handle different response structures
-            aweme_info = item.get("aweme_info", {})
-
-            return {
-                "aweme_id": aweme_info.get("aweme_id", ""),
-                "title": aweme_info.get("desc", ""),
-                "author": {
-                    "uid": aweme_info.get("author", {}).get("uid", ""),
-                    "nickname": aweme_info.get("author", {}).get("nickname", ""),
-                    "follower_count": aweme_info.get("author", {}).get("follower_count", 0)
-                },
-                "statistics": {
-                    "play_count": aweme_info.get("statistics", {}).get("play_count", 0),
-                    "like_count": aweme_info.get("statistics", {}).get("digg_count", 0),
-                    "comment_count": aweme_info.get("statistics", {}).get("comment_count", 0),
-                    "share_count": aweme_info.get("statistics", {}).get("share_count", 0)
-                },
-                "create_time": aweme_info.get("create_time", 0),
-                "video_url": aweme_info.get("video", {}).get("play_addr", {}).get("url_list", [""])[0] if aweme_info.get("video", {}).get("play_addr", {}).get("url_list") else ""
-            }
+            return DouyinVideo.from_api(item.get("aweme_info", {}))
         except Exception as e:
             print(f"Error parsing video: {e}")
             return None
 
-    def _parse_xiaohongshu_note(self, item: Dict[str, Any]) -> Dict[str, Any]:
+    def _parse_xiaohongshu_note(self, item: Dict[str, Any]) -> Optional[XiaohongshuNote]:
         """Parse Xiaohongshu note data from API response."""
         try:
-            return {
-                "note_id": item.get("id", ""),
-                "title": item.get("title", ""),
-                "desc": item.get("desc", ""),
-                "type": item.get("type", ""),
-                "author": {
-                    "user_id": item.get("user", {}).get("userid", ""),
-                    "nickname": item.get("user", {}).get("nickname", ""),
-                    "follower_count": 0  # Not available in search response
-                },
-                "statistics": {
-                    "like_count": item.get("liked_count", 0),
-                    "collect_count": item.get("collected_count", 0),
-                    "comment_count": item.get("comments_count", 0),
-                    "share_count": item.get("shared_count", 0)
-                },
-                "cover_url": item.get("images_list", [{}])[0].get("url", "") if item.get("images_list") else "",
-                "time": item.get("last_update_time", 0)
-            }
+            return XiaohongshuNote.from_api(item)
         except Exception as e:
             print(f"Error parsing note: {e}")
             return None
 
-    def get_douyin_comments(self, aweme_id: str, count: int = 20) -> List[Dict[str, Any]]:
+    def get_douyin_comments(self, aweme_id: str, count: int = 20) -> List[DouyinComment]:
         """Get comments for a Douyin video."""
         result = self.client.get(
             "/api/v1/douyin/web/fetch_video_comments",
@@ -191,20 +363,11 @@ class XiaomiCarResearcher:
 
         if "comments" in data and isinstance(data["comments"], list):
             for comment in data["comments"]:
-                comments.append({
-                    "cid": comment.get("cid", ""),
-                    "text": comment.get("text", ""),
-                    "like_count": comment.get("digg_count", 0),
-                    "reply_count": comment.get("reply_comment_total", 0),
-                    "user": {
-                        "uid": comment.get("user", {}).get("uid", ""),
-                        "nickname": comment.get("user", {}).get("nickname", "")
-                    }
-                })
+                comments.append(DouyinComment.from_api(comment))
 
         return comments
 
-    def get_xiaohongshu_comments(self, note_id: str, count: int = 20) -> List[Dict[str, Any]]:
+    def get_xiaohongshu_comments(self, note_id: str, count: int = 20) -> List[XiaohongshuComment]:
         """Get comments for a Xiaohongshu note."""
         result = self.client.get(
             "/api/v1/xiaohongshu/web_v2/fetch_note_comments",
@@ -223,141 +386,256 @@ class XiaomiCarResearcher:
 
         if "comments" in data and isinstance(data["comments"], list):
             for comment in data["comments"]:
-                comments.append({
-                    "id": comment.get("id", ""),
-                    "content": comment.get("content", ""),
-                    "like_count": comment.get("like_count", 0),
-                    "sub_comment_count": comment.get("sub_comment_count", 0),
-                    "user": {
-                        "user_id": comment.get("user", {}).get("user_id", ""),
-                        "nickname": comment.get("user", {}).get("nickname", "")
-                    }
-                })
+                comments.append(XiaohongshuComment.from_api(comment))
 
         return comments
 
     def analyze_sentiment(self, text: str) -> str:
         """
-        Simple sentiment analysis based on keywords.
+        Simple sentiment analysis based on keywords, or on the local sentiment model when one is trained.
         Returns: 'positive', 'neutral', 'negative'
         """
-        negative_keywords = [
-            "事故", "车祸", "伤亡", "死", "伤", "危险", "问题", "缺陷",
-            "失控", "碰撞", "追尾", "起火", "刹车", "失灵", "安全隐患"
-        ]
+        return classify_sentiment(LEXICONS.matcher(LEXICON_NAME, "sentiment"), text,
+                                  model=LEXICONS.model(LEXICON_NAME, "sentiment"))
 
-        positive_keywords = [
-            "安全", "好", "优秀", "可靠", "信任", "喜欢", "推荐", "不错",
-            "稳定", "放心", "体验好", "质量好"
-        ]
+    def collect_data(self, mode: str = "serial", concurrency: Optional[Dict[str, int]] = None,
+                     incremental: bool = False):
+        """
+        Collect data from both platforms.
 
-        text_lower = text.lower()
+        Args:
+            mode: "serial" runs every search one after another, "async" fans
+                them out on an event loop
+            concurrency: Per-platform limit on in-flight searches (async mode
+                only), defaults to DEFAULT_CONCURRENCY
+            incremental: Only fetch content newer than each (platform, keyword)
+                watermark and merge it into the loaded dataset (see load_results)
+        """
+        keywords = SEARCH_KEYWORDS
+        if incremental and self.watermarks is None:
+            self.watermarks = WatermarkStore()
+        self.incremental = incremental
+        existing = len(self.results["douyin"]) + len(self.results["xiaohongshu"])
 
-        negative_count = sum(1 for kw in negative_keywords if kw in text_lower)
-        positive_count = sum(1 for kw in positive_keywords if kw in text_lower)
+        print("=" * 60)
+        print(f"开始收集数据... (模式: {mode}{', 增量' if incremental else ''})")
+        print("=" * 60)
 
-        if negative_count > positive_count:
-            return "negative"
-        elif positive_count > negative_count:
-            return "positive"
+        start = time.perf_counter()
+        if mode == "async":
+            limits = dict(DEFAULT_CONCURRENCY, **(concurrency or {}))
+            douyin_runs, xiaohongshu_runs = asyncio.run(self._collect_async(keywords, limits))
+        elif mode == "serial":
+            limits = {}
+            print("\n【抖音平台数据收集】")
+            douyin_runs = [self._timed_search("douyin", self.search_douyin, keyword) for keyword in keywords]
+            print("\n【小红书平台数据收集】")
+            xiaohongshu_runs = [self._timed_search("xiaohongshu", self.search_xiaohongshu, keyword)
+                                for keyword in keywords]
         else:
-            return "neutral"
-
-    def collect_data(self):
-        """Collect data from both platforms."""
-        # Search keywords
-        keywords = [
-            "小米汽车事故",
-            "小米SU7事故",
-            "小米汽车车祸",
-            "小米SU7"
-        ]
+            raise ValueError(f"Unknown collection mode: {mode}")
+        wall_time = time.perf_counter() - start
+
+        # Ingest in keyword order so output does not depend on completion order
+        for keyword, (videos, _) in zip(keywords, douyin_runs):
+            self._ingest_douyin(keyword, videos)
+        for keyword, (notes, _) in zip(keywords, xiaohongshu_runs):
+            self._ingest_xiaohongshu(keyword, notes)
+
+        if incremental:
+            for keyword, (videos, _) in zip(keywords, douyin_runs):
+                self.watermarks.update("douyin", keyword,
+                                       [v.aweme_id for v in videos],
+                                       [v.create_time for v in videos])
+            for keyword, (notes, _) in zip(keywords, xiaohongshu_runs):
+                self.watermarks.update("xiaohongshu", keyword,
+                                       [n.note_id for n in notes],
+                                       [n.published_time for n in notes])
+            self.watermarks.save()
+
+        serial_time = sum(elapsed for _, elapsed in douyin_runs + xiaohongshu_runs)
+        self.collection_stats = {
+            "mode": mode,
+            "incremental": incremental,
+            "new_items": len(self.results["douyin"]) + len(self.results["xiaohongshu"]) - existing,
+            "concurrency": limits,
+            "requests": len(douyin_runs) + len(xiaohongshu_runs),
+            "wall_time": round(wall_time, 3),
+            "serial_time": round(serial_time, 3),
+            "speedup": round(serial_time / wall_time, 2) if wall_time > 0 else 0
+        }
+        print(f"\n采集耗时: {wall_time:.2f}s (串行累计 {serial_time:.2f}s, "
+              f"加速比 {self.collection_stats['speedup']}x)")
 
-        print("=" * 60)
-        print("开始收集数据...")
-        print("=" * 60)
+        # Generate summary
+        self._generate_summary()
 
-        # Collect Douyin data
-        print("\n【抖音平台数据收集】")
-        for keyword in keywords:
-            videos = self.search_douyin(keyword, count=20)
-            for video in videos:
-                # Add search keyword
-                video["search_keyword"] = keyword
+    async def _collect_async(self, keywords: List[str], limits: Dict[str, int]):
+        """Run all keyword x platform searches concurrently, bounded per platform."""
+        semaphores = {platform: asyncio.Semaphore(limit) for platform, limit in limits.items()}
 
-                # Analyze sentiment
-                title = video.get("title", "")
-                video["sentiment"] = self.analyze_sentiment(title)
+        async def run(platform, search, keyword):
+            async with semaphores[platform]:
+                return await asyncio.to_thread(self._timed_search, platform, search, keyword)
 
-                self.results["douyin"].append(video)
+        douyin_tasks = [run("douyin", self.search_douyin, keyword) for keyword in keywords]
+        xiaohongshu_tasks = [run("xiaohongshu", self.search_xiaohongshu, keyword) for keyword in keywords]
 
-        # Collect Xiaohongshu data
-        print("\n【小红书平台数据收集】")
-        for keyword in keywords:
-            notes = self.search_xiaohongshu(keyword, count=20)
-            for note in notes:
-                # Add search keyword
-                note["search_keyword"] = keyword
+        # gather() preserves task order regardless of completion order
+        runs = await asyncio.gather(*douyin_tasks, *xiaohongshu_tasks)
+        return list(runs[:len(keywords)]), list(runs[len(keywords):])
 
-                # Analyze sentiment
-                title = note.get("title", "") + " " + note.get("desc", "")
-                note["sentiment"] = self.analyze_sentiment(title)
+    def _timed_search(self, platform: str, search, keyword: str):
+        """Call a platform search and return (items, elapsed seconds)."""
+        start = time.perf_counter()
+        items = search(keyword, **self._search_options(platform, keyword))
+        return items, time.perf_counter() - start
 
-                self.results["xiaohongshu"].append(note)
+    def _search_options(self, platform: str, keyword: str) -> Dict[str, Any]:
+        """
+        Search arguments for one (platform, keyword).
+
+        Incremental runs with a watermark page newest-first, with no count
+        limit, until a page has nothing newer than the watermark minus
+        WATERMARK_OVERLAP. Content collected by an earlier run is skipped
+        rather than ending the search, so late-indexed items inside the
+        overlap are still picked up. A keyword without a time watermark
+        falls back to stopping on a page of known content only.
+        """
+        mark = self.watermarks.get(platform, keyword) if self.incremental else None
+        if not mark:
+            return {"count": 20}
+        newest = mark.get("newest_time") or 0
+        return {
+            "count": None,
+            "since": newest - WATERMARK_OVERLAP if newest else None,
+            "known_ids": set(mark["seen_ids"]),
+            "latest_first": True
+        }
 
-        # Generate summary
-        self._generate_summary()
+    def load_results(self, filename: str):
+        """
+        Seed the researcher with a previously saved dataset.
+
+        Incremental runs merge new content into it; items already present are
+        indexed so they are not stored or counted again. The loaded items go
+        to the sink, which the merged dataset is exported from, but not to
+        the research store: they belong to the runs that fetched them, and
+        only content this run fetches is recorded under its run id.
+        """
+        with open(filename, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+
+        for platform, record_type in POST_TYPES.items():
+            for data in saved.get(platform, []):
+                item = record_type.from_dict(data)
+                if item.search_keywords is None:
+                    item.search_keywords = [item.search_keyword]
+                content_id = item.content_id
+                if content_id and content_id in self.index[platform]:
+                    continue
+                if content_id:
+                    self.index[platform][content_id] = item
+                self.results[platform].append(item)
+                self.aggregates[platform].add(item)
+                self._write_item(platform, item)
+                self.raw_counts[platform] += 1
+
+        print(f"已加载历史数据: {filename} "
+              f"(抖音 {len(self.results['douyin'])}, 小红书 {len(self.results['xiaohongshu'])})")
+
+    def _ingest_douyin(self, keyword: str, videos: List[DouyinVideo]):
+        """Annotate Douyin videos with keyword and sentiment and store them."""
+        self._ingest("douyin", keyword, videos)
+
+    def _ingest_xiaohongshu(self, keyword: str, notes: List[XiaohongshuNote]):
+        """Annotate Xiaohongshu notes with keyword and sentiment and store them."""
+        self._ingest("xiaohongshu", keyword, notes)
+
+    def _ingest(self, platform: str, keyword: str, items: List[Post]):
+        """
+        Store items through the per-platform de-duplication index.
+
+        An item already seen under another keyword is not stored or analyzed
+        again; the keyword is merged into the existing record's
+        search_keywords instead.
+        """
+        index = self.index[platform]
+        new_items = []
+        merged = []
+        for item in items:
+            self.raw_counts[platform] += 1
+
+            content_id = item.content_id
+            existing = index.get(content_id) if content_id else None
+            if existing is not None:
+                if keyword not in existing.search_keywords:
+                    existing.search_keywords.append(keyword)
+                    merged.append(existing)
+                    if self.sink is not None:
+                        self.sink.write({"type": "keyword", "platform": platform,
+                                         "id": content_id, "keyword": keyword})
+                continue
+
+            # Add search keyword (first match) and all matching keywords
+            item.search_keyword = keyword
+            item.search_keywords = [keyword]
+
+            if content_id:
+                index[content_id] = item
+            self.results[platform].append(item)
+            new_items.append(item)
+
+        # Analyze sentiment of the new items in one batch
+        batch = score_batch(LEXICONS.matcher(LEXICON_NAME, "sentiment"), [item.text for item in new_items],
+                            model=LEXICONS.model(LEXICON_NAME, "sentiment"))
+        for item, sentiment in zip(new_items, batch.labels):
+            item.sentiment = sentiment
+            self.aggregates[platform].add(item)
+            self._write_item(platform, item)
+        self._store_items(platform, new_items + merged)
+
+    def _write_item(self, platform: str, item: Post):
+        """Stream a stored item to the sink, if any."""
+        if self.sink is not None:
+            self.sink.write({"type": "item", "platform": platform, "data": item.to_dict()})
+
+    def _store_items(self, platform: str, items: List[Post]):
+        """Upsert stored (or updated) items into the research database, if any."""
+        if self.store is not None and items:
+            self.store.add_posts(platform, [item.to_dict() for item in items], self.run_id)
 
     def _generate_summary(self):
-        """Generate summary statistics."""
+        """Generate summary statistics from the streaming aggregates."""
         print("\n【生成统计摘要】")
 
-        # Douyin summary
-        douyin_total = len(self.results["douyin"])
-        douyin_sentiment = {}
-        douyin_total_plays = 0
-        douyin_total_likes = 0
-        douyin_total_comments = 0
-
-        for video in self.results["douyin"]:
-            sentiment = video.get("sentiment", "neutral")
-            douyin_sentiment[sentiment] = douyin_sentiment.get(sentiment, 0) + 1
-            douyin_total_plays += video["statistics"]["play_count"]
-            douyin_total_likes += video["statistics"]["like_count"]
-            douyin_total_comments += video["statistics"]["comment_count"]
-
-        # Xiaohongshu summary
-        xiaohongshu_total = len(self.results["xiaohongshu"])
-        xiaohongshu_sentiment = {}
-        xiaohongshu_total_likes = 0
-        xiaohongshu_total_collects = 0
-        xiaohongshu_total_comments = 0
-
-        for note in self.results["xiaohongshu"]:
-            sentiment = note.get("sentiment", "neutral")
-            xiaohongshu_sentiment[sentiment] = xiaohongshu_sentiment.get(sentiment, 0) + 1
-            xiaohongshu_total_likes += note["statistics"]["like_count"]
-            xiaohongshu_total_collects += note["statistics"]["collect_count"]
-            xiaohongshu_total_comments += note["statistics"]["comment_count"]
-
+        douyin = self.aggregates["douyin"]
+        xiaohongshu = self.aggregates["xiaohongshu"]
         self.results["summary"] = {
             "douyin": {
-                "total_videos": douyin_total,
-                "sentiment_distribution": douyin_sentiment,
-                "total_plays": douyin_total_plays,
-                "total_likes": douyin_total_likes,
-                "total_comments": douyin_total_comments,
-                "avg_likes": douyin_total_likes / douyin_total if douyin_total > 0 else 0
+                "total_videos": douyin.count,
+                "raw_videos": self.raw_counts["douyin"],
+                "sentiment_distribution": douyin.labels(),
+                "like_weighted_sentiment": douyin.labels(weighted=True),
+                "total_plays": douyin.total("plays"),
+                "total_likes": douyin.total("likes"),
+                "total_comments": douyin.total("comments"),
+                "avg_likes": douyin.mean("likes")
             },
             "xiaohongshu": {
-                "total_notes": xiaohongshu_total,
-                "sentiment_distribution": xiaohongshu_sentiment,
-                "total_likes": xiaohongshu_total_likes,
-                "total_collects": xiaohongshu_total_collects,
-                "total_comments": xiaohongshu_total_comments,
-                "avg_likes": xiaohongshu_total_likes / xiaohongshu_total if xiaohongshu_total > 0 else 0
-            }
+                "total_notes": xiaohongshu.count,
+                "raw_notes": self.raw_counts["xiaohongshu"],
+                "sentiment_distribution": xiaohongshu.labels(),
+                "like_weighted_sentiment": xiaohongshu.labels(weighted=True),
+                "total_likes": xiaohongshu.total("likes"),
+                "total_collects": xiaohongshu.total("collects"),
+                "total_comments": xiaohongshu.total("comments"),
+                "avg_likes": xiaohongshu.mean("likes")
+            },
+            "collection": self.collection_stats
         }
+        if self.sink is not None:
+            self.sink.write({"type": "summary", "data": self.results["summary"]})
 
     def generate_report(self) -> str:
         """Generate a comprehensive report."""
@@ -374,7 +652,7 @@ class XiaomiCarResearcher:
 
         douyin_summary = self.results["summary"]["douyin"]
         report.append(f"\n1. 数据概况")
-        report.append(f"   - 视频总数: {douyin_summary['total_videos']}")
+        report.append(f"   - 视频总数: {douyin_summary['total_videos']} (去重前 {douyin_summary['raw_videos']})")
         report.append(f"   - 总播放量: {douyin_summary['total_plays']:,}")
         report.append(f"   - 总点赞数: {douyin_summary['total_likes']:,}")
         report.append(f"   - 总评论数: {douyin_summary['total_comments']:,}")
@@ -385,22 +663,19 @@ class XiaomiCarResearcher:
             percentage = count / douyin_summary['total_videos'] * 100
             sentiment_cn = {"positive": "正面", "negative": "负面", "neutral": "中性"}[sentiment]
             report.append(f"   - {sentiment_cn}: {count} ({percentage:.1f}%)")
+        report.extend(self._weighted_sentiment_lines(douyin_summary))
 
         report.append(f"\n3. 热门视频TOP 10")
-        # Sort by play count
-        top_videos = sorted(
-            self.results["douyin"],
-            key=lambda x: x["statistics"]["play_count"],
-            reverse=True
-        )[:10]
+        # By play count
+        top_videos = self.aggregates["douyin"].top("plays")
 
         for i, video in enumerate(top_videos, 1):
-            sentiment_cn = {"positive": "正面", "negative": "负面", "neutral": "中性"}[video.get("sentiment", "neutral")]
-            report.append(f"\n   [{i}] {video['title'][:50]}...")
-            report.append(f"       作者: {video['author']['nickname']}")
-            report.append(f"       播放: {video['statistics']['play_count']:,} | "
-                         f"点赞: {video['statistics']['like_count']:,} | "
-                         f"评论: {video['statistics']['comment_count']:,}")
+            sentiment_cn = {"positive": "正面", "negative": "负面", "neutral": "中性"}[video.sentiment or "neutral"]
+            report.append(f"\n   [{i}] {video.title[:50]}...")
+            report.append(f"       作者: {video.author_nickname}")
+            report.append(f"       播放: {video.play_count:,} | "
+                         f"点赞: {video.like_count:,} | "
+                         f"评论: {video.comment_count:,}")
             report.append(f"       情绪: {sentiment_cn}")
 
         # Xiaohongshu section
@@ -409,7 +684,7 @@ class XiaomiCarResearcher:
 
         xiaohongshu_summary = self.results["summary"]["xiaohongshu"]
         report.append(f"\n1. 数据概况")
-        report.append(f"   - 笔记总数: {xiaohongshu_summary['total_notes']}")
+        report.append(f"   - 笔记总数: {xiaohongshu_summary['total_notes']} (去重前 {xiaohongshu_summary['raw_notes']})")
         report.append(f"   - 总点赞数: {xiaohongshu_summary['total_likes']:,}")
         report.append(f"   - 总收藏数: {xiaohongshu_summary['total_collects']:,}")
         report.append(f"   - 总评论数: {xiaohongshu_summary['total_comments']:,}")
@@ -420,22 +695,19 @@ class XiaomiCarResearcher:
             percentage = count / xiaohongshu_summary['total_notes'] * 100
             sentiment_cn = {"positive": "正面", "negative": "负面", "neutral": "中性"}[sentiment]
             report.append(f"   - {sentiment_cn}: {count} ({percentage:.1f}%)")
+        report.extend(self._weighted_sentiment_lines(xiaohongshu_summary))
 
         report.append(f"\n3. 热门笔记TOP 10")
-        # Sort by like count
-        top_notes = sorted(
-            self.results["xiaohongshu"],
-            key=lambda x: x["statistics"]["like_count"],
-            reverse=True
-        )[:10]
+        # By like count
+        top_notes = self.aggregates["xiaohongshu"].top("likes")
 
         for i, note in enumerate(top_notes, 1):
-            sentiment_cn = {"positive": "正面", "negative": "负面", "neutral": "中性"}[note.get("sentiment", "neutral")]
-            report.append(f"\n   [{i}] {note['title'][:50]}...")
-            report.append(f"       作者: {note['author']['nickname']}")
-            report.append(f"       点赞: {note['statistics']['like_count']:,} | "
-                         f"收藏: {note['statistics']['collect_count']:,} | "
-                         f"评论: {note['statistics']['comment_count']:,}")
+            sentiment_cn = {"positive": "正面", "negative": "负面", "neutral": "中性"}[note.sentiment or "neutral"]
+            report.append(f"\n   [{i}] {note.title[:50]}...")
+            report.append(f"       作者: {note.author_nickname}")
+            report.append(f"       点赞: {note.like_count:,} | "
+                         f"收藏: {note.collect_count:,} | "
+                         f"评论: {note.comment_count:,}")
             report.append(f"       情绪: {sentiment_cn}")
 
         # Overall analysis
@@ -471,11 +743,8 @@ class XiaomiCarResearcher:
             report.append(f"   - 两个平台讨论热度相当")
 
         report.append(f"\n3. 内容类型分析")
-        accident_keywords = ["事故", "车祸", "碰撞"]
-        douyin_accident_count = sum(1 for v in self.results["douyin"]
-                                   if any(kw in v['title'] for kw in accident_keywords))
-        xiaohongshu_accident_count = sum(1 for n in self.results["xiaohongshu"]
-                                        if any(kw in n['title'] or kw in n.get('desc', '') for kw in accident_keywords))
+        douyin_accident_count = self.aggregates["douyin"].total("accidents")
+        xiaohongshu_accident_count = self.aggregates["xiaohongshu"].total("accidents")
 
         if douyin_summary['total_videos'] > 0:
             report.append(f"   - 抖音事故相关内容: {douyin_accident_count}/{douyin_summary['total_videos']} "
@@ -489,19 +758,56 @@ class XiaomiCarResearcher:
         else:
             report.append(f"   - 小红书事故相关内容: 无数据")
 
+        collection = self.results["summary"].get("collection", {})
+        if collection:
+            report.append(f"\n4. 采集性能")
+            report.append(f"   - 采集模式: {collection['mode']} ({collection['requests']} 次请求)")
+            if collection.get("incremental"):
+                report.append(f"   - 增量采集: 新增 {collection['new_items']} 条")
+            report.append(f"   - 实际耗时: {collection['wall_time']:.2f}s | "
+                         f"串行累计: {collection['serial_time']:.2f}s | "
+                         f"加速比: {collection['speedup']}x")
+
         report.append("\n" + "=" * 80)
         report.append("报告结束")
 
         return "\n".join(report)
 
+    def _weighted_sentiment_lines(self, summary: Dict[str, Any]) -> List[str]:
+        """Report lines for a platform's like-weighted sentiment distribution."""
+        weighted = summary.get("like_weighted_sentiment") or {}
+        total = sum(weighted.values())
+        if not total:
+            return []
+        shares = " | ".join(
+            f"{name} {weighted.get(sentiment, 0) / total * 100:.1f}%"
+            for sentiment, name in (("positive", "正面"), ("negative", "负面"), ("neutral", "中性"))
+        )
+        return [f"   - 点赞加权: {shares}"]
+
     def save_results(self, filename: str = None):
-        """Save results to JSON file."""
+        """
+        Save results to JSON file.
+
+        With a sink, the file is derived from the streamed JSONL records
+        instead of serializing the in-memory results.
+        """
         if filename is None:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"D:/social_research/xiaomi_car_research_{timestamp}.json"
+            filename = str(OUTPUT_DIR / f"xiaomi_car_research_{timestamp}.json")
 
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, indent=2, ensure_ascii=False)
+        if self.sink is not None:
+            self.sink.close()
+            export_results(self.sink.path, filename)
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "douyin": [video.to_dict() for video in self.results["douyin"]],
+                    "xiaohongshu": [note.to_dict() for note in self.results["xiaohongshu"]],
+                    "summary": self.results["summary"]
+                }, f, indent=2, ensure_ascii=False)
+        if self.store is not None:
+            self.store.finish_run(self.run_id, filename)
 
         print(f"\n数据已保存到: {filename}")
 
@@ -509,7 +815,7 @@ class XiaomiCarResearcher:
         """Save report to text file."""
         if filename is None:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"D:/social_research/xiaomi_car_report_{timestamp}.txt"
+            filename = str(OUTPUT_DIR / f"xiaomi_car_report_{timestamp}.txt")
 
         report = self.generate_report()
         with open(filename, 'w', encoding='utf-8') as f:
@@ -518,20 +824,166 @@ class XiaomiCarResearcher:
         print(f"报告已保存到: {filename}")
 
 
+def export_results(jsonl_path: Path, filename: str):
+    """
+    Derive the legacy single-JSON dataset from a streamed JSONL file.
+
+    Items are streamed from the JSONL file into the JSON file one at a time,
+    with the keywords they were later found under merged back in.
+
+    Args:
+        jsonl_path: JSONL file written through the researcher's sink
+        filename: JSON file to write, in the save_results layout
+    """
+    summary = {}
+    later_keywords: Dict[tuple, List[str]] = {}
+    for record in iter_jsonl(jsonl_path):
+        if record["type"] == "summary":
+            summary = record["data"]
+        elif record["type"] == "keyword":
+            later_keywords.setdefault((record["platform"], record["id"]), []).append(record["keyword"])
+
+    def items(platform):
+        for record in iter_jsonl(jsonl_path):
+            if record["type"] != "item" or record["platform"] != platform:
+                continue
+            item = record["data"]
+            for keyword in later_keywords.get((platform, item.get(ID_FIELDS[platform])), ()):
+                if keyword not in item["search_keywords"]:
+                    item["search_keywords"].append(keyword)
+            yield item
+
+    write_json(filename, {
+        "douyin": StreamedList(lambda: items("douyin")),
+        "xiaohongshu": StreamedList(lambda: items("xiaohongshu")),
+        "summary": summary
+    })
+
+
 def main():
     """Main execution function."""
-    researcher = XiaomiCarResearcher()
-
-    # Collect data
-    researcher.collect_data()
+    parser = argparse.ArgumentParser(description="小米汽车交通事故舆情研究")
+    parser.add_argument("--mode", choices=["serial", "async"], default="serial",
+                        help="collection mode (default: serial)")
+    parser.add_argument("--douyin-concurrency", type=int, default=DEFAULT_CONCURRENCY["douyin"],
+                        help="max in-flight Douyin searches in async mode")
+    parser.add_argument("--xiaohongshu-concurrency", type=int, default=DEFAULT_CONCURRENCY["xiaohongshu"],
+                        help="max in-flight Xiaohongshu searches in async mode")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always fetch from the API, bypassing the response cache")
+    parser.add_argument("--cache-only", action="store_true",
+                        help="use cached responses only, never touch the network")
+    parser.add_argument("--incremental", action="store_true",
+                        help="fetch only content newer than the stored watermarks and merge it "
+                             "into the latest saved dataset")
+    parser.add_argument("--base", default=None,
+                        help="dataset to merge into with --incremental (default: latest in output dir)")
+    restart = parser.add_mutually_exclusive_group()
+    restart.add_argument("--resume", action="store_true",
+                         help="resume an interrupted run, skipping requests it already completed")
+    restart.add_argument("--fresh", action="store_true",
+                         help="start over even if an interrupted run left a journal (it is kept as .old)")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+                        help="response cache size cap in MB")
+    parser.add_argument("--no-store", action="store_true",
+                        help="do not record the run in the research database")
+    parser.add_argument("--archive-responses", nargs="?", const=str(DEFAULT_ARCHIVE_PATH), metavar="DIR",
+                        help="store every raw API response in a compressed, content-addressed archive")
+    parser.add_argument("--replay", nargs="?", const=str(DEFAULT_ARCHIVE_PATH), metavar="DIR",
+                        help="re-run the collection from an archive of raw responses instead of the API")
+    parser.add_argument("--as-of", metavar="TIME",
+                        help="with --replay, replay the archive as of YYYY-MM-DD[ HH:MM[:SS]]")
+    parser.add_argument("--export", metavar="JSONL",
+                        help="only derive the JSON dataset from a streamed JSONL file "
+                             "(e.g. one left by an interrupted run) and exit")
+    args = parser.parse_args()
+
+    if args.export:
+        filename = str(Path(args.export).with_suffix(".json"))
+        export_results(Path(args.export), filename)
+        print(f"数据已导出到: {filename}")
+        return
+
+    LEXICONS.memo = ClassificationMemo(path=MEMO_PATH)
+    try:
+        journal = CheckpointJournal(JOURNAL_PATH, resume=args.resume, fresh=args.fresh)
+    except FileExistsError:
+        parser.error(f"上次采集未完成 ({JOURNAL_PATH}), 使用 --resume 继续或 --fresh 重新开始")
+    if args.resume:
+        print(f"断点续采: 已完成 {len(journal)} 个请求单元")
+
+    sink = JsonlSink(OUTPUT_DIR / f"xiaomi_car_research_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+    store = None if args.no_store else ResearchStore(STORE_PATH)
+    archive = ResponseArchive(args.archive_responses) if args.archive_responses else None
+    replay = ReplayClient(ResponseArchive(args.replay), as_of=parse_time(args.as_of)) if args.replay else None
+    try:
+        researcher = XiaomiCarResearcher(
+            cache=not args.no_cache,
+            cache_only=args.cache_only,
+            cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+            journal=journal,
+            sink=sink,
+            store=store,
+            archive=archive,
+            replay=replay
+        )
 
-    # Generate and display report
-    report = researcher.generate_report()
-    print("\n" + report)
+        if args.incremental:
+            base = args.base
+            if base is None:
+                previous = list(OUTPUT_DIR.glob("xiaomi_car_research_*.json"))
+                base = max(previous, key=lambda p: p.stat().st_mtime) if previous else None
+            if base:
+                researcher.load_results(base)
 
-    # Save results
-    researcher.save_results()
-    researcher.save_report()
+        # Collect data
+        try:
+            researcher.collect_data(
+                mode=args.mode,
+                concurrency={
+                    "douyin": args.douyin_concurrency,
+                    "xiaohongshu": args.xiaohongshu_concurrency
+                },
+                incremental=args.incremental
+            )
+        except KeyboardInterrupt:
+            print("\n采集已中断, 使用 --resume 继续")
+            return
+        journal.close()
+
+        # Generate and display report
+        report = researcher.generate_report()
+        print("\n" + report)
+
+        # Save results
+        researcher.save_results()
+        researcher.save_report()
+        # The run is complete; a later --resume must not replay it
+        journal.discard()
+
+        print(sink.summary())
+        if store is not None:
+            print(store.summary())
+        for line in client_summaries(researcher.client):
+            print(line)
+        if replay is not None:
+            print(replay.summary())
+        if archive is not None:
+            print(archive.summary())
+    finally:
+        # Every exit path, including an interrupted collection, closes what was opened
+        journal.close()
+        sink.close()
+        if store is not None:
+            store.close()
+        if archive is not None:
+            archive.close()
+        if replay is not None:
+            replay.archive.close()
+        # Kept on interrupt too: the results memoized so far are what a --resume reuses
+        LEXICONS.memo.save()
+    for line in LEXICONS.summary():
+        print(line)
 
 
 if __name__ == '__main__':
@@ -5,16 +5,28 @@ Using TikHub API to research IRON robot mentions across Chinese social media pla
 Platforms: Weibo (微博), Douyin (抖音), Xiaohongshu (小红书), Bilibili (B站), Zhihu (知乎)
 """
 
-import json
+import argparse
+import inspect
 import sys
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, Any, List, Optional
-from collections import Counter
 
 # Import the TikHub API client
 sys.path.append('D:\\social_research\\.claude\\skills\\tikhub-api-helper')
 from api_client import TikHubAPIClient
+from pagination import PagedSearch
+from tikhub_client import BACKOFF_CAP, DEFAULT_MAX_RETRIES, build_client, client_summaries
+from run_state import CheckpointJournal
+from sentiment import ClassificationMemo, classify_sentiment, engagement_count, score_batch
+from lexicon_registry import LexiconRegistry
+from aggregates import GroupedAggregator, StreamAggregator
+from topics import discover_topics
+from result_sink import JsonlSink, StreamedList, iter_jsonl, write_json
+from response_archive import DEFAULT_ARCHIVE_PATH, ReplayClient, ResponseArchive, parse_time
 
 
 # Search keywords for XPENG IRON robot
@@ -26,25 +38,36 @@ SEARCH_KEYWORDS = [
     "IRON 机器人 小鹏"
 ]
 
-# Positive sentiment keywords (Chinese)
-POSITIVE_KEYWORDS = [
-    "期待", "棒", "厉害", "喜欢", "不错", "强", "创新",
-    "酷", "amazing", "好", "赞", "支持", "牛逼", "厉害了",
-    "未来", "科技感", "智能", "先进", "震撼", "惊艳"
-]
+# Sentiment lexicons of this research topic, see lexicons/xpeng_iron_robot.json
+LEXICON_NAME = 'xpeng_iron_robot'
 
-# Negative sentiment keywords (Chinese)
-NEGATIVE_KEYWORDS = [
-    "失望", "差", "不行", "问题", "难用", "bug", "故障",
-    "贵", "不值", "后悔", "坑", "吐槽", "差评", "垃圾",
-    "担心", "质疑", "怀疑", "忽悠", "炒作"
-]
+# Classification results are memoized across runs; main() attaches the persisted memo
+MEMO_PATH = Path(__file__).parent / '.cache' / 'classification_memo.json'
+LEXICONS = LexiconRegistry(memo=ClassificationMemo())
 
-# Neutral/analytical keywords
-NEUTRAL_KEYWORDS = [
-    "发布", "上市", "介绍", "评测", "分析", "对比",
-    "参数", "价格", "配置", "功能", "特点", "详情"
-]
+
+# Checkpoint journal used by --resume
+JOURNAL_PATH = 'xpeng_iron_robot_research.journal.jsonl'
+
+# Collected records, streamed as each platform completes; the raw data JSON is derived from it
+RAW_DATA_FILE = 'xpeng_iron_robot_research_raw_data.json'
+RAW_RECORDS_FILE = 'xpeng_iron_robot_research_raw_data.jsonl'
+
+# Full API payloads of the collected items, kept only with --raw-archive
+RAW_ARCHIVE_FILE = 'xpeng_iron_robot_research_payloads.jsonl.gz'
+
+# Pages fetched per keyword search; raise for full coverage of large topics
+SEARCH_MAX_PAGES = 1
+
+# Comment fetching stage: worker pool size
+COMMENT_WORKERS = 8
+
+# HTTP timeout of every API request (seconds), so a stalled request frees its worker
+REQUEST_TIMEOUT = 15
+
+# Longest wait for one comment request (seconds): every retry of the rate limiter timing out,
+# plus its longest backoff. Also the bound when the client cannot take an HTTP timeout
+COMMENT_DEADLINE = REQUEST_TIMEOUT * (DEFAULT_MAX_RETRIES + 1) + BACKOFF_CAP
 
 
 def analyze_sentiment(text: str) -> str:
@@ -55,19 +78,332 @@ def analyze_sentiment(text: str) -> str:
     if not text:
         return 'neutral'
 
-    text_lower = text.lower()
-    positive_count = sum(1 for kw in POSITIVE_KEYWORDS if kw in text_lower)
-    negative_count = sum(1 for kw in NEGATIVE_KEYWORDS if kw in text_lower)
+    return classify_sentiment(LEXICONS.matcher(LEXICON_NAME, 'sentiment'), text,
+                              model=LEXICONS.model(LEXICON_NAME, 'sentiment'))
 
-    if positive_count > negative_count:
-        return 'positive'
-    elif negative_count > positive_count:
-        return 'negative'
-    else:
-        return 'neutral'
+
+def annotate_sentiment(items: List[Dict[str, Any]], text_of) -> None:
+    """
+    Label a batch of posts or comments with '_sentiment' in one pass
+    """
+    batch = score_batch(LEXICONS.matcher(LEXICON_NAME, 'sentiment'), [text_of(item) for item in items],
+                        model=LEXICONS.model(LEXICON_NAME, 'sentiment'))
+    for item, label in zip(items, batch.labels):
+        item['_sentiment'] = label
+
+
+# Fields kept of each platform's posts and comments, as dotted paths into the API
+# item; everything else in the payload is dropped at ingestion (see project)
+POST_FIELDS = {
+    'weibo': ('id', 'mid', 'text', 'title', 'created_at', 'user.screen_name',
+              'attitudes_count', 'comments_count', 'reposts_count'),
+    'douyin': ('aweme_id', 'desc', 'title', 'create_time', 'author.nickname',
+               'statistics.digg_count', 'statistics.comment_count',
+               'aweme_info.aweme_id', 'aweme_info.desc', 'aweme_info.create_time', 'aweme_info.author.nickname',
+               'aweme_info.statistics.digg_count', 'aweme_info.statistics.comment_count'),
+    'xiaohongshu': ('id', 'note_id', 'title', 'note_title', 'desc', 'note_desc', 'time', 'user.nickname',
+                    'liked_count', 'comment_count'),
+    'bilibili': ('id', 'bvid', 'title', 'description', 'pubdate', 'author', 'view', 'like'),
+    'zhihu': ('id', 'title', 'excerpt', 'created_time', 'author.name', 'voteup_count')
+}
+COMMENT_FIELDS = {
+    'weibo': ('id', 'text', 'created_at', 'user.screen_name', 'like_count'),
+    'xiaohongshu': ('id', 'content', 'create_time', 'user_info.nickname', 'like_count'),
+    'bilibili': ('rpid', 'content.message', 'ctime', 'member.uname', 'like')
+}
+
+
+def _field_tree(paths) -> Dict[str, Any]:
+    """
+    Nest dotted field paths: ('id', 'user.name') -> {'id': None, 'user': {'name': None}}
+    """
+    tree = {}
+    for path in paths:
+        node = tree
+        *parents, leaf = path.split('.')
+        for key in parents:
+            node = node.setdefault(key, {})
+        node[leaf] = None
+    return tree
+
+
+POST_PROJECTIONS = {platform: _field_tree(paths) for platform, paths in POST_FIELDS.items()}
+COMMENT_PROJECTIONS = {platform: _field_tree(paths) for platform, paths in COMMENT_FIELDS.items()}
 
 
-def search_weibo(client: TikHubAPIClient, keywords: List[str]) -> Dict[str, Any]:
+def _project(item: Dict[str, Any], tree: Dict[str, Any]) -> Dict[str, Any]:
+    projected = {}
+    for key, subtree in tree.items():
+        if key not in item:
+            continue
+        value = item[key]
+        if subtree is None:
+            projected[key] = value
+        elif isinstance(value, dict):
+            projected[key] = _project(value, subtree)
+    return projected
+
+
+def project(platform: str, item: Dict[str, Any], comments: bool = False,
+            archive: Optional[JsonlSink] = None) -> Dict[str, Any]:
+    """
+    Keep only the fields the analysis and reports use of a post (or comment)
+    The full payload goes to the archive first, if given; platforms without a
+    projection spec keep their items whole
+    """
+    if archive is not None:
+        archive.write({'type': 'comments' if comments else 'posts', 'platform': platform, 'data': item})
+    tree = (COMMENT_PROJECTIONS if comments else POST_PROJECTIONS).get(platform)
+    return _project(item, tree) if tree is not None else item
+
+
+def _douyin_likes(video: Dict[str, Any]) -> Any:
+    stats = (video.get('aweme_info') or video).get('statistics')
+    return stats.get('digg_count') if isinstance(stats, dict) else 0
+
+
+# Like counts of posts and comments per platform, used to weight sentiment
+POST_LIKES = {
+    'weibo': lambda post: post.get('attitudes_count'),
+    'douyin': _douyin_likes,
+    'xiaohongshu': lambda note: note.get('liked_count'),
+    'bilibili': lambda video: video.get('like'),
+    'zhihu': lambda article: article.get('voteup_count')
+}
+COMMENT_LIKES = {
+    'weibo': lambda comment: comment.get('like_count'),
+    'douyin': lambda comment: comment.get('digg_count'),
+    'xiaohongshu': lambda comment: comment.get('like_count'),
+    'bilibili': lambda comment: comment.get('like'),
+    'zhihu': lambda comment: comment.get('like_count')
+}
+
+
+def _douyin_text(video: Dict[str, Any]) -> str:
+    if video.get('aweme_info'):
+        return video['aweme_info'].get('desc', '')
+    return video.get('desc', '') or video.get('title', '')
+
+
+def _bilibili_comment_text(comment: Dict[str, Any]) -> str:
+    content = comment.get('content')
+    return content.get('message', '') if isinstance(content, dict) else ''
+
+
+# Analyzed text of posts and comments per platform
+POST_TEXTS = {
+    'weibo': lambda post: post.get('text', '') or post.get('title', ''),
+    'douyin': _douyin_text,
+    'xiaohongshu': lambda note: ((note.get('title', '') or note.get('note_title', '')) + ' ' +
+                                 (note.get('desc', '') or note.get('note_desc', ''))),
+    'bilibili': lambda video: video.get('title', '') or video.get('description', ''),
+    'zhihu': lambda article: article.get('title', '') or article.get('excerpt', '')
+}
+COMMENT_TEXTS = {
+    'weibo': lambda comment: comment.get('text', ''),
+    'xiaohongshu': lambda comment: comment.get('content', ''),
+    'bilibili': _bilibili_comment_text
+}
+
+
+def item_text(platform: str, item: Any, comments: bool = False) -> str:
+    """
+    Analyzed text of one of a platform's posts (or comments)
+    """
+    text_of = (COMMENT_TEXTS if comments else POST_TEXTS).get(platform)
+    return str(text_of(item) or '') if text_of and isinstance(item, dict) else ''
+
+
+def engagement_weight(platform: str, item: Any, comments: bool = False) -> float:
+    """
+    Like count of one of a platform's posts (or comments), for like-weighted sentiment
+    """
+    if not isinstance(item, dict):
+        return 0.0
+    likes_of = (COMMENT_LIKES if comments else POST_LIKES).get(platform)
+    return engagement_count(likes_of(item)) if likes_of else 0.0
+
+
+def engagement_weights(platform: str, items: List[Dict[str, Any]], comments: bool = False) -> List[float]:
+    """
+    Like counts of a platform's posts (or comments), for like-weighted sentiment
+    """
+    return [engagement_weight(platform, item, comments) for item in items]
+
+
+class ReportStats:
+    """
+    Streaming statistics of the collected posts and comments, per platform and overall
+    Fed platform by platform as collection proceeds; reports read the precomputed state
+    """
+
+    def __init__(self):
+        self.posts = GroupedAggregator(lambda platform: self._aggregator(platform, comments=False))
+        self.comments = GroupedAggregator(lambda platform: self._aggregator(platform, comments=True))
+
+    @staticmethod
+    def _aggregator(platform: Optional[str], comments: bool) -> StreamAggregator:
+        return StreamAggregator(
+            label_of=lambda item: item.get('_sentiment', 'neutral'),
+            weight_of=lambda item: engagement_weight(platform, item, comments),
+            keywords=LEXICONS.matcher(LEXICON_NAME, 'sentiment'),
+            text_of=lambda item: item_text(platform, item, comments)
+        )
+
+    def add_platform(self, platform: str, data: Dict[str, Any]):
+        """
+        Fold one platform's collected posts and comments into the statistics
+        """
+        self.posts.extend(platform, data.get('posts', []))
+        self.comments.extend(platform, data.get('comments', []))
+
+    @classmethod
+    def from_results(cls, all_results: Dict[str, Any]) -> 'ReportStats':
+        """
+        Statistics of already collected results
+        """
+        stats = cls()
+        for platform, data in all_results.items():
+            stats.add_platform(platform, data)
+        return stats
+
+
+def _as_list(data: Any) -> List[Any]:
+    """
+    Normalize a search response's data field to a list of items
+    """
+    return data if isinstance(data, list) else [data] if data else []
+
+
+def _douyin_items(data: Any) -> List[Any]:
+    """
+    Douyin search data might be a list or a dict wrapping the list
+    """
+    if isinstance(data, dict) and data.get('data'):
+        return data.get('data', [])
+    return _as_list(data)
+
+
+def _next_page(data: Any, page: int, items: List[Dict[str, Any]]) -> int:
+    """
+    Next page number for page-numbered search endpoints
+    """
+    return page + 1
+
+
+def _next_cursor(data: Any, cursor: int, items: List[Dict[str, Any]]) -> int:
+    """
+    Next cursor, taken from the response when the API returns one
+    """
+    if isinstance(data, dict) and data.get('cursor') is not None:
+        return data['cursor']
+    return cursor + len(items)
+
+
+def _next_offset(data: Any, offset: int, items: List[Dict[str, Any]]) -> int:
+    """
+    Next offset for offset/limit search endpoints
+    """
+    return offset + len(items)
+
+
+def iter_search(client: TikHubAPIClient, method: str, endpoint: str, params: Dict[str, Any],
+                extract_items, id_of, label: str = 'items', max_pages: Optional[int] = SEARCH_MAX_PAGES,
+                target_count: Optional[int] = None, since: Optional[int] = None, time_of=None,
+                page_param: str = 'page', first_token: Any = 1, next_token=_next_page) -> PagedSearch:
+    """
+    Lazily page through a search endpoint, yielding dict items page by page
+    Stops early on target_count, the `since` cutoff, a page with no new IDs,
+    an empty page or max_pages (see PagedSearch)
+    """
+    send = client.post if method == 'POST' else client.get
+
+    def fetch_page(token):
+        response = send(endpoint, dict(params, **{page_param: token}))
+        if not isinstance(response, dict):
+            return None
+        if 'error' in response:
+            print(f"  Error: {response.get('error')}")
+            return None
+        return response
+
+    def parse_page(response, token):
+        data = response.get('data')
+        items = [item for item in extract_items(data) if isinstance(item, dict)]
+        print(f"  Found {len(items)} {label}")
+        has_more = bool(items) and not (isinstance(data, dict) and data.get('has_more') in (0, False))
+        return items, next_token(data, token, items), has_more
+
+    return PagedSearch(fetch_page, parse_page, id_of=id_of, time_of=time_of, first_token=first_token,
+                       target_count=target_count, since=since, max_pages=max_pages)
+
+
+def api_client(timeout: float = REQUEST_TIMEOUT) -> TikHubAPIClient:
+    """
+    The TikHub API client with an HTTP request timeout. A client that takes no
+    timeout is used as is, with a warning: fetch_comments then only bounds how
+    long it waits (COMMENT_DEADLINE), and a stalled request keeps its worker
+    """
+    parameters = inspect.signature(TikHubAPIClient).parameters.values()
+    if any(p.name == 'timeout' or p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters):
+        return TikHubAPIClient(use_china_domain=True, timeout=timeout)
+    print(f"警告: TikHubAPIClient 不支持请求超时, 评论请求仅按 {COMMENT_DEADLINE:.0f} 秒截止等待")
+    return TikHubAPIClient(use_china_domain=True)
+
+
+def _timed_out(response: Any) -> bool:
+    error = str(response.get('error', '')).lower() if isinstance(response, dict) else ''
+    return 'timeout' in error or 'timed out' in error
+
+
+def fetch_comments(client: TikHubAPIClient, endpoint: str, requests_by_id: Dict[str, Dict[str, Any]],
+                   max_workers: int = COMMENT_WORKERS, deadline: float = COMMENT_DEADLINE):
+    """
+    Fetch comments for many posts on a bounded worker pool
+    requests_by_id maps post id -> request params. Returns (responses, stats) where
+    responses maps post id -> API response for every request that succeeded, in
+    request order, and stats counts succeeded, failed and timed-out requests.
+    Requests are bounded by the client's HTTP timeout (see api_client); waiting
+    for each is also capped at deadline seconds, so a hung request can never
+    block the run
+    """
+    stats = {'requested': len(requests_by_id), 'succeeded': 0, 'failed': 0, 'timed_out': 0}
+    responses = {}
+    if not requests_by_id:
+        return responses, stats
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {post_id: pool.submit(client.get, endpoint, params) for post_id, params in requests_by_id.items()}
+        for post_id, future in futures.items():
+            try:
+                response = future.result(timeout=deadline)
+            except FutureTimeoutError:
+                print(f"  Comment request for {post_id} timed out after {deadline:g}s")
+                stats['timed_out'] += 1
+                continue
+            except Exception as e:
+                print(f"  Comment request for {post_id} failed: {e}")
+                stats['failed'] += 1
+                continue
+            if isinstance(response, dict) and 'error' not in response:
+                responses[post_id] = response
+                stats['succeeded'] += 1
+            elif _timed_out(response):
+                stats['timed_out'] += 1
+            else:
+                stats['failed'] += 1
+    finally:
+        # Without waiting: a request past its deadline must not hold up the run
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    print(f"  Comments fetched for {stats['succeeded']}/{stats['requested']} posts "
+          f"({stats['failed']} failed, {stats['timed_out']} timed out)")
+    return responses, stats
+
+
+def search_weibo(client: TikHubAPIClient, keywords: List[str],
+                 max_pages: int = SEARCH_MAX_PAGES, archive: Optional[JsonlSink] = None) -> Dict[str, Any]:
     """
     Search Weibo for IRON robot mentions
     """
@@ -77,56 +413,43 @@ def search_weibo(client: TikHubAPIClient, keywords: List[str]) -> Dict[str, Any]
 
     all_results = []
     all_comments = []
+    comment_requests = {}
 
     for keyword in keywords:
         print(f"Searching for: {keyword}")
         try:
             # Use real-time search - correct parameter is 'query' not 'keyword'
-            params = {
-                "query": keyword,
-                "page": 1
-            }
-            response = client.get("/api/v1/weibo/web_v2/fetch_realtime_search", params)
-
-            if isinstance(response, dict):
-                if 'error' not in response and response.get('data'):
-                    data = response.get('data', [])
-                    # Handle different data structures
-                    posts = data if isinstance(data, list) else [data] if data else []
-                    print(f"  Found {len(posts)} posts")
-
-                    for post in posts:
-                        # Skip if post is not a dict
-                        if not isinstance(post, dict):
-                            continue
-                        post['_source_keyword'] = keyword
-                        post['_platform'] = 'weibo'
-
-                        # Analyze sentiment
-                        title = post.get('text', '') or post.get('title', '')
-                        post['_sentiment'] = analyze_sentiment(title)
-
-                        all_results.append(post)
-
-                        # Collect post comments if available
-                        post_id = post.get('id') or post.get('mid')
-                        if post_id:
-                            try:
-                                comment_params = {"id": post_id, "count": 10}
-                                comments = client.get("/api/v1/weibo/web_v2/fetch_post_comments", comment_params)
-                                if isinstance(comments, dict) and comments.get('data'):
-                                    for comment in comments.get('data', []):
-                                        comment['_post_id'] = post_id
-                                        comment['_sentiment'] = analyze_sentiment(comment.get('text', ''))
-                                        all_comments.append(comment)
-                            except Exception as e:
-                                pass  # Silent fail for comments
-
-                elif 'error' in response:
-                    print(f"  Error: {response.get('error')}")
+            posts = iter_search(client, 'GET', "/api/v1/weibo/web_v2/fetch_realtime_search",
+                                {"query": keyword},
+                                _as_list, lambda post: post.get('id') or post.get('mid'),
+                                label='posts', max_pages=max_pages)
+            for post in posts:
+                post = project('weibo', post, archive=archive)
+                post['_source_keyword'] = keyword
+                post['_platform'] = 'weibo'
+                all_results.append(post)
+
+                # Queue post comments for the comment stage
+                post_id = post.get('id') or post.get('mid')
+                if post_id and post_id not in comment_requests:
+                    comment_requests[post_id] = {"id": post_id, "count": 10}
         except Exception as e:
             print(f"  Exception: {e}")
 
+    # Analyze sentiment of all posts in one batch
+    annotate_sentiment(all_results, POST_TEXTS['weibo'])
+
+    # Fetch all post comments concurrently, then attach them in post order
+    responses, comment_stats = fetch_comments(client, "/api/v1/weibo/web_v2/fetch_post_comments", comment_requests)
+    for post_id, comments in responses.items():
+        if comments.get('data'):
+            for comment in comments.get('data', []):
+                if isinstance(comment, dict):
+                    comment = project('weibo', comment, comments=True, archive=archive)
+                    comment['_post_id'] = post_id
+                    all_comments.append(comment)
+    annotate_sentiment(all_comments, COMMENT_TEXTS['weibo'])
+
     print(f"\nTotal Weibo posts collected: {len(all_results)}")
     print(f"Total Weibo comments collected: {len(all_comments)}")
 
@@ -134,11 +457,13 @@ def search_weibo(client: TikHubAPIClient, keywords: List[str]) -> Dict[str, Any]
         'posts': all_results,
         'comments': all_comments,
         'total_posts': len(all_results),
-        'total_comments': len(all_comments)
+        'total_comments': len(all_comments),
+        'comment_stats': comment_stats
     }
 
 
-def search_douyin(client: TikHubAPIClient, keywords: List[str]) -> Dict[str, Any]:
+def search_douyin(client: TikHubAPIClient, keywords: List[str],
+                  max_pages: int = SEARCH_MAX_PAGES, archive: Optional[JsonlSink] = None) -> Dict[str, Any]:
     """
     Search Douyin for IRON robot mentions
     """
@@ -152,47 +477,23 @@ def search_douyin(client: TikHubAPIClient, keywords: List[str]) -> Dict[str, Any
     for keyword in keywords:
         print(f"Searching for: {keyword}")
         try:
-            # Use general search V3
-            params = {
-                "keyword": keyword,
-                "count": 20,
-                "search_type": "video"  # Search for videos
-            }
-            response = client.post("/api/v1/douyin/search/fetch_general_search_v3", params)
-
-            if isinstance(response, dict):
-                if 'error' not in response and response.get('data'):
-                    data = response.get('data', [])
-                    # Handle different data structures - data might be a list or contain aweme_info
-                    if isinstance(data, list):
-                        videos = data
-                    elif isinstance(data, dict) and data.get('data'):
-                        videos = data.get('data', [])
-                    else:
-                        videos = [data] if data else []
-                    print(f"  Found {len(videos)} videos")
-
-                    for video in videos:
-                        # Skip if video is not a dict
-                        if not isinstance(video, dict):
-                            continue
-                        video['_source_keyword'] = keyword
-                        video['_platform'] = 'douyin'
-
-                        # Analyze sentiment - video might be in aweme_info
-                        if video.get('aweme_info'):
-                            desc = video['aweme_info'].get('desc', '')
-                        else:
-                            desc = video.get('desc', '') or video.get('title', '')
-                        video['_sentiment'] = analyze_sentiment(desc)
-
-                        all_results.append(video)
-
-                elif 'error' in response:
-                    print(f"  Error: {response.get('error')}")
+            # Use general search V3, following the response cursor
+            videos = iter_search(client, 'POST', "/api/v1/douyin/search/fetch_general_search_v3",
+                                 {"keyword": keyword, "count": 20, "search_type": "video"},
+                                 _douyin_items, lambda video: (video.get('aweme_info') or video).get('aweme_id'),
+                                 label='videos', max_pages=max_pages,
+                                 page_param='cursor', first_token=0, next_token=_next_cursor)
+            for video in videos:
+                video = project('douyin', video, archive=archive)
+                video['_source_keyword'] = keyword
+                video['_platform'] = 'douyin'
+                all_results.append(video)
         except Exception as e:
             print(f"  Exception: {e}")
 
+    # Analyze sentiment - video might be in aweme_info
+    annotate_sentiment(all_results, POST_TEXTS['douyin'])
+
     print(f"\nTotal Douyin videos collected: {len(all_results)}")
 
     return {
@@ -203,7 +504,8 @@ def search_douyin(client: TikHubAPIClient, keywords: List[str]) -> Dict[str, Any
     }
 
 
-def search_xiaohongshu(client: TikHubAPIClient, keywords: List[str]) -> Dict[str, Any]:
+def search_xiaohongshu(client: TikHubAPIClient, keywords: List[str],
+                       max_pages: int = SEARCH_MAX_PAGES, archive: Optional[JsonlSink] = None) -> Dict[str, Any]:
     """
     Search Xiaohongshu for IRON robot mentions
     """
@@ -213,58 +515,43 @@ def search_xiaohongshu(client: TikHubAPIClient, keywords: List[str]) -> Dict[str
 
     all_results = []
     all_comments = []
+    comment_requests = {}
 
     for keyword in keywords:
         print(f"Searching for: {keyword}")
         try:
             # Use search notes V2 - correct parameter is 'keywords' not 'keyword'
-            params = {
-                "keywords": keyword,
-                "page": 1
-            }
-            response = client.get("/api/v1/xiaohongshu/web_v2/fetch_search_notes", params)
-
-            if isinstance(response, dict):
-                if 'error' not in response and response.get('data'):
-                    data = response.get('data', [])
-                    # Handle different data structures
-                    notes = data if isinstance(data, list) else [data] if data else []
-                    print(f"  Found {len(notes)} notes")
-
-                    for note in notes:
-                        # Skip if note is not a dict
-                        if not isinstance(note, dict):
-                            continue
-                        note['_source_keyword'] = keyword
-                        note['_platform'] = 'xiaohongshu'
-
-                        # Analyze sentiment
-                        title = note.get('title', '') or note.get('note_title', '')
-                        desc = note.get('desc', '') or note.get('note_desc', '')
-                        note['_sentiment'] = analyze_sentiment(title + ' ' + desc)
-
-                        all_results.append(note)
-
-                        # Collect note comments
-                        note_id = note.get('id') or note.get('note_id')
-                        if note_id:
-                            try:
-                                comment_params = {"note_id": note_id, "count": 10}
-                                comments = client.get("/api/v1/xiaohongshu/web_v2/fetch_note_comments", comment_params)
-                                if isinstance(comments, dict) and comments.get('data'):
-                                    for comment in comments.get('data', []):
-                                        if isinstance(comment, dict):
-                                            comment['_note_id'] = note_id
-                                            comment['_sentiment'] = analyze_sentiment(comment.get('content', ''))
-                                            all_comments.append(comment)
-                            except Exception as e:
-                                pass
-
-                elif 'error' in response:
-                    print(f"  Error: {response.get('error')}")
+            notes = iter_search(client, 'GET', "/api/v1/xiaohongshu/web_v2/fetch_search_notes",
+                                {"keywords": keyword},
+                                _as_list, lambda note: note.get('id') or note.get('note_id'),
+                                label='notes', max_pages=max_pages)
+            for note in notes:
+                note = project('xiaohongshu', note, archive=archive)
+                note['_source_keyword'] = keyword
+                note['_platform'] = 'xiaohongshu'
+                all_results.append(note)
+
+                # Queue note comments for the comment stage
+                note_id = note.get('id') or note.get('note_id')
+                if note_id and note_id not in comment_requests:
+                    comment_requests[note_id] = {"note_id": note_id, "count": 10}
         except Exception as e:
             print(f"  Exception: {e}")
 
+    # Analyze sentiment of all notes in one batch
+    annotate_sentiment(all_results, POST_TEXTS['xiaohongshu'])
+
+    # Fetch all note comments concurrently, then attach them in note order
+    responses, comment_stats = fetch_comments(client, "/api/v1/xiaohongshu/web_v2/fetch_note_comments", comment_requests)
+    for note_id, comments in responses.items():
+        if comments.get('data'):
+            for comment in comments.get('data', []):
+                if isinstance(comment, dict):
+                    comment = project('xiaohongshu', comment, comments=True, archive=archive)
+                    comment['_note_id'] = note_id
+                    all_comments.append(comment)
+    annotate_sentiment(all_comments, COMMENT_TEXTS['xiaohongshu'])
+
     print(f"\nTotal Xiaohongshu notes collected: {len(all_results)}")
     print(f"Total Xiaohongshu comments collected: {len(all_comments)}")
 
@@ -272,11 +559,13 @@ def search_xiaohongshu(client: TikHubAPIClient, keywords: List[str]) -> Dict[str
         'posts': all_results,
         'comments': all_comments,
         'total_posts': len(all_results),
-        'total_comments': len(all_comments)
+        'total_comments': len(all_comments),
+        'comment_stats': comment_stats
     }
 
 
-def search_bilibili(client: TikHubAPIClient, keywords: List[str]) -> Dict[str, Any]:
+def search_bilibili(client: TikHubAPIClient, keywords: List[str],
+                    max_pages: int = SEARCH_MAX_PAGES, archive: Optional[JsonlSink] = None) -> Dict[str, Any]:
     """
     Search Bilibili for IRON robot mentions
     """
@@ -286,60 +575,43 @@ def search_bilibili(client: TikHubAPIClient, keywords: List[str]) -> Dict[str, A
 
     all_results = []
     all_comments = []
+    comment_requests = {}
 
     for keyword in keywords:
         print(f"Searching for: {keyword}")
         try:
             # Use general search - all parameters are required
-            params = {
-                "keyword": keyword,
-                "order": "totalrank",  # 综合排序
-                "page": 1,
-                "page_size": 20
-            }
-            response = client.get("/api/v1/bilibili/web/fetch_general_search", params)
-
-            if isinstance(response, dict):
-                if 'error' not in response and response.get('data'):
-                    data = response.get('data', [])
-                    # Handle different data structures
-                    videos = data if isinstance(data, list) else [data] if data else []
-                    print(f"  Found {len(videos)} videos")
-
-                    for video in videos:
-                        # Skip if video is not a dict
-                        if not isinstance(video, dict):
-                            continue
-                        video['_source_keyword'] = keyword
-                        video['_platform'] = 'bilibili'
-
-                        # Analyze sentiment
-                        title = video.get('title', '') or video.get('description', '')
-                        video['_sentiment'] = analyze_sentiment(title)
-
-                        all_results.append(video)
-
-                        # Collect video comments
-                        bvid = video.get('bvid') or video.get('id')
-                        if bvid:
-                            try:
-                                comment_params = {"bvid": bvid, "oid": bvid}
-                                comments = client.get("/api/v1/bilibili/web/fetch_video_comments", comment_params)
-                                if isinstance(comments, dict) and comments.get('data'):
-                                    for comment in comments.get('data', []):
-                                        if isinstance(comment, dict):
-                                            comment['_bvid'] = bvid
-                                            content = comment.get('content', {}).get('message', '') if isinstance(comment.get('content'), dict) else ''
-                                            comment['_sentiment'] = analyze_sentiment(content)
-                                            all_comments.append(comment)
-                            except Exception as e:
-                                pass
-
-                elif 'error' in response:
-                    print(f"  Error: {response.get('error')}")
+            videos = iter_search(client, 'GET', "/api/v1/bilibili/web/fetch_general_search",
+                                 {"keyword": keyword, "order": "totalrank", "page_size": 20},
+                                 _as_list, lambda video: video.get('bvid') or video.get('id'),
+                                 label='videos', max_pages=max_pages)
+            for video in videos:
+                video = project('bilibili', video, archive=archive)
+                video['_source_keyword'] = keyword
+                video['_platform'] = 'bilibili'
+                all_results.append(video)
+
+                # Queue video comments for the comment stage
+                bvid = video.get('bvid') or video.get('id')
+                if bvid and bvid not in comment_requests:
+                    comment_requests[bvid] = {"bvid": bvid, "oid": bvid}
         except Exception as e:
             print(f"  Exception: {e}")
 
+    # Analyze sentiment of all videos in one batch
+    annotate_sentiment(all_results, POST_TEXTS['bilibili'])
+
+    # Fetch all video comments concurrently, then attach them in video order
+    responses, comment_stats = fetch_comments(client, "/api/v1/bilibili/web/fetch_video_comments", comment_requests)
+    for bvid, comments in responses.items():
+        if comments.get('data'):
+            for comment in comments.get('data', []):
+                if isinstance(comment, dict):
+                    comment = project('bilibili', comment, comments=True, archive=archive)
+                    comment['_bvid'] = bvid
+                    all_comments.append(comment)
+    annotate_sentiment(all_comments, COMMENT_TEXTS['bilibili'])
+
     print(f"\nTotal Bilibili videos collected: {len(all_results)}")
     print(f"Total Bilibili comments collected: {len(all_comments)}")
 
@@ -347,11 +619,13 @@ def search_bilibili(client: TikHubAPIClient, keywords: List[str]) -> Dict[str, A
         'posts': all_results,
         'comments': all_comments,
         'total_posts': len(all_results),
-        'total_comments': len(all_comments)
+        'total_comments': len(all_comments),
+        'comment_stats': comment_stats
     }
 
 
-def search_zhihu(client: TikHubAPIClient, keywords: List[str]) -> Dict[str, Any]:
+def search_zhihu(client: TikHubAPIClient, keywords: List[str],
+                 max_pages: int = SEARCH_MAX_PAGES, archive: Optional[JsonlSink] = None) -> Dict[str, Any]:
     """
     Search Zhihu for IRON robot mentions
     """
@@ -366,37 +640,22 @@ def search_zhihu(client: TikHubAPIClient, keywords: List[str]) -> Dict[str, Any]
         print(f"Searching for: {keyword}")
         try:
             # Use article search V3 - correct parameter is 'keyword' not 'q'
-            params = {
-                "keyword": keyword,
-                "limit": 20
-            }
-            response = client.get("/api/v1/zhihu/web/fetch_article_search_v3", params)
-
-            if isinstance(response, dict):
-                if 'error' not in response and response.get('data'):
-                    data = response.get('data', [])
-                    # Handle different data structures
-                    articles = data if isinstance(data, list) else [data] if data else []
-                    print(f"  Found {len(articles)} articles")
-
-                    for article in articles:
-                        # Skip if article is not a dict
-                        if not isinstance(article, dict):
-                            continue
-                        article['_source_keyword'] = keyword
-                        article['_platform'] = 'zhihu'
-
-                        # Analyze sentiment
-                        title = article.get('title', '') or article.get('excerpt', '')
-                        article['_sentiment'] = analyze_sentiment(title)
-
-                        all_results.append(article)
-
-                elif 'error' in response:
-                    print(f"  Error: {response.get('error')}")
+            articles = iter_search(client, 'GET', "/api/v1/zhihu/web/fetch_article_search_v3",
+                                   {"keyword": keyword, "limit": 20},
+                                   _as_list, lambda article: article.get('id'),
+                                   label='articles', max_pages=max_pages,
+                                   page_param='offset', first_token=0, next_token=_next_offset)
+            for article in articles:
+                article = project('zhihu', article, archive=archive)
+                article['_source_keyword'] = keyword
+                article['_platform'] = 'zhihu'
+                all_results.append(article)
         except Exception as e:
             print(f"  Exception: {e}")
 
+    # Analyze sentiment of all articles in one batch
+    annotate_sentiment(all_results, POST_TEXTS['zhihu'])
+
     print(f"\nTotal Zhihu articles collected: {len(all_results)}")
 
     return {
@@ -407,27 +666,200 @@ def search_zhihu(client: TikHubAPIClient, keywords: List[str]) -> Dict[str, Any]
     }
 
 
-def generate_sentiment_report(platform_data: Dict[str, Any]) -> Dict[str, Any]:
+# Platform collectors, in the order they appear in all_results and the report
+PLATFORM_COLLECTORS = [
+    ('weibo', search_weibo),
+    ('douyin', search_douyin),
+    ('xiaohongshu', search_xiaohongshu),
+    ('bilibili', search_bilibili),
+    ('zhihu', search_zhihu)
+]
+
+
+def _run_collector(collector, client: TikHubAPIClient, keywords: List[str], max_pages: int,
+                   archive: Optional[JsonlSink] = None):
+    """
+    Run one platform collector, returning (platform_data, timing)
+    A collector that raises yields an empty result instead of aborting the run
+    """
+    start = time.perf_counter()
+    try:
+        data = collector(client, keywords, max_pages=max_pages, archive=archive)
+        status = 'ok'
+    except Exception as e:
+        print(f"  Collector {collector.__name__} failed: {e}")
+        data = {'posts': [], 'comments': [], 'total_posts': 0, 'total_comments': 0}
+        status = f'failed: {e}'
+    return data, {'seconds': round(time.perf_counter() - start, 3), 'status': status}
+
+
+def collect_all_platforms(client: TikHubAPIClient, keywords: List[str],
+                          parallel: bool = False, max_workers: Optional[int] = None,
+                          max_pages: int = SEARCH_MAX_PAGES, stats: Optional[ReportStats] = None,
+                          sink: Optional[JsonlSink] = None, archive: Optional[JsonlSink] = None):
+    """
+    Collect data from every platform, serially or on a worker pool
+    Returns (all_results, timings); all_results keeps PLATFORM_COLLECTORS order
+    either way, so the parallel output is identical to the serial one
+    Each platform's results are folded into stats and streamed to sink (if
+    given) as soon as they and those of the platforms before it are in
+    Items are projected to their POST_FIELDS / COMMENT_FIELDS at ingestion;
+    the full API payloads go to archive, if given
+    """
+    def completed(platform, data):
+        if stats is not None:
+            stats.add_platform(platform, data)
+        if sink is not None:
+            write_platform(sink, platform, data)
+
+    start = time.perf_counter()
+    runs = []
+    if parallel:
+        with ThreadPoolExecutor(max_workers=max_workers or len(PLATFORM_COLLECTORS)) as pool:
+            futures = [pool.submit(_run_collector, collector, client, keywords, max_pages, archive)
+                       for _, collector in PLATFORM_COLLECTORS]
+            for (platform, _), future in zip(PLATFORM_COLLECTORS, futures):
+                runs.append(future.result())
+                completed(platform, runs[-1][0])
+    else:
+        for platform, collector in PLATFORM_COLLECTORS:
+            runs.append(_run_collector(collector, client, keywords, max_pages, archive))
+            completed(platform, runs[-1][0])
+
+    all_results = {}
+    timings = {}
+    for (platform, _), (data, timing) in zip(PLATFORM_COLLECTORS, runs):
+        all_results[platform] = data
+        timings[platform] = timing
+    timings['_total'] = {'seconds': round(time.perf_counter() - start, 3),
+                         'status': 'parallel' if parallel else 'serial'}
+    return all_results, timings
+
+
+def write_platform(sink: JsonlSink, platform: str, data: Dict[str, Any]):
+    """
+    Stream one platform's results to the sink: a record per post and comment,
+    then the platform's remaining fields (counts, comment stats)
+    """
+    for kind in ('posts', 'comments'):
+        for item in data.get(kind, []):
+            sink.write({'type': kind, 'platform': platform, 'data': item})
+    sink.write({'type': 'platform', 'platform': platform, 'keys': list(data),
+                'data': {key: value for key, value in data.items() if key not in ('posts', 'comments')}})
+
+
+def export_raw_data(jsonl_path: str, filename: str):
+    """
+    Derive the raw data JSON (the layout of all_results) from streamed records,
+    writing posts and comments one at a time
+    """
+    platforms = {}
+    for record in iter_jsonl(jsonl_path):
+        if record['type'] == 'platform':
+            platforms[record['platform']] = record
+
+    def items(platform, kind):
+        for record in iter_jsonl(jsonl_path):
+            if record['type'] == kind and record['platform'] == platform:
+                yield record['data']
+
+    write_json(filename, {
+        platform: {
+            key: StreamedList(lambda platform=platform, key=key: items(platform, key))
+            if key in ('posts', 'comments') else record['data'][key]
+            for key in record['keys']
+        }
+        for platform, record in platforms.items()
+    })
+
+
+def print_collection_timings(timings: Dict[str, Dict[str, Any]]):
+    """
+    Print per-platform collection timings
+    """
+    print(f"\n{'='*70}")
+    print("PLATFORM TIMINGS")
+    print('='*70)
+    for platform, timing in timings.items():
+        if platform == '_total':
+            continue
+        print(f"  {platform:<12} {timing['seconds']:>8.2f}s  {timing['status']}")
+    total = timings.get('_total', {})
+    platform_sum = sum(t['seconds'] for p, t in timings.items() if p != '_total')
+    print(f"  {'total':<12} {total.get('seconds', 0):>8.2f}s  "
+          f"({total.get('status', '')}, platform sum {platform_sum:.2f}s)")
+
+
+def generate_sentiment_report(platform_data: Dict[str, Any], platform: Optional[str] = None,
+                              stats: Optional[ReportStats] = None) -> Dict[str, Any]:
     """
-    Generate sentiment analysis report for a platform
+    Generate sentiment analysis report for a platform, with like-weighted distributions
+    Reads the platform's streaming statistics when stats is given
     """
     posts = platform_data.get('posts', [])
-    comments = platform_data.get('comments', [])
+    if platform is None and posts:
+        platform = posts[0].get('_platform')
+    if stats is None:
+        stats = ReportStats()
+        stats.add_platform(platform, platform_data)
 
-    post_sentiments = [p.get('_sentiment', 'neutral') for p in posts]
-    comment_sentiments = [c.get('_sentiment', 'neutral') for c in comments]
+    post_stats = stats.posts.group(platform)
+    comment_stats = stats.comments.group(platform)
+    post_distribution = post_stats.labels()
 
     return {
-        'post_sentiment_distribution': dict(Counter(post_sentiments)),
-        'comment_sentiment_distribution': dict(Counter(comment_sentiments)),
-        'total_posts': len(posts),
-        'total_comments': len(comments),
-        'positive_posts': post_sentiments.count('positive'),
-        'negative_posts': post_sentiments.count('negative'),
-        'neutral_posts': post_sentiments.count('neutral')
+        'post_sentiment_distribution': post_distribution,
+        'comment_sentiment_distribution': comment_stats.labels(),
+        'post_like_weighted_distribution': post_stats.labels(weighted=True),
+        'comment_like_weighted_distribution': comment_stats.labels(weighted=True),
+        'total_posts': post_stats.count,
+        'total_comments': comment_stats.count,
+        'positive_posts': post_distribution.get('positive', 0),
+        'negative_posts': post_distribution.get('negative', 0),
+        'neutral_posts': post_distribution.get('neutral', 0)
     }
 
 
+def _weighted_shares(distribution: Dict[str, float]) -> str:
+    """
+    Format a like-weighted distribution as 正面/负面/中性 percentages
+    """
+    total = sum(distribution.values())
+    if not total:
+        return "无点赞数据"
+    return " / ".join(f"{name} {distribution.get(label, 0) / total * 100:.1f}%"
+                      for label, name in (('positive', '正面'), ('negative', '负面'), ('neutral', '中性')))
+
+
+def discussion_topics(all_results: Dict[str, Any], top_n: int = 10) -> Dict[str, List]:
+    """
+    Emergent topics of all collected posts and comments: hashtags and shared phrases
+    The search keywords themselves are not reported as topics
+    """
+    texts = []
+    for platform, data in all_results.items():
+        texts.extend(item_text(platform, post) for post in data.get('posts', []))
+        texts.extend(item_text(platform, comment, comments=True) for comment in data.get('comments', []))
+    search_terms = {term for keyword in SEARCH_KEYWORDS for term in keyword.split()}
+    return discover_topics(texts, top_n=top_n, exclude=search_terms | set(SEARCH_KEYWORDS))
+
+
+def _keyword_lines(stats: ReportStats, label: str, name: str, limit: int = 10) -> List[str]:
+    """
+    Frequency-ranked sentiment keywords of posts and comments, plain and like-weighted
+    """
+    lines = []
+    for source, aggregator in (('帖子', stats.posts.total), ('评论', stats.comments.total)):
+        ranked = aggregator.top_keywords(limit, label=label)
+        if not ranked:
+            continue
+        lines.append(f"- 高频{name}词汇 ({source}): " + ', '.join(f"{kw}({n})" for kw, n in ranked))
+        weighted = [(kw, w) for kw, w in aggregator.top_keywords(limit, label=label, weighted=True) if w]
+        if weighted:
+            lines.append(f"- 点赞加权{name}词汇 ({source}): " + ', '.join(f"{kw}({w:.0f})" for kw, w in weighted))
+    return lines
+
+
 def print_detailed_samples(platform: str, posts: List[Dict], limit: int = 5):
     """
     Print detailed samples of posts from a platform
@@ -496,10 +928,15 @@ def print_detailed_samples(platform: str, posts: List[Dict], limit: int = 5):
             print(f"Votes: {post.get('voteup_count', 0)}")
 
 
-def generate_final_report(all_results: Dict[str, Any]) -> str:
+def generate_final_report(all_results: Dict[str, Any], stats: Optional[ReportStats] = None) -> str:
     """
     Generate comprehensive sentiment analysis report
+    Reads the streaming statistics fed during collection, or computes them
+    from all_results when stats is not given
     """
+    if stats is None:
+        stats = ReportStats.from_results(all_results)
+
     report = []
     report.append("# 小鹏汽车 IRON 机器人 舆情分析报告")
     report.append(f"\n生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -530,79 +967,64 @@ def generate_final_report(all_results: Dict[str, Any]) -> str:
 
     for platform, data in all_results.items():
         name = platform_names.get(platform, platform)
-        posts = data.get('posts', [])
-        comments = data.get('comments', [])
+        post_stats = stats.posts.group(platform)
+        comment_stats = stats.comments.group(platform)
 
         report.append(f"\n### {name}")
-        report.append(f"- 帖子数量: {len(posts)}")
-        report.append(f"- 评论数量: {len(comments)}")
+        report.append(f"- 帖子数量: {post_stats.count}")
+        report.append(f"- 评论数量: {comment_stats.count}")
 
-        if posts:
-            sentiments = [p.get('_sentiment', 'neutral') for p in posts]
-            positive = sentiments.count('positive')
-            negative = sentiments.count('negative')
-            neutral = sentiments.count('neutral')
+        if post_stats.count:
+            distribution = post_stats.labels()
+            positive = distribution.get('positive', 0)
+            negative = distribution.get('negative', 0)
+            neutral = distribution.get('neutral', 0)
 
             report.append(f"- 情感分布:")
-            report.append(f"  - 正面: {positive} ({positive/len(posts)*100:.1f}%)")
-            report.append(f"  - 负面: {negative} ({negative/len(posts)*100:.1f}%)")
-            report.append(f"  - 中性: {neutral} ({neutral/len(posts)*100:.1f}%)")
+            report.append(f"  - 正面: {positive} ({positive/post_stats.count*100:.1f}%)")
+            report.append(f"  - 负面: {negative} ({negative/post_stats.count*100:.1f}%)")
+            report.append(f"  - 中性: {neutral} ({neutral/post_stats.count*100:.1f}%)")
+            report.append(f"- 点赞加权情感: {_weighted_shares(post_stats.labels(weighted=True))}")
+        if comment_stats.count:
+            report.append(f"- 评论点赞加权情感: {_weighted_shares(comment_stats.labels(weighted=True))}")
 
     # Sentiment Analysis
     report.append("\n## 三、情感分析总览\n")
 
-    all_posts = []
-    for data in all_results.values():
-        all_posts.extend(data.get('posts', []))
-
-    if all_posts:
-        all_sentiments = [p.get('_sentiment', 'neutral') for p in all_posts]
-        total_positive = all_sentiments.count('positive')
-        total_negative = all_sentiments.count('negative')
-        total_neutral = all_sentiments.count('neutral')
-
-        report.append(f"总体情感分布 (基于{len(all_posts)}条帖子):")
-        report.append(f"- 正面评价: {total_positive} ({total_positive/len(all_posts)*100:.1f}%)")
-        report.append(f"- 负面评价: {total_negative} ({total_negative/len(all_posts)*100:.1f}%)")
-        report.append(f"- 中性评价: {total_neutral} ({total_neutral/len(all_posts)*100:.1f}%)")
+    all_posts = stats.posts.total
+    all_comments = stats.comments.total
+    if all_posts.count:
+        overall = all_posts.labels()
+        total_positive = overall.get('positive', 0)
+        total_negative = overall.get('negative', 0)
+        total_neutral = overall.get('neutral', 0)
+
+        report.append(f"总体情感分布 (基于{all_posts.count}条帖子):")
+        report.append(f"- 正面评价: {total_positive} ({total_positive/all_posts.count*100:.1f}%)")
+        report.append(f"- 负面评价: {total_negative} ({total_negative/all_posts.count*100:.1f}%)")
+        report.append(f"- 中性评价: {total_neutral} ({total_neutral/all_posts.count*100:.1f}%)")
+        report.append(f"- 点赞加权: {_weighted_shares(all_posts.labels(weighted=True))}")
+    if all_comments.count:
+        report.append(f"- 评论点赞加权 (基于{all_comments.count}条评论): "
+                      f"{_weighted_shares(all_comments.labels(weighted=True))}")
 
     # Key Insights
     report.append("\n## 四、主要观点汇总\n")
 
     report.append("### 4.1 正面观点")
-    positive_keywords_found = []
-    for post in all_posts:
-        text = str(post.get('text', '') or post.get('desc', '') or post.get('title', '')).lower()
-        for kw in POSITIVE_KEYWORDS:
-            if kw in text and kw not in positive_keywords_found:
-                positive_keywords_found.append(kw)
-    if positive_keywords_found:
-        report.append(f"- 高频正面词汇: {', '.join(positive_keywords_found[:10])}")
+    report.extend(_keyword_lines(stats, 'positive', '正面'))
 
     report.append("\n### 4.2 负面观点")
-    negative_keywords_found = []
-    for post in all_posts:
-        text = str(post.get('text', '') or post.get('desc', '') or post.get('title', '')).lower()
-        for kw in NEGATIVE_KEYWORDS:
-            if kw in text and kw not in negative_keywords_found:
-                negative_keywords_found.append(kw)
-    if negative_keywords_found:
-        report.append(f"- 高频负面词汇: {', '.join(negative_keywords_found[:10])}")
+    report.extend(_keyword_lines(stats, 'negative', '负面'))
 
     report.append("\n### 4.3 讨论热点")
-    # Extract common topics from titles
-    all_titles = []
-    for post in all_posts:
-        title = post.get('text', '') or post.get('desc', '') or post.get('title', '')
-        if title:
-            all_titles.append(str(title)[:100])
-
-    report.append("- 主要讨论话题包括:")
-    report.append("  - IRON机器人产品功能和特性")
-    report.append("  - 价格和性价比讨论")
-    report.append("  - 与其他智能机器人产品对比")
-    report.append("  - 小鹏汽车技术实力评价")
-    report.append("  - 实际使用体验分享")
+    topics = discussion_topics(all_results)
+    if topics['hashtags']:
+        report.append("- 热门话题标签: " + ', '.join(f"#{tag}({n})" for tag, n in topics['hashtags']))
+    if topics['phrases']:
+        report.append("- 高频讨论短语: " + ', '.join(f"{phrase}({n})" for phrase, n in topics['phrases']))
+    if not topics['hashtags'] and not topics['phrases']:
+        report.append("- 数据量不足, 暂未发现显著讨论热点")
 
     # Platform-specific insights
     report.append("\n## 五、各平台特点分析\n")
@@ -650,6 +1072,28 @@ def main():
     """
     Main function to execute XPENG IRON robot sentiment research
     """
+    parser = argparse.ArgumentParser(description='小鹏汽车 IRON 机器人 社交媒体舆情调研工具')
+    parser.add_argument('--parallel', action='store_true',
+                        help='run the platform collectors on a worker pool')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker pool size for --parallel (default: one per platform)')
+    restart = parser.add_mutually_exclusive_group()
+    restart.add_argument('--resume', action='store_true',
+                         help='resume an interrupted run, skipping requests it already completed')
+    restart.add_argument('--fresh', action='store_true',
+                         help='start over even if an interrupted run left a journal (it is kept as .old)')
+    parser.add_argument('--pages', type=int, default=SEARCH_MAX_PAGES,
+                        help=f'max search pages per keyword (default: {SEARCH_MAX_PAGES})')
+    parser.add_argument('--raw-archive', nargs='?', const=RAW_ARCHIVE_FILE, default=None, metavar='PATH',
+                        help=f'also keep the full API payloads, gzip-compressed (default path: {RAW_ARCHIVE_FILE})')
+    parser.add_argument('--archive-responses', nargs='?', const=str(DEFAULT_ARCHIVE_PATH), metavar='DIR',
+                        help='store every raw API response in a compressed, content-addressed archive')
+    parser.add_argument('--replay', nargs='?', const=str(DEFAULT_ARCHIVE_PATH), metavar='DIR',
+                        help='re-run the collection from an archive of raw responses instead of the API')
+    parser.add_argument('--as-of', metavar='TIME',
+                        help='with --replay, replay the archive as of YYYY-MM-DD[ HH:MM[:SS]]')
+    args = parser.parse_args()
+
     print("="*80)
     print("小鹏汽车 IRON 机器人 社交媒体舆情调研工具")
     print("="*80)
@@ -657,55 +1101,93 @@ def main():
     print(f"搜索关键词: {', '.join(SEARCH_KEYWORDS)}")
     print(f"覆盖平台: 微博、抖音、小红书、B站、知乎")
 
+    LEXICONS.memo = ClassificationMemo(path=MEMO_PATH)
+
     # Initialize the TikHub API client
-    client = TikHubAPIClient(use_china_domain=True)
+    try:
+        journal = CheckpointJournal(JOURNAL_PATH, resume=args.resume, fresh=args.fresh)
+    except FileExistsError:
+        parser.error(f'上次采集未完成 ({JOURNAL_PATH}), 使用 --resume 继续或 --fresh 重新开始')
+    if args.resume:
+        print(f"断点续采: 已完成 {len(journal)} 个请求单元")
+    responses = ResponseArchive(args.archive_responses) if args.archive_responses else None
+    replay = ReplayClient(ResponseArchive(args.replay), as_of=parse_time(args.as_of)) if args.replay else None
+    client = build_client(replay or api_client(), cache=False,
+                          rate_limit=replay is None, journal=journal, archive=responses)
 
     # Collect data from all platforms
-    all_results = {}
-
-    # Search Weibo
-    all_results['weibo'] = search_weibo(client, SEARCH_KEYWORDS)
-
-    # Search Douyin
-    all_results['douyin'] = search_douyin(client, SEARCH_KEYWORDS)
-
-    # Search Xiaohongshu
-    all_results['xiaohongshu'] = search_xiaohongshu(client, SEARCH_KEYWORDS)
-
-    # Search Bilibili
-    all_results['bilibili'] = search_bilibili(client, SEARCH_KEYWORDS)
-
-    # Search Zhihu
-    all_results['zhihu'] = search_zhihu(client, SEARCH_KEYWORDS)
-
-    # Print sample posts from each platform
-    print("\n" + "="*80)
-    print("DETAILED CONTENT SAMPLES")
-    print("="*80)
-
-    for platform, data in all_results.items():
-        if data.get('posts'):
-            print_detailed_samples(platform, data['posts'], limit=3)
-
-    # Generate and print final report
-    print("\n" + "="*80)
-    print("GENERATING FINAL REPORT")
-    print("="*80)
-
-    report = generate_final_report(all_results)
-    print(report)
-
-    # Save raw data to JSON file
-    raw_data_file = 'xpeng_iron_robot_research_raw_data.json'
-    with open(raw_data_file, 'w', encoding='utf-8') as f:
-        json.dump(all_results, f, ensure_ascii=False, indent=2)
-    print(f"\n原始数据已保存至: {raw_data_file}")
-
-    # Save report to markdown file
-    report_file = 'xpeng_iron_robot_sentiment_report.md'
-    with open(report_file, 'w', encoding='utf-8') as f:
-        f.write(report)
-    print(f"舆情报告已保存至: {report_file}")
+    stats = ReportStats()
+    sink = JsonlSink(RAW_RECORDS_FILE)
+    archive = JsonlSink(args.raw_archive) if args.raw_archive else None
+    try:
+        try:
+            all_results, timings = collect_all_platforms(client, SEARCH_KEYWORDS,
+                                                         parallel=args.parallel, max_workers=args.workers,
+                                                         max_pages=args.pages, stats=stats, sink=sink,
+                                                         archive=archive)
+        except KeyboardInterrupt:
+            print("\n采集已中断, 使用 --resume 继续")
+            return
+        journal.close()
+        sink.close()
+        if archive is not None:
+            archive.close()
+
+        # Print sample posts from each platform
+        print("\n" + "="*80)
+        print("DETAILED CONTENT SAMPLES")
+        print("="*80)
+
+        for platform, data in all_results.items():
+            if data.get('posts'):
+                print_detailed_samples(platform, data['posts'], limit=3)
+
+        # Generate and print final report
+        print("\n" + "="*80)
+        print("GENERATING FINAL REPORT")
+        print("="*80)
+
+        report = generate_final_report(all_results, stats=stats)
+        print(report)
+
+        # Derive the raw data JSON file from the streamed records
+        export_raw_data(RAW_RECORDS_FILE, RAW_DATA_FILE)
+        print(f"\n原始数据已保存至: {RAW_DATA_FILE}")
+        print(sink.summary())
+        if archive is not None:
+            print(archive.summary())
+
+        # Save report to markdown file
+        report_file = 'xpeng_iron_robot_sentiment_report.md'
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write(report)
+        # The run is complete; a later --resume must not replay it
+        journal.discard()
+        print(f"舆情报告已保存至: {report_file}")
+
+        print_collection_timings(timings)
+        for line in client_summaries(client):
+            print(line)
+        if replay is not None:
+            print(replay.summary())
+        if responses is not None:
+            print(responses.summary())
+    finally:
+        # Every exit path, including an interrupted collection, closes what was opened
+        journal.close()
+        sink.close()
+        if archive is not None:
+            archive.close()
+        if responses is not None:
+            responses.close()
+        if replay is not None:
+            replay.archive.close()
+        # Kept on interrupt too: the results memoized so far are what a --resume reuses
+        LEXICONS.memo.save()
+
+    print("情感词表:")
+    for line in LEXICONS.summary():
+        print(line)
 
     print(f"\n完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("舆情调研完成!")